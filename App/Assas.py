@@ -1,5 +1,4 @@
 import os
-import time
 import pandas as pd
 
 
@@ -10,7 +9,6 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     registros = []
     for i, pdf_path in enumerate(files, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.4)
         progress_cb(int((i / total) * 80))
         try:
             tamanho_kb = os.path.getsize(pdf_path) / 1024
@@ -5,20 +5,25 @@
 #   - PyQt5 (função processar_pdf_custom)
 # ==========================================================
 
-import fitz  # PyMuPDF
 import re
 import os
-import time
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 from pathlib import Path
 import locale
 
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from main import LoaderDialog
+import numpy as np
+
+from processamento import mapear_arquivos
+from texto_pdf import paginas_texto
+from metricas import etapa, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos, tabela_arquivo, juntar
+from estilos import AZUL, VERMELHO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
+
+COLUNAS = ("Data", "Histórico", "Valor")
 
 # Locale brasileiro
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8' if os.name !=
@@ -41,39 +46,30 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento de arquivos Asaas...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_lancamentos_arquivo,
+        progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.4)  # simula processamento
-        progress_cb(int((i / total) * 70))
-
-        try:
-            # 🔸 Extrai texto do PDF (usando PyMuPDF)
-            doc = fitz.open(pdf_path)
-            texto = "\n".join(page.get_text() for page in doc)
-            doc.close()
-
-            lancamentos = extrair_lancamentos(texto)
 
-            for data, descricao, valor, cor in lancamentos:
-                registros.append({
-                    "Data": data,
-                    "Histórico": descricao,
-                    "Valor": valor,
-                    "Cor": cor
-                })
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        if len(df):
+            tabelas.append(df)
 
     # Cria o Excel de saída
-    if registros:
-        df = pd.DataFrame(registros)
+    if tabelas:
+        df = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Asaas_Resultados.xlsx")
 
-        df.to_excel(excel_path, index=False)
+        salvar_planilha(df, excel_path, coluna_valor="Valor",
+                        cores=cores_pelo_valor(df["Valor"]), tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
@@ -83,6 +79,15 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     return True
 
 
+# ==========================================================
+# 🔹 Extrai texto do PDF (PyMuPDF) e os lançamentos dele
+# ==========================================================
+@memorizar(VERSAO_PARSER)
+def extrair_lancamentos_arquivo(pdf_path):
+    texto = "\n".join(paginas_texto(pdf_path))
+    return extrair_lancamentos(texto)
+
+
 # ==========================================================
 # 🔹 Função auxiliar para extrair lançamentos (reutilizável)
 # ==========================================================
@@ -90,19 +95,14 @@ def extrair_lancamentos(texto):
     pattern = re.compile(
         r"(\d{2}/\d{2}/\d{4})\s+(.*?)(R\$ ?-?\d[\d\.,]*)", re.DOTALL)
     matches = pattern.findall(texto)
-    lancamentos = []
+    lancamentos = Lancamentos(COLUNAS, valores=["Valor"], datas=["Data"])
 
+    # "R$ -1.234,56" fica em texto: convertido por coluna na tabela
     for data, descricao, valor in matches:
         if 'saldo' in descricao.lower():
             continue
         descricao = re.sub(r"\s+", " ", descricao).strip()
-        valor_formatado = valor.replace('.', '').replace(
-            ',', '.').replace('R$', '').strip()
-        valor_float = float(valor_formatado)
-        cor = "0000FF" if valor_float > 0 else "FF0000"
-        valor_brasileiro = f"R$ {valor_float:,.2f}".replace(
-            ",", "v").replace(".", ",").replace("v", ".")
-        lancamentos.append([data, descricao, valor_brasileiro, cor])
+        lancamentos.adicionar(data, descricao, valor)
 
     return lancamentos
 
@@ -111,6 +111,9 @@ def extrair_lancamentos(texto):
 # 🔹 Função Desktop (usada pela Central de Bancos original)
 # ==========================================================
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     try:
         while True:
             caminhos_pdf, _ = QFileDialog.getOpenFileNames(
@@ -126,14 +129,8 @@ def processar_pdf_custom(qt_parent):
 
                 try:
                     dialog.atualizar_progresso(10)
-                    doc = fitz.open(caminho_pdf)
-                    dialog.atualizar_progresso(30)
-
-                    texto = "\n".join(page.get_text() for page in doc)
-                    doc.close()
-                    dialog.atualizar_progresso(50)
-
-                    lancamentos = extrair_lancamentos(texto)
+                    with dialog.acompanhar(10, 70):
+                        lancamentos = extrair_lancamentos_arquivo(caminho_pdf)
                     dialog.atualizar_progresso(70)
 
                     if not lancamentos:
@@ -169,61 +166,16 @@ def processar_pdf_custom(qt_parent):
 # ==========================================================
 # 🔹 Função de salvamento Excel (usada pelas duas versões)
 # ==========================================================
+def cores_pelo_valor(valores):
+    # Azul só para entradas; zero e saídas em vermelho
+    return np.where((valores > 0).fillna(False), AZUL, VERMELHO)
+
+
 def salvar_em_excel(caminho_pdf, lancamentos):
-    # Remove a coluna 'Cor' já na criação do DataFrame
-    df = pd.DataFrame(lancamentos, columns=[
-                      "Data", "Histórico", "Valor", "Cor"])
-    # mantém apenas as colunas desejadas
-    df = df[["Data", "Histórico", "Valor"]]
+    with etapa(TABELA, linhas=len(lancamentos)):
+        df = lancamentos.tabela()
 
     caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
-    df.to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    # ======= ESTILO DO CABEÇALHO =======
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    # ======= APLICA COR AO VALOR =======
-    for row in range(2, len(df) + 2):
-        valor_cell = ws.cell(row=row, column=3)
-        try:
-            valor_texto = str(valor_cell.value).replace(
-                "R$", "").replace(".", "").replace(",", ".").strip()
-            valor_num = float(valor_texto)
-            if valor_num > 0:
-                valor_cell.font = Font(color="0000FF")  # azul
-            elif valor_num < 0:
-                valor_cell.font = Font(color="FF0000")  # vermelho
-            valor_cell.alignment = Alignment(horizontal="right")
-        except:
-            continue
-
-    # ======= AJUSTA LARGURA DAS COLUNAS =======
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    # ======= CRIA ESTILO DE TABELA =======
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium9",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
+    return salvar_planilha(df, caminho_excel,
+                           coluna_valor="Valor", cores=cores_pelo_valor(df["Valor"]),
+                           estilo_tabela="TableStyleMedium9")
@@ -1,21 +1,36 @@
-import fitz
 import pandas as pd
 import re
 import os
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+from itertools import chain
 
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from texto_pdf import linhas_pdf
+from metricas import etapa, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
 
 
 # ==========================================================
 # 🔹 Função de Extração
 # ==========================================================
-def extrair_lancamentos(texto):
-    match_data = re.search(r"Mês:\s+([A-Za-zçÇ]+)[/\s](\d{4})", texto)
+def extrair_lancamentos(linhas):
+    if isinstance(linhas, str):
+        linhas = linhas.splitlines()
+
+    # Guarda as linhas até achar o "Mês:" do cabeçalho
+    linhas = iter(linhas)
+    pendentes = []
+    match_data = None
+    for linha in linhas:
+        pendentes.append(linha)
+        match_data = re.search(r"Mês:\s+([A-Za-zçÇ]+)[/\s](\d{4})",
+                               "\n".join(pendentes[-3:]))
+        if match_data:
+            break
     if not match_data:
         raise ValueError("Mês e ano não encontrados.")
     mes_nome, ano = match_data.groups()
@@ -28,7 +43,6 @@ def extrair_lancamentos(texto):
     if not mes:
         raise ValueError(f"Mês inválido: {mes_nome}")
 
-    linhas = texto.splitlines()
     lancamentos = []
     dia_atual = None
 
@@ -36,7 +50,7 @@ def extrair_lancamentos(texto):
         r"^\s*(?:(\d{1,2})\s+)?([A-ZÇÃÂÉÈÓÔÕÍ\s0-9\-\.]+?)\s+(\d{4,5})\s+([\d\.]+,\d{2})(\+|\-)"
     )
 
-    for linha in linhas:
+    for linha in chain(pendentes, linhas):
         match = padrao.search(linha)
         if match:
             dia, historico, documento, valor, sinal = match.groups()
@@ -44,13 +58,21 @@ def extrair_lancamentos(texto):
                 dia_atual = int(dia)
             if dia_atual is None:
                 continue
-            valor_float = float(valor.replace('.', '').replace(',', '.'))
-            if sinal == "-":
-                valor_float *= -1
+            # "1.234,56-": valor e sinal convertidos por coluna na tabela
             data = f"{dia_atual:02d}/{mes}/{ano}"
-            lancamentos.append([data, historico.strip().title(), valor_float])
+            lancamentos.append([data, historico.strip().title(), valor + sinal])
 
-    return pd.DataFrame(lancamentos, columns=["Data", "Histórico", "Valor"])
+    with etapa(TABELA, linhas=len(lancamentos)):
+        df = pd.DataFrame(lancamentos, columns=["Data", "Histórico", "Valor"])
+        return normalizar(df, colunas_valor=["Valor"], colunas_data=["Data"])
+
+
+# ==========================================================
+# 🔹 Linhas do PDF (PyMuPDF) + extração
+# ==========================================================
+@memorizar(VERSAO_PARSER)
+def extrair_lancamentos_arquivo(caminho_pdf):
+    return extrair_lancamentos(linhas_pdf(caminho_pdf))
 
 
 # ==========================================================
@@ -61,72 +83,16 @@ def salvar_em_excel(df, pdf_path):
     nome_base = os.path.splitext(nome)[0]
     caminho_excel = os.path.join(pasta, f"{nome_base}.xlsx")
 
-    df.to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=3):
-        for cell in row:
-            cell.border = thin_border
-            if cell.column == 3:
-                valor = cell.value
-                if isinstance(valor, (int, float)):
-                    cell.number_format = '#,##0.00'
-                    if valor < 0:
-                        cell.font = Font(color='FF0000')
-                    else:
-                        cell.font = Font(color='0000FF')
-                    cell.alignment = Alignment(horizontal="right")
-                else:
-                    cell.alignment = Alignment(horizontal="left")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor")
 
 
 # ==========================================================
 # 🔹 Função Desktop (Central de Bancos original)
 # ==========================================================
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     try:
         while True:
             caminhos_pdf, _ = QFileDialog.getOpenFileNames(
@@ -143,16 +109,8 @@ def processar_pdf_custom(qt_parent):
 
                 try:
                     dialog.atualizar_progresso(10)
-
-                    texto = ""
-                    with fitz.open(caminho_pdf) as doc:
-                        dialog.atualizar_progresso(30)
-                        for page in doc:
-                            texto += page.get_text()
-
-                    dialog.atualizar_progresso(50)
-
-                    df = extrair_lancamentos(texto)
+                    with dialog.acompanhar(10, 70):
+                        df = extrair_lancamentos_arquivo(caminho_pdf)
                     dialog.atualizar_progresso(70)
 
                     if df.empty:
@@ -192,24 +150,22 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     registros = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_arquivo, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        progress_cb(int((i / total) * 70))
 
-        try:
-            with fitz.open(pdf_path) as doc:
-                texto = "\n".join(page.get_text() for page in doc)
-            df = extrair_lancamentos(texto)
-            if not df.empty:
-                registros.append(df)
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+        elif not df.empty:
+            registros.append(df)
 
     if registros:
-        df_final = pd.concat(registros, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(registros, ignore_index=True)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "BNB_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="Valor", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado.")
@@ -1,18 +1,30 @@
 import os
-import re
-import fitz
-import pandas as pd
-
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication, QDialog
-from PyQt5.QtCore import QThread, pyqtSignal, QObject
-
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
-from openpyxl.worksheet.table import Table, TableStyleInfo
-
-from main import LoaderDialog
-import time
+import functools
+
+from processamento import mapear_arquivos
+from progresso import acompanhar
+from texto_pdf import linhas_pdf
+from metricas import etapa, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos
+from lexico import Linha, DATA, VALOR
+from filtro import Filtro
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "5"
+
+COLUNAS = ("Data", "Lançamento", "Valor (R$)")
+
+# Cabeçalho e rodapé do Net Empresa (sem diferença de caixa)
+CABECALHO_RODAPE = Filtro(
+    trechos=["UNISESCAP CEARA", "bradesco", "net empresa", "Assistente de IA",
+             "Nome do usuário:"],
+    padroes=[r"Folha \d+/\d+",
+             r"Extrato Mensal\s*/\s*Por Período",
+             r"CNPJ[:\s]*\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
+             r"Data da operação: \d{2}/\d{2}/\d{4}"],
+)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -31,25 +43,21 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento dos arquivos do Bradesco...")
 
     total = len(files)
-    todos_dados = []
+    todos_dados = Lancamentos(COLUNAS, valores=["Valor (R$)"], datas=["Data"])
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Lendo arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
 
-        try:
-            dados = extrair_lancamentos(pdf_path)
-            if dados:
-                todos_dados.extend(dados)
-                log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
-
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif dados:
+            todos_dados.estender(dados)
+            log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if todos_dados:
         excel_path = os.path.join(output_dir, "Bradesco_Resultados.xlsx")
@@ -63,218 +71,114 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Worker: executa extração + salvamento em background e emite marcos (10/60/90)
+# Worker: executa extração + salvamento em background e emite marcos reais
+# (10 → 60 conforme as páginas são lidas, 90 após o Excel)
 # ──────────────────────────────────────────────────────────────────────────────
-class FileWorker(QThread):
-    milestone = pyqtSignal(int)                 # 10, 60, 90
-    finished_with_status = pyqtSignal(str, str)  # ("ok"|"vazio"|"erro", extra)
-
-    def __init__(self, caminho_pdf: str, parent=None):
-        super().__init__(parent)
-        self._caminho_pdf = caminho_pdf
-
-    def run(self):
-        try:
-            self.milestone.emit(10)
-            dados = extrair_lancamentos(self._caminho_pdf)
-            self.milestone.emit(60)
-
-            if not dados:
+@functools.lru_cache(maxsize=None)
+def _classe_worker():
+    # A classe depende do Qt: é criada só quando o Desktop a pede
+    from PyQt5.QtCore import QThread, pyqtSignal
+
+    class FileWorker(QThread):
+        milestone = pyqtSignal(int)                 # 10..60 por página, 90
+        finished_with_status = pyqtSignal(str, str)  # ("ok"|"vazio"|"erro", extra)
+
+        def __init__(self, caminho_pdf: str, parent=None):
+            super().__init__(parent)
+            self._caminho_pdf = caminho_pdf
+
+        def run(self):
+            try:
+                self.milestone.emit(10)
+                with acompanhar(lambda f: self.milestone.emit(10 + int(50 * f))):
+                    dados = extrair_lancamentos(self._caminho_pdf)
+                self.milestone.emit(60)
+
+                if not dados:
+                    self.finished_with_status.emit(
+                        "vazio", os.path.basename(self._caminho_pdf))
+                    return
+
+                salvar_excel(dados, self._caminho_pdf)
+                self.milestone.emit(90)
+                self.finished_with_status.emit("ok", "")
+            except Exception as e:
                 self.finished_with_status.emit(
-                    "vazio", os.path.basename(self._caminho_pdf))
-                return
-
-            salvar_excel(dados, self._caminho_pdf)
-            self.milestone.emit(90)
-            self.finished_with_status.emit("ok", "")
-        except Exception as e:
-            self.finished_with_status.emit(
-                "erro", f"{os.path.basename(self._caminho_pdf)}: {str(e)}")
+                    "erro", f"{os.path.basename(self._caminho_pdf)}: {str(e)}")
 
-
-# ──────────────────────────────────────────────────────────────────────────────
-# Loader suave: anima de 5 em 5% até o alvo atual; segura no alvo até mudar
-# ──────────────────────────────────────────────────────────────────────────────
-class ProgressThread(QThread):
-    progress = pyqtSignal(int)
-
-    def __init__(self, step_ms: int = 120, parent=None):
-        super().__init__(parent)
-        self._step_ms = max(16, int(step_ms))
-        self._val = 0
-        self._target = 0
-        self._finishing = False
-
-    def set_target(self, percent: int):
-        self._target = max(0, min(int(percent), 100))
-
-    def stop_and_finish(self):
-        self._finishing = True
-        self._target = 100
-
-    def run(self):
-        self._val = 0
-        self._target = 0
-        self.progress.emit(0)
-        while True:
-            if self._val >= self._target:
-                if self._finishing and self._val >= 100:
-                    self.progress.emit(100)
-                    break
-                self.msleep(self._step_ms)
-                continue
-            self._val = min(self._target, self._val + 5)
-            self.progress.emit(self._val)
-            self.msleep(self._step_ms)
+    return FileWorker
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Filtros de texto e extração (fitz)
 # ──────────────────────────────────────────────────────────────────────────────
 def linha_eh_cabecalho_ou_rodape(linha: str) -> bool:
-    padroes_excluir = [
-        r"Folha \d+/\d+",
-        r"Extrato Mensal\s*/\s*Por Período",
-        r"CNPJ[:\s]*\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
-        r"Nome do usuário:.*",
-        r"Data da operação: \d{2}/\d{2}/\d{4}",
-        r"UNISESCAP CEARA",
-        r"bradesco",
-        r"net empresa",
-        r"Assistente de IA",
-    ]
-    return any(re.search(p, linha, re.IGNORECASE) for p in padroes_excluir)
+    return CABECALHO_RODAPE.acha(linha)
 
 
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path: str):
-    texto_total = ""
-    with fitz.open(pdf_path) as doc:
-        for pagina in doc:
-            texto_total += pagina.get_text()
-
-    linhas = texto_total.splitlines()
-    data_regex = re.compile(r"^\d{2}/\d{2}/\d{4}$")
-    valor_regex = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{2}")
-    ignorar_regex = re.compile(r"\b(SALDO|TOTAL)\b", re.IGNORECASE)
-
-    lancamentos = []
+    lancamentos = Lancamentos(COLUNAS, valores=["Valor (R$)"], datas=["Data"])
     data_atual = None
     descricao_temp = ""
-    i = 0
+    ultima = None
 
-    while i < len(linhas):
-        linha = linhas[i].strip()
+    for bruta in linhas_pdf(pdf_path):
+        # cada linha é lida uma vez só; a anterior (mesmo em branco)
+        # é usada quando o valor vem sem descrição
+        anterior, ultima = ultima, Linha(bruta.strip())
+        linha = ultima
+        texto = linha.texto
 
-        if linha_eh_cabecalho_ou_rodape(linha):
-            i += 1
+        if linha_eh_cabecalho_ou_rodape(texto):
             continue
 
-        if data_regex.match(linha):
-            data_atual = linha
+        if linha.so(DATA):
+            data_atual = texto
             descricao_temp = ""
-            i += 1
             continue
 
         if not data_atual:
-            i += 1
             continue
 
-        if ignorar_regex.search(linha):
-            i += 1
+        if linha.tem_palavra("SALDO", "TOTAL"):
             continue
 
-        valores = re.findall(valor_regex, linha)
-        valores_float = [float(v.replace('.', '').replace(',', '.'))
-                         for v in valores]
+        # valores ficam em texto: convertidos por coluna na tabela
+        valores = linha.todos(VALOR)
 
-        if valores_float:
+        if valores:
             if descricao_temp:
-                descricao = descricao_temp.strip()
-                if not ignorar_regex.search(descricao):
-                    for valor in valores_float:
-                        lancamentos.append(
-                            {'Data': data_atual, 'Lançamento': descricao, 'Valor (R$)': valor})
+                # só entram linhas sem SALDO/TOTAL: não precisa reler
+                for valor in valores:
+                    lancamentos.adicionar(data_atual, descricao_temp, valor)
                 descricao_temp = ""
-            else:
-                if (i > 0 and not data_regex.match(linhas[i - 1].strip()) and not valor_regex.search(linhas[i - 1])):
-                    descricao_temp = linhas[i - 1].strip()
-                    if not ignorar_regex.search(descricao_temp):
-                        for valor in valores_float:
-                            lancamentos.append(
-                                {'Data': data_atual, 'Lançamento': descricao_temp, 'Valor (R$)': valor})
-                    descricao_temp = ""
-        else:
-            if linha and not ignorar_regex.search(linha):
-                descricao_temp = (descricao_temp + " " +
-                                  linha).strip() if descricao_temp else linha
-
-        i += 1
+            elif (anterior is not None and not anterior.so(DATA)
+                  and not anterior.primeiro(VALOR)):
+                if not anterior.tem_palavra("SALDO", "TOTAL"):
+                    for valor in valores:
+                        lancamentos.adicionar(data_atual, anterior.texto, valor)
+        elif texto:
+            descricao_temp = (descricao_temp + " " +
+                              texto).strip() if descricao_temp else texto
 
     return lancamentos
 
 
 def salvar_excel(dados, caminho_pdf: str) -> str:
-    df = pd.DataFrame(dados)
+    with etapa(TABELA, linhas=len(dados)):
+        df = dados.tabela()
 
     pasta = os.path.dirname(caminho_pdf)
     nome_base = os.path.splitext(os.path.basename(caminho_pdf))[0]
     excel_path = os.path.join(pasta, f"{nome_base}.xlsx")
 
-    df.to_excel(excel_path, index=False)
-
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-
-    valor_col_index = None
-    for idx, cell in enumerate(ws[1], 1):
-        if cell.value == 'Valor (R$)':
-            valor_col_index = idx
-            break
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.column == valor_col_index:
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = '#,##0.00'
-                    if cell.value > 0:
-                        cell.font = Font(color="0000FF")
-                    elif cell.value < 0:
-                        cell.font = Font(color="FF0000")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(name="TableStyleMedium2", showFirstColumn=False,
-                            showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(excel_path)
-    return excel_path
-
-
-def _fechar_loader_com_seguranca(dialog: QDialog):
+    return salvar_planilha(df, excel_path, coluna_valor='Valor (R$)')
+
+
+def _fechar_loader_com_seguranca(dialog):
+    from PyQt5.QtWidgets import QApplication, QDialog
+
     try:
         if isinstance(dialog, QDialog):
             dialog.accept()
@@ -287,6 +191,10 @@ def _fechar_loader_com_seguranca(dialog: QDialog):
 
 
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from PyQt5.QtCore import QEventLoop
+    from main import LoaderDialog
+
     try:
         while True:
             caminhos_pdf, _ = QFileDialog.getOpenFileNames(
@@ -303,12 +211,8 @@ def processar_pdf_custom(qt_parent):
                 dialog.show()
                 QApplication.processEvents()
 
-                loader = ProgressThread(step_ms=120, parent=dialog)
-                loader.progress.connect(dialog.atualizar_progresso)
-                loader.start()
-
-                worker = FileWorker(caminho_pdf, parent=dialog)
-                worker.milestone.connect(loader.set_target)
+                worker = _classe_worker()(caminho_pdf, parent=dialog)
+                worker.milestone.connect(dialog.atualizar_progresso)
 
                 status_result = {"status": None, "extra": ""}
 
@@ -317,14 +221,12 @@ def processar_pdf_custom(qt_parent):
                     status_result["extra"] = extra
 
                 worker.finished_with_status.connect(_on_finished)
-                worker.start()
 
-                while worker.isRunning():
-                    QApplication.processEvents()
-                    QThread.msleep(50)
+                espera = QEventLoop()
+                worker.finished.connect(espera.quit)
+                worker.start()
+                espera.exec_()
 
-                loader.stop_and_finish()
-                loader.wait()
                 dialog.atualizar_progresso(100)
                 QApplication.processEvents()
 
@@ -1,14 +1,18 @@
-import pdfplumber
+import numpy as np
 import pandas as pd
 import os
-import time
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from estilos import AZUL, VERMELHO
+from normalizacao import centavos, datas, NULO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "1"
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -29,23 +33,19 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     todos_dados = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_dados_pdf, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Lendo arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            dados = extrair_dados_pdf(pdf_path)
-            if dados:
-                todos_dados.extend(dados)
-                log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
 
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif dados:
+            todos_dados.extend(dados)
+            log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if todos_dados:
         excel_path = os.path.join(
@@ -62,6 +62,7 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ──────────────────────────────────────────────────────────────────────────────
 # Extração dos dados do PDF
 # ──────────────────────────────────────────────────────────────────────────────
+@memorizar(VERSAO_PARSER)
 def extrair_dados_pdf(pdf_path):
     dados = []
     data_atual = None
@@ -69,9 +70,12 @@ def extrair_dados_pdf(pdf_path):
     documento_temp = ""
     valor_temp = ""
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tabela = page.extract_table()
+    with etapa(ABRIR):
+        pdf = abrir_pdf(pdf_path, "pdfplumber")
+    with pdf:
+        for page in paginas(pdf.pages):
+            with etapa(TEXTO):
+                tabela = page.extract_table()
             if tabela:
                 for linha in tabela:
                     if linha and len(linha) >= 7:
@@ -107,90 +111,48 @@ def extrair_dados_pdf(pdf_path):
 # ──────────────────────────────────────────────────────────────────────────────
 # Salvamento e formatação do Excel
 # ──────────────────────────────────────────────────────────────────────────────
+def _converter_valores(valores):
+    """'1.234,56 C' → 123456 centavos (azul); 'D' vira negativo em vermelho."""
+    texto = valores.fillna("").astype(str)
+    convertidos = centavos(texto, erros=NULO)
+    cores = np.select([texto.str.contains("C", regex=False),
+                       texto.str.contains("D", regex=False)],
+                      [AZUL, VERMELHO], None)
+    # O que não for valor segue como texto, sem cor
+    validos = convertidos.notna().to_numpy()
+    return (np.where(validos, convertidos.to_numpy(dtype=object, na_value=None),
+                     texto.to_numpy()),
+            np.where(validos, cores, None))
+
+
 def salvar_para_excel(dados, caminho_pdf):
     pasta, nome_pdf = os.path.split(caminho_pdf)
     nome_excel = os.path.splitext(nome_pdf)[0] + ".xlsx"
     caminho_excel = os.path.join(pasta, nome_excel)
 
-    df = pd.DataFrame(
-        dados, columns=["Data", "Histórico", "Documento", "Valor"])
-    df = df[~df["Histórico"].str.contains("S A L D O", na=False)]
-    df = df[~df["Histórico"].str.contains("Saldo Anterior", na=False)]
-    df.to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-    ws.freeze_panes = 'A2'
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(
+            dados, columns=["Data", "Histórico", "Documento", "Valor"])
+        df = df[~df["Histórico"].str.contains("S A L D O", na=False)]
+        df = df[~df["Histórico"].str.contains("Saldo Anterior", na=False)]
 
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
+        valores, cores = _converter_valores(df["Valor"])
+        df = df.assign(Valor=valores)
+        convertidas = datas(df["Data"], erros=NULO)
+        if convertidas.notna().all():
+            df = df.assign(Data=convertidas.to_numpy())
 
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=4):
-        for cell in row:
-            cell.border = thin_border
-            if cell.column == 4:
-                try:
-                    valor_str = str(cell.value).strip()
-                    if "C" in valor_str:
-                        valor_str = valor_str.replace(
-                            "C", "").replace(".", "").replace(",", ".")
-                        valor = float(valor_str)
-                        cell.value = valor
-                        cell.font = Font(color="0000FF")  # Azul = positivo
-                    elif "D" in valor_str:
-                        valor_str = valor_str.replace(
-                            "D", "").replace(".", "").replace(",", ".")
-                        valor = float(valor_str)
-                        cell.value = -valor
-                        cell.font = Font(color="FF0000")  # Vermelho = negativo
-                    else:
-                        valor_str = valor_str.replace(
-                            ".", "").replace(",", ".")
-                        valor = float(valor_str)
-                        cell.value = valor
-
-                    cell.number_format = '#,##0.00'
-                    cell.alignment = Alignment(horizontal="right")
-                except:
-                    pass
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 3
-
-    num_linhas = ws.max_row
-    ultima_coluna = get_column_letter(ws.max_column)
-    tab = Table(displayName="TabelaLancamentos",
-                ref=f"A1:{ultima_coluna}{num_linhas}")
-
-    estilo = TableStyleInfo(name="TableStyleMedium2",
-                            showFirstColumn=False,
-                            showLastColumn=False,
-                            showRowStripes=True,
-                            showColumnStripes=False)
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor",
+                           cores=cores, folga=3)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Fluxo padrão PyQt5 (Desktop)
 # ──────────────────────────────────────────────────────────────────────────────
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     try:
         while True:
             arquivos_pdf, _ = QFileDialog.getOpenFileNames(
@@ -206,7 +168,8 @@ def processar_pdf_custom(qt_parent):
 
                 try:
                     dialog.atualizar_progresso(10)
-                    dados = extrair_dados_pdf(arquivo_pdf)
+                    with dialog.acompanhar(10, 60):
+                        dados = extrair_dados_pdf(arquivo_pdf)
                     dialog.atualizar_progresso(60)
 
                     if dados:
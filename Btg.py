@@ -1,13 +1,17 @@
-import fitz
 import os
 import re
 import pandas as pd
-import time
 from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar, NULO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -28,26 +32,23 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     dfs = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_pdf, files, progress_cb=progress_cb, faixa=(0, 80))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Processando arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            df = extrair_lancamentos_pdf(pdf_path)
-            if not df.empty:
-                dfs.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
 
-        time.sleep(0.2)
-        progress_cb(int((i / total) * 80))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif not df.empty:
+            dfs.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if dfs:
-        df_final = pd.concat(dfs, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(dfs, ignore_index=True)
         excel_path = os.path.join(output_dir, "BTG_Resultados.xlsx")
         salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
@@ -61,12 +62,15 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ──────────────────────────────────────────────────────────────────────────────
 # Extração dos lançamentos
 # ──────────────────────────────────────────────────────────────────────────────
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_pdf(caminho_pdf):
-    doc = fitz.open(caminho_pdf)
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
     linhas_extraidas = []
 
-    for pagina in doc:
-        blocks = pagina.get_text("blocks")
+    for pagina in paginas(doc):
+        with etapa(TEXTO):
+            blocks = pagina.get_text("blocks")
         for b in blocks:
             for linha in b[4].split('\n'):
                 linha_limpa = linha.strip()
@@ -94,11 +98,7 @@ def extrair_lancamentos_pdf(caminho_pdf):
                     break
 
                 if padrao_valor.fullmatch(atual):
-                    valor_raw = atual
-                    try:
-                        valor = float(valor_raw.replace(".", "").replace(",", "."))
-                    except ValueError:
-                        valor = None
+                    valor = atual  # convertido por coluna na tabela
                     i += 1
                     break
                 else:
@@ -116,13 +116,14 @@ def extrair_lancamentos_pdf(caminho_pdf):
         else:
             i += 1
 
-    df = pd.DataFrame(blocos, columns=[
-        "Data lançamento", "Descrição do lançamento", "Entradas / Saídas (R$)"
-    ])
+    with etapa(TABELA, linhas=len(blocos)):
+        df = pd.DataFrame(blocos, columns=[
+            "Data lançamento", "Descrição do lançamento", "Entradas / Saídas (R$)"
+        ])
 
-    df["Data lançamento"] = pd.to_datetime(df["Data lançamento"], format="%d/%m/%Y", errors='coerce')
-    df = df.dropna(subset=["Data lançamento"]).reset_index(drop=True)
-    df["Data lançamento"] = df["Data lançamento"].dt.strftime("%d/%m/%Y")
+        df = normalizar(df, colunas_valor=["Entradas / Saídas (R$)"],
+                        colunas_data=["Data lançamento"], erros=NULO)
+        df = df.dropna(subset=["Data lançamento"]).reset_index(drop=True)
     return df
 
 
@@ -131,54 +132,21 @@ def extrair_lancamentos_pdf(caminho_pdf):
 # ──────────────────────────────────────────────────────────────────────────────
 def salvar_em_excel(df, caminho_pdf):
     caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Lançamentos"
-
-    bold = Font(bold=True, color="FFFFFF")
-    center = Alignment(horizontal="center")
-    money_fmt = "#,##0.00"
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-
-    ws.freeze_panes = 'A2'
-
-    # Cabeçalhos
-    for col_idx, coluna in enumerate(df.columns, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=coluna)
-        cell.font = bold
-        cell.fill = header_fill
-        cell.alignment = center
-        cell.border = border
-
-    # Dados
-    for row_idx, row in enumerate(df.itertuples(index=False), start=2):
-        for col_idx, valor in enumerate(row, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=valor)
-            cell.border = border
-
-            if col_idx == 3 and isinstance(valor, float):
-                cell.number_format = money_fmt
-                cell.font = Font(color="0000FF" if valor >= 0 else "FF0000")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    ws.column_dimensions["A"].width = 14
-    ws.column_dimensions["B"].width = 80
-    ws.column_dimensions["C"].width = 18
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    larguras = {"Data lançamento": 14, "Descrição do lançamento": 80,
+                "Entradas / Saídas (R$)": 18}
+    return salvar_planilha(df, caminho_excel,
+                           coluna_valor="Entradas / Saídas (R$)",
+                           larguras=larguras, tabela=None,
+                           titulo="Lançamentos")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Fluxo padrão PyQt5 (Desktop)
 # ──────────────────────────────────────────────────────────────────────────────
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -197,7 +165,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    df = extrair_lancamentos_pdf(caminho_pdf)
                 dialog.atualizar_progresso(60)
                 salvar_em_excel(df, caminho_pdf)
                 dialog.atualizar_progresso(100)
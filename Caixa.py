@@ -1,16 +1,20 @@
 import re
 import os
-import time
 import pandas as pd
-import fitz  # PyMuPDF
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 
-# ✅ Importa LoaderDialog
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from texto_pdf import paginas_texto
+from metricas import etapa, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar
+from estilos import AZUL, VERMELHO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+# Linhas do fim de cada página levadas para a seguinte
+LINHAS_RESTO = 6
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -31,33 +35,26 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     dfs = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos, files, progress_cb=progress_cb, faixa=(0, 80))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Processando arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            df = extrair_lancamentos(pdf_path)
-            if not df.empty:
-                dfs.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {e}")
 
-        time.sleep(0.2)
-        progress_cb(int((i / total) * 80))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {erro}")
+        elif not df.empty:
+            dfs.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if dfs:
-        df_final = pd.concat(dfs, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(dfs, ignore_index=True)
         excel_path = os.path.join(output_dir, "Caixa_Resultados.xlsx")
 
-        df_final.to_excel(excel_path, index=False, columns=[
-            "Data Mov.", "Histórico", "Valor"
-        ])
-
-        aplicar_formatacao_excel(excel_path, df_final["Tipo"].tolist())
+        salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha final salva em: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento válido encontrado.")
@@ -69,97 +66,48 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ──────────────────────────────────────────────────────────────────────────────
 # Extração de lançamentos do PDF
 # ──────────────────────────────────────────────────────────────────────────────
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path):
-    doc = fitz.open(pdf_path)
-    texto = ""
-    for pagina in doc:
-        texto += pagina.get_text()
-    doc.close()
-
-    padrao = re.findall(
-        r'(\d{2}/\d{2}/\d{4})\s+\d{6}\s+(.*?)\s+([\d.,]+)\s+([CD])', texto)
+    padrao = re.compile(
+        r'(\d{2}/\d{2}/\d{4})\s+\d{6}\s+(.*?)\s+([\d.,]+)\s+([CD])')
 
     dados = []
-    for data, historico, valor, tipo in padrao:
-        valor_float = float(valor.replace('.', '').replace(',', '.'))
-        dados.append([data, historico.strip(), valor_float, tipo])
-
-    df = pd.DataFrame(
-        dados, columns=["Data Mov.", "Histórico", "Valor", "Tipo"])
-    df = df[~df["Histórico"].str.upper().str.contains("SALDO")]
+    resto = ""
+    for texto in paginas_texto(pdf_path):
+        # o que sobrou da página anterior pode completar um lançamento
+        texto = resto + texto
+        fim = 0
+        for m in padrao.finditer(texto):
+            data, historico, valor, tipo = m.groups()
+            dados.append([data, historico.strip(), valor, tipo])
+            fim = m.end()
+        resto = "\n".join(texto[fim:].splitlines()[-LINHAS_RESTO:]) + "\n"
+
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(
+            dados, columns=["Data Mov.", "Histórico", "Valor", "Tipo"])
+        df = df[~df["Histórico"].str.upper().str.contains("SALDO")]
+        df = normalizar(df, colunas_valor=["Valor"], colunas_data=["Data Mov."])
     return df
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Formatação do Excel
 # ──────────────────────────────────────────────────────────────────────────────
-def aplicar_formatacao_excel(excel_path, tipos):
-    wb = load_workbook(excel_path)
-    ws = wb.active
-
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    # Cabeçalhos
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Colore e formata valores
-    for idx, row in enumerate(ws.iter_rows(min_row=2, min_col=3, max_col=3), start=0):
-        cell = row[0]
-        cell.number_format = '#,##0.00'
-        cell.border = thin_border
-        if tipos[idx] == 'C':
-            cell.font = Font(color="0000FF")  # Azul = crédito
-        else:
-            cell.font = Font(color="FF0000")  # Vermelho = débito
-        cell.alignment = Alignment(horizontal="right")
-
-    # Alinha as demais colunas
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=3):
-        for cell in row:
-            if cell.col_idx != 3:
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal="left")
-
-    # Ajusta largura das colunas
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    # Adiciona tabela
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(excel_path)
+def salvar_em_excel(df, excel_path):
+    # Azul = crédito (C), vermelho = débito (D)
+    cores = [AZUL if tipo == 'C' else VERMELHO for tipo in df["Tipo"]]
+    return salvar_planilha(df[["Data Mov.", "Histórico", "Valor"]], excel_path,
+                           coluna_valor="Valor", cores=cores)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Fluxo padrão PyQt5 (Desktop)
 # ──────────────────────────────────────────────────────────────────────────────
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos_pdf, _ = QFileDialog.getOpenFileNames(
             qt_parent, "Selecione um ou mais PDFs da Caixa", "", "PDF Files (*.pdf)"
@@ -174,7 +122,8 @@ def processar_pdf_custom(qt_parent):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos(pdf_path)
+                with dialog.acompanhar(10, 50):
+                    df = extrair_lancamentos(pdf_path)
                 dialog.atualizar_progresso(50)
 
                 if df.empty:
@@ -185,11 +134,7 @@ def processar_pdf_custom(qt_parent):
                     continue
 
                 excel_path = os.path.splitext(pdf_path)[0] + ".xlsx"
-                df.to_excel(excel_path, index=False, columns=[
-                    "Data Mov.", "Histórico", "Valor"])
-                dialog.atualizar_progresso(80)
-
-                aplicar_formatacao_excel(excel_path, df["Tipo"].tolist())
+                salvar_em_excel(df, excel_path)
                 dialog.atualizar_progresso(100)
 
             except Exception as e:
@@ -1,18 +1,18 @@
-import re
 import os
-import time
-import fitz  # PyMuPDF
-import pandas as pd
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils.dataframe import dataframe_to_rows
 
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos, tabela_arquivo, juntar
+from lexico import Linha, DATA, DATA_CURTA, VALOR
 
-# ✅ Importa LoaderDialog
-from main import LoaderDialog
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "5"
+
+COLUNAS = ("Data", "Lançamento", "Valor")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -31,45 +31,31 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento dos extratos do Banco Daycoval...")
 
     total = len(files)
-    todos_dados = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_lancamentos,
+        progress_cb=progress_cb, faixa=(0, 80))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Lendo arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            dados = extrair_lancamentos(pdf_path)
-            if dados:
-                todos_dados.extend(dados)
-                log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
 
-        time.sleep(0.2)
-        progress_cb(int((i / total) * 80))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif len(dados):
+            tabelas.append(dados)
+            log_cb(f"✅ {len(dados)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
-    if todos_dados:
-        df = pd.DataFrame(todos_dados)
-        df = df[~df["Lançamento"].str.lower().str.contains("saldo")]
+    if tabelas:
+        df = juntar(tabelas)
+        with etapa(TABELA, linhas=len(df)):
+            df = df[~df["Lançamento"].str.lower().str.contains("saldo")]
 
         excel_path = os.path.join(output_dir, "Daycoval_Resultados.xlsx")
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Lançamentos"
-        ws.append(["Data", "Lançamento", "Valor"])
-
-        for _, row in df.iterrows():
-            data = row["Data"]
-            desc = row["Lançamento"]
-            valor_str = row["Valor"]
-            valor_num = float(valor_str.replace(".", "").replace(",", "."))
-            ws.append([data, desc, valor_num])
-
-        _formatar_excel(ws)
-        wb.save(excel_path)
+        salvar_em_excel(df, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento válido encontrado nos PDFs.")
@@ -81,132 +67,120 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ──────────────────────────────────────────────────────────────────────────────
 # Extração dos lançamentos
 # ──────────────────────────────────────────────────────────────────────────────
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path):
-    doc = fitz.open(pdf_path)
-    lancamentos = []
-    ano_extrato = None
+    with etapa(ABRIR):
+        doc = abrir_pdf(pdf_path)
+    lancamentos = Lancamentos(COLUNAS, valores=["Valor"], datas=["Data"])
     data_atual = None
     buffer_lancamento = []
 
-    padrao_valor = re.compile(r'-?\s?\d{1,3}(?:\.\d{3})*,\d{2}$')
-    padrao_data = re.compile(r'^\d{2}/\d{2}$')
-    padrao_data_completa = re.compile(r'\d{2}/\d{2}/(\d{4})')
-    padrao_linha_unica = re.compile(
-        r'^(\d{2}/\d{2})\s+(.*?)\s+(-?\s?\d{1,3}(?:\.\d{3})*,\d{2})$')
-
     linhas_todas = []
-    for page in doc:
-        linhas = page.get_text("text").split('\n')
+    for page in paginas(doc):
+        with etapa(TEXTO):
+            linhas = page.get_text("text").split('\n')
         if len(linhas) > 6:
             linhas = linhas[3:-3]
         linhas_todas.extend([linha.strip()
                             for linha in linhas if linha.strip()])
     doc.close()
 
+    linhas_todas = [Linha(texto) for texto in linhas_todas]
+    # Ano do extrato: o da primeira data completa, valendo também
+    # para os lançamentos que vêm antes dela
+    ano_extrato = next((data[-4:] for data in (l.primeiro(DATA) for l in linhas_todas)
+                        if data), None)
+
     for linha in linhas_todas:
-        if not ano_extrato:
-            match_ano = padrao_data_completa.search(linha)
-            if match_ano:
-                ano_extrato = match_ano.group(1)
-
-        match_linha_unica = padrao_linha_unica.match(linha)
-        if match_linha_unica:
-            data_atual, descricao, valor = match_linha_unica.groups()
-            valor = valor.replace(" ", "")
+        texto = linha.texto
+
+        finais = _valores_no_fim(linha)
+        unica = _linha_unica(linha, finais)
+        if unica:
+            data_atual, descricao, valor = unica
             if not descricao or valor == "0,00":
                 continue
-            data_formatada = f"{data_atual}/{ano_extrato}" if ano_extrato else data_atual
-            lancamentos.append({
-                "Data": data_formatada,
-                "Lançamento": descricao.strip(),
-                "Valor": valor
-            })
+            lancamentos.adicionar(_data_completa(data_atual, ano_extrato),
+                                  descricao, valor)
             continue
 
-        if padrao_data.fullmatch(linha):
-            data_atual = linha
+        if linha.so(DATA_CURTA) and len(texto) == 5:
+            data_atual = texto
             buffer_lancamento = []
             continue
 
-        if padrao_valor.fullmatch(linha):
+        valor_linha = next((v for v, inicio in finais if inicio == 0), None)
+        if valor_linha:
             if data_atual:
-                valor = linha.replace(" ", "")
+                valor = valor_linha
                 descricao = ' '.join(buffer_lancamento).strip()
                 if not descricao or valor == "0,00":
                     buffer_lancamento = []
                     continue
-                data_formatada = f"{data_atual}/{ano_extrato}" if ano_extrato else data_atual
-                lancamentos.append({
-                    "Data": data_formatada,
-                    "Lançamento": descricao,
-                    "Valor": valor
-                })
+                lancamentos.adicionar(_data_completa(data_atual, ano_extrato),
+                                      descricao, valor)
             buffer_lancamento = []
             continue
 
-        buffer_lancamento.append(linha)
+        buffer_lancamento.append(texto)
 
     return lancamentos
 
 
+def _valores_no_fim(linha):
+    # Leituras (valor, início) do valor que fecha a linha: com o "-"
+    # solto de "- 1.234,56" junto primeiro, depois sem ele
+    valor = linha.termina(VALOR)
+    if not valor:
+        return []
+    inicio = len(linha.texto) - len(valor)
+    antes = linha.texto[:inicio]
+    if not valor.startswith("-") and antes[-2:-1] == "-" and antes[-1:].isspace():
+        return [("-" + valor, inicio - 2), (valor, inicio)]
+    return [(valor, inicio)]
+
+
+def _linha_unica(linha, finais):
+    # "dd/mm  descrição  valor" numa linha só → (data, descrição, valor).
+    # Entre data e valor precisa haver espaço dos dois lados; vale a
+    # primeira leitura com descrição e, sem nenhuma, descrição vazia
+    data = linha.comeca(DATA_CURTA) if finais else None
+    if not data or len(data) != 5:
+        return None
+    vazia = None
+    for valor, inicio in finais:
+        meio = linha.texto[5:inicio]
+        if len(meio) >= 2 and meio[0].isspace() and meio[-1].isspace():
+            descricao = meio.strip()
+            if descricao:
+                return data, descricao, valor
+            vazia = vazia or (data, "", valor)
+    return vazia
+
+
+def _data_completa(dia_mes, ano_extrato):
+    # "dd/mm" + ano do extrato. Sem ano no PDF fica só "dd/mm": a
+    # conversão da tabela acusa a data inválida neste arquivo, em
+    # vez de chutar o ano corrente (extrato de dezembro lido em
+    # janeiro sairia com o ano errado)
+    return f"{dia_mes}/{ano_extrato}" if ano_extrato else dia_mes
+
+
 # ──────────────────────────────────────────────────────────────────────────────
-# Formatação padrão do Excel
+# Salvamento formatado em Excel
 # ──────────────────────────────────────────────────────────────────────────────
-def _formatar_excel(ws):
-    # Cabeçalho
-    ws.freeze_panes = 'A2'
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Dados
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=3):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == 3:
-                cell.number_format = '#,##0.00'
-                cell.font = Font(
-                    color="0000FF" if cell.value >= 0 else "FF0000")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    # Ajuste de largura
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    # Tabela estilizada
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
+def salvar_em_excel(df, excel_path):
+    return salvar_planilha(df[["Data", "Lançamento", "Valor"]], excel_path,
+                           coluna_valor="Valor", titulo="Lançamentos")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Fluxo padrão PyQt5 (Desktop)
 # ──────────────────────────────────────────────────────────────────────────────
 def processar_pdf_custom(qt_parent):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             qt_parent, "Selecione um ou mais extratos do Daycoval", "", "PDF Files (*.pdf)"
@@ -221,24 +195,16 @@ def processar_pdf_custom(qt_parent):
 
             try:
                 dialog.atualizar_progresso(10)
-                dados = extrair_lancamentos(file_path)
+                with dialog.acompanhar(10, 60):
+                    dados = extrair_lancamentos(file_path)
                 dialog.atualizar_progresso(60)
 
                 if dados:
-                    df = pd.DataFrame(dados)
-                    df = df[~df["Lançamento"].str.lower().str.contains("saldo")]
+                    with etapa(TABELA, linhas=len(dados)):
+                        df = dados.tabela()
+                        df = df[~df["Lançamento"].str.lower().str.contains("saldo")]
                     excel_path = os.path.splitext(file_path)[0] + ".xlsx"
-                    df.to_excel(excel_path, index=False)
-                    dialog.atualizar_progresso(80)
-
-                    wb = Workbook()
-                    ws = wb.active
-                    ws.title = "Lançamentos"
-                    for r in dataframe_to_rows(df, index=False, header=True):
-                        ws.append(r)
-
-                    _formatar_excel(ws)
-                    wb.save(excel_path)
+                    salvar_em_excel(df, excel_path)
                     dialog.atualizar_progresso(100)
 
                 else:
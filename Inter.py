@@ -1,16 +1,19 @@
 import os
 import re
-import time
 import pandas as pd
-import fitz  # PyMuPDF
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 
-# ✅ Importa a classe LoaderDialog
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+COLUNAS = ("Data", "Histórico", "Valor")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -30,30 +33,26 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     todos_dados = []
     total = len(files)
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_por_posicao, files, progress_cb=progress_cb, faixa=(0, 80))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(pdf_path)
         log_cb(f"📄 Processando {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            df = extrair_lancamentos_por_posicao(pdf_path)
-            if not df.empty:
-                todos_dados.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento válido em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
 
-        time.sleep(0.2)
-        progress_cb(int((i / total) * 80))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif not df.empty:
+            todos_dados.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento válido em {nome}")
 
     if todos_dados:
-        df_final = pd.concat(todos_dados, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(todos_dados, ignore_index=True)
         excel_path = os.path.join(output_dir, "Inter_Resultados.xlsx")
 
-        df_final.to_excel(excel_path, index=False)
-        aplicar_formatacao_excel(excel_path)
+        salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento válido encontrado nos PDFs.")
@@ -62,34 +61,19 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("✅ Processamento concluído com sucesso! 🚀")
 
 
-# ──────────────────────────────────────────────────────────────────────────────
-# Função auxiliar: converte datas por extenso (ex: '5 de janeiro de 2025')
-# ──────────────────────────────────────────────────────────────────────────────
-def formatar_data(data_extenso):
-    meses = {
-        'janeiro': '01', 'fevereiro': '02', 'março': '03', 'abril': '04',
-        'maio': '05', 'junho': '06', 'julho': '07', 'agosto': '08',
-        'setembro': '09', 'outubro': '10', 'novembro': '11', 'dezembro': '12'
-    }
-    match = re.search(r'(\d{1,2}) de (\w+) de (\d{4})', data_extenso.lower())
-    if match:
-        dia, mes_nome, ano = match.groups()
-        dia = dia.zfill(2)
-        mes = meses.get(mes_nome, '??')
-        return f"{dia}/{mes}/{ano}"
-    return None
-
-
 # ──────────────────────────────────────────────────────────────────────────────
 # Extração dos lançamentos por posição (BTG / Inter usam blocos de texto)
 # ──────────────────────────────────────────────────────────────────────────────
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_por_posicao(pdf_path):
-    doc = fitz.open(pdf_path)
-    dados = []
+    with etapa(ABRIR):
+        doc = abrir_pdf(pdf_path)
+    dados = Lancamentos(COLUNAS, valores=["Valor"], datas=["Data"])
     data_atual = ""
 
-    for pagina in doc:
-        blocos = pagina.get_text("blocks")
+    for pagina in paginas(doc):
+        with etapa(TEXTO):
+            blocos = pagina.get_text("blocks")
         blocos.sort(key=lambda b: (round(b[1]), b[0]))
 
         linhas = {}
@@ -106,10 +90,11 @@ def extrair_lancamentos_por_posicao(pdf_path):
             textos = [t for _, t in linha]
             linha_texto = " ".join(textos)
 
-            # Detectar data por extenso (ex: '5 de janeiro de 2025')
+            # Data por extenso (ex: '5 de janeiro de 2025'): convertida
+            # por coluna na tabela, assim como o valor
             data_detectada = re.search(r'\d{1,2} de \w+ de \d{4}', linha_texto)
             if data_detectada:
-                data_atual = formatar_data(data_detectada.group())
+                data_atual = data_detectada.group()
                 continue
 
             if not data_atual or 'R$' not in linha_texto:
@@ -120,86 +105,28 @@ def extrair_lancamentos_por_posicao(pdf_path):
                 continue
 
             valor_raw = valores[0]
-            valor_limpo = valor_raw.replace('R$', '').replace(
-                ' ', '').replace('.', '').replace(',', '.')
-
-            try:
-                valor_float = round(float(valor_limpo), 2)
-                if '-' in valor_raw:
-                    valor_float = -abs(valor_float)
-
-                historico = linha_texto.split(valor_raw)[0].strip()
-                dados.append({
-                    "Data": data_atual,
-                    "Histórico": historico,
-                    "Valor": valor_float
-                })
-            except ValueError:
-                continue
+            historico = linha_texto.split(valor_raw)[0].strip()
+            dados.adicionar(data_atual, historico, valor_raw)
 
     doc.close()
-    return pd.DataFrame(dados)
+    with etapa(TABELA, linhas=len(dados)):
+        return dados.tabela()
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Aplicar formatação ao Excel (padrão azul e vermelho)
+# Salvamento formatado do Excel (padrão azul e vermelho)
 # ──────────────────────────────────────────────────────────────────────────────
-def aplicar_formatacao_excel(excel_path):
-    wb = load_workbook(excel_path)
-    ws = wb.active
-
-    ws.freeze_panes = "A2"
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == 3:  # Coluna Valor
-                cell.font = Font(color="FF0000") if cell.value < 0 else Font(
-                    color="0000FF")
-                cell.number_format = '#,##0.00'
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-    wb.save(excel_path)
+def salvar_em_excel(df, excel_path):
+    return salvar_planilha(df, excel_path, coluna_valor="Valor")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Fluxo padrão PyQt5 (Desktop)
 # ──────────────────────────────────────────────────────────────────────────────
 def processar_pdf_custom(parent_widget):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             parent_widget, "Selecione os extratos do Inter", "", "PDF Files (*.pdf)"
@@ -215,7 +142,8 @@ def processar_pdf_custom(parent_widget):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos_por_posicao(file_path)
+                with dialog.acompanhar(10, 60):
+                    df = extrair_lancamentos_por_posicao(file_path)
                 dialog.atualizar_progresso(60)
 
                 if df.empty:
@@ -226,8 +154,7 @@ def processar_pdf_custom(parent_widget):
                     dialog.accept()
                     continue
 
-                df.to_excel(file_path.replace(".pdf", ".xlsx"), index=False)
-                aplicar_formatacao_excel(file_path.replace(".pdf", ".xlsx"))
+                salvar_em_excel(df, file_path.replace(".pdf", ".xlsx"))
                 dialog.atualizar_progresso(100)
 
             except Exception as e:
@@ -1,13 +1,17 @@
 import os
 import re
-import fitz  # PyMuPDF
 import pandas as pd
 from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar, NULO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -27,23 +31,23 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     todos_dfs = []
 
-    for i, caminho_pdf in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_pdf, files, progress_cb=progress_cb, faixa=(0, 60))
+    for i, (caminho_pdf, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(caminho_pdf)
         log_cb(f"📄 Processando {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
-
-        try:
-            df = extrair_lancamentos_pdf(caminho_pdf)
-            if not df.empty:
-                todos_dfs.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {str(e)}")
+
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {str(erro)}")
+        elif not df.empty:
+            todos_dfs.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if todos_dfs:
-        df_final = pd.concat(todos_dfs, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(todos_dfs, ignore_index=True)
         excel_path = os.path.join(output_dir, "Extratos_Resultados.xlsx")
         salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
@@ -57,12 +61,15 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ══════════════════════════════════════════════════════════════════════════════
 # Extração de lançamentos (texto por blocos)
 # ══════════════════════════════════════════════════════════════════════════════
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_pdf(caminho_pdf):
-    doc = fitz.open(caminho_pdf)
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
     linhas_extraidas = []
 
-    for pagina in doc:
-        blocks = pagina.get_text("blocks")
+    for pagina in paginas(doc):
+        with etapa(TEXTO):
+            blocks = pagina.get_text("blocks")
         for b in blocks:
             for linha in b[4].split('\n'):
                 linha_limpa = linha.strip()
@@ -84,14 +91,11 @@ def extrair_lancamentos_pdf(caminho_pdf):
             while i < len(linhas_extraidas):
                 atual = linhas_extraidas[i].strip()
 
-                # Detecta fim de bloco (valor monetário)
+                # Detecta fim de bloco (valor monetário, convertido na tabela)
                 if re.match(r"^-?\d{1,3}(?:\.\d{3})*,\d{2}$", atual) or re.match(r"^-?\d+,\d{2}$", atual):
-                    try:
-                        valor = float(atual.replace(".", "").replace(",", "."))
-                        i += 1
-                        break
-                    except ValueError:
-                        pass
+                    valor = atual
+                    i += 1
+                    break
 
                 texto.append(atual)
                 i += 1
@@ -106,10 +110,11 @@ def extrair_lancamentos_pdf(caminho_pdf):
         else:
             i += 1
 
-    df = pd.DataFrame(blocos, columns=["Data", "Lançamento", "Valor (R$)"])
-    df["Data"] = pd.to_datetime(df["Data"], format="%d/%m/%Y", errors='coerce')
-    df = df.dropna(subset=["Data"]).reset_index(drop=True)
-    df["Data"] = df["Data"].dt.strftime("%d/%m/%Y")
+    with etapa(TABELA, linhas=len(blocos)):
+        df = pd.DataFrame(blocos, columns=["Data", "Lançamento", "Valor (R$)"])
+        df = normalizar(df, colunas_valor=["Valor (R$)"], colunas_data=["Data"],
+                        erros=NULO)
+        df = df.dropna(subset=["Data"]).reset_index(drop=True)
 
     return df
 
@@ -118,54 +123,19 @@ def extrair_lancamentos_pdf(caminho_pdf):
 # Criação e formatação do Excel
 # ══════════════════════════════════════════════════════════════════════════════
 def salvar_em_excel(df, caminho_excel):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Lançamentos"
-
-    bold = Font(bold=True, color="FFFFFF")
-    center = Alignment(horizontal="center")
-    money_fmt = "#,##0.00"
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    ws.freeze_panes = 'A2'
-
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = border
-            if r_idx == 1:
-                cell.font = bold
-                cell.alignment = center
-                cell.fill = header_fill
-            elif c_idx == 3:
-                cell.number_format = money_fmt
-                if isinstance(value, float):
-                    if value < 0:
-                        cell.font = Font(color="FF0000")  # Vermelho (negativo)
-                    else:
-                        cell.font = Font(color="0000FF")  # Azul (positivo)
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    # Ajuste de colunas
-    ws.column_dimensions["A"].width = 14
-    ws.column_dimensions["B"].width = 80
-    ws.column_dimensions["C"].width = 16
-
-    wb.save(caminho_excel)
+    larguras = {"Data": 14, "Lançamento": 80, "Valor (R$)": 16}
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor (R$)",
+                           larguras=larguras, tabela=None,
+                           titulo="Lançamentos")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Fluxo PyQt5 (Desktop)
 # ══════════════════════════════════════════════════════════════════════════════
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -184,7 +154,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    df = extrair_lancamentos_pdf(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
@@ -1,19 +1,41 @@
-from main import LoaderDialog
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl import load_workbook
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar
+from filtro import Filtro
 from datetime import datetime
 import pandas as pd
-import pdfplumber
 import re
 import os
 
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "2"
+
+# Início da tabela de lançamentos e linhas fora dela (a linha já
+# chega em minúsculas)
+PALAVRAS_CHAVE_INICIO = Filtro([
+    "data descrição entradas r$ saídas r$ saldo",
+    "(créditos) (débitos)",
+    "conta corrente | movimentação"
+], caixa=True)
+
+PALAVRAS_CHAVE_EXCLUIR = Filtro([
+    "saldo", "saldo anterior", "realce", "extrato mensal", "notas explicativas",
+    "limite contratado", "data da próxima renovação", "juros", "iof",
+    "custo efetivo total", "totalizador de aplicações automáticas",
+    "principal bruto líquido", "historico", "movimentação - aplicações",
+    "resumo - mês", "na conta corrente", "principal", "total",
+    "lis adicional", "lis recebíveis"
+], caixa=True)
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # 🔹 Extração de lançamentos (mantida exatamente como está)
 # ══════════════════════════════════════════════════════════════════════════════
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(caminho_pdf):
     lancamentos = []
     padrao_data = re.compile(r"^(\d{2}/\d{2})")
@@ -22,31 +44,20 @@ def extrair_lancamentos(caminho_pdf):
     capturando = False
     ano_extrato = None
 
-    palavras_chave_inicio = [
-        "data descrição entradas r$ saídas r$ saldo",
-        "(créditos) (débitos)",
-        "conta corrente | movimentação"
-    ]
-
-    palavras_chave_excluir = [
-        "saldo", "saldo anterior", "realce", "extrato mensal", "notas explicativas",
-        "limite contratado", "data da próxima renovação", "juros", "iof",
-        "custo efetivo total", "totalizador de aplicações automáticas",
-        "principal bruto líquido", "historico", "movimentação - aplicações",
-        "resumo - mês", "na conta corrente", "principal", "total",
-        "lis adicional", "lis recebíveis"
-    ]
-
-    with pdfplumber.open(caminho_pdf) as pdf:
-        texto_completo = pdf.pages[0].extract_text() if pdf.pages else ""
+    with etapa(ABRIR):
+        pdf = abrir_pdf(caminho_pdf, "pdfplumber")
+    with pdf:
+        with etapa(TEXTO):
+            texto_completo = pdf.pages[0].extract_text() if pdf.pages else ""
         ano_match = re.search(r"\b(20\d{2})\b", texto_completo)
         ano_extrato = ano_match.group(
             1) if ano_match else str(datetime.now().year)
 
-        for pagina in pdf.pages:
-            palavras = pagina.extract_words(
-                x_tolerance=1, y_tolerance=1, keep_blank_chars=False, use_text_flow=True
-            )
+        for pagina in paginas(pdf.pages):
+            with etapa(TEXTO):
+                palavras = pagina.extract_words(
+                    x_tolerance=1, y_tolerance=1, keep_blank_chars=False, use_text_flow=True
+                )
 
             linhas_dict = {}
             for palavra in palavras:
@@ -63,11 +74,11 @@ def extrair_lancamentos(caminho_pdf):
                     continue
 
                 if not capturando:
-                    if any(palavra in linha_limpa for palavra in palavras_chave_inicio):
+                    if PALAVRAS_CHAVE_INICIO.acha(linha_limpa):
                         capturando = True
                     continue
 
-                if any(palavra in linha_limpa for palavra in palavras_chave_excluir):
+                if PALAVRAS_CHAVE_EXCLUIR.acha(linha_limpa):
                     continue
 
                 if padrao_data.match(palavras_linha[0]["text"]):
@@ -87,80 +98,39 @@ def extrair_lancamentos(caminho_pdf):
                 if not descricao.strip():
                     continue
 
+                # "1.234,56-" fica em texto: convertido por coluna na tabela
                 if valores and data_atual:
-                    valor = valores[0].replace(".", "").replace(",", ".")
-                    if valores[0].endswith("-"):
-                        lancamentos.append(
-                            [data_atual, descricao.strip(), -float(valor.rstrip("-"))])
-                    else:
-                        lancamentos.append(
-                            [data_atual, descricao.strip(), float(valor)])
+                    lancamentos.append([data_atual, descricao.strip(), valores[0]])
 
     return lancamentos
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# 🔹 Função de salvar em Excel (inalterada)
+# 🔹 Função de salvar em Excel
 # ══════════════════════════════════════════════════════════════════════════════
 def salvar_em_excel(dados, caminho_pdf):
-    df = pd.DataFrame(dados, columns=["Data", "Descrição", "Valor"])
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(dados, columns=["Data", "Descrição", "Valor"])
+        df = normalizar(df, colunas_valor=["Valor"], colunas_data=["Data"])
     nome_arquivo = os.path.splitext(os.path.basename(caminho_pdf))[0] + ".xlsx"
     pasta_destino = os.path.dirname(caminho_pdf)
     caminho_excel = os.path.join(pasta_destino, nome_arquivo)
-    df.to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = "A2"
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == 3:
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = "#,##0.00"
-                    cor = "0000FF" if cell.value > 0 else "FF0000"
-                    cell.font = Font(color=cor)
-                    cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False,
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🔹 Extração + Excel de um arquivo (executado nos processos do motor)
+# ══════════════════════════════════════════════════════════════════════════════
+def processar_arquivo(caminho_pdf, output_dir):
+    dados = extrair_lancamentos(caminho_pdf)
+    if not dados:
+        return None
+
+    nome = os.path.basename(caminho_pdf)
+    excel_path = os.path.join(
+        output_dir, f"{os.path.splitext(nome)[0]}.xlsx")
+    salvar_em_excel(dados, excel_path)
+    return len(dados), excel_path
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -171,29 +141,21 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     log_cb("Iniciando processamento dos extratos...")
 
-    for i, caminho_pdf in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        processar_arquivo, files, output_dir, progress_cb=progress_cb, faixa=(0, 95))
+    for i, (caminho_pdf, resultado, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(caminho_pdf)
         log_cb(f"📄 Processando {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 70))
-
-        try:
-            dados = extrair_lancamentos(caminho_pdf)
-            if not dados:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-                continue
-
-            excel_path = os.path.join(
-                output_dir, f"{os.path.splitext(nome)[0]}.xlsx")
-            df = pd.DataFrame(dados, columns=["Data", "Descrição", "Valor"])
-            df.to_excel(excel_path, index=False)
-            salvar_em_excel(dados, excel_path)
-            log_cb(
-                f"✅ {len(dados)} lançamentos extraídos e salvos em {excel_path}")
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {e}")
-
-        progress_cb(int((i / total) * 100))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {erro}")
+        elif resultado is None:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
+            continue
+        else:
+            quantidade, excel_path = resultado
+            log_cb(
+                f"✅ {quantidade} lançamentos extraídos e salvos em {excel_path}")
 
     progress_cb(100)
     log_cb("✅ Processamento concluído com sucesso! 🚀")
@@ -203,6 +165,9 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # 🔹 Versão Desktop (inalterada)
 # ══════════════════════════════════════════════════════════════════════════════
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione um ou mais extratos PDF", "", "Arquivos PDF (*.pdf)"
@@ -217,7 +182,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                dados = extrair_lancamentos(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    dados = extrair_lancamentos(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 if not dados:
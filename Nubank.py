@@ -6,53 +6,48 @@
 # ==========================================================
 
 import re
-import fitz
 import os
-import time
-import pandas as pd
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from texto_pdf import linhas_pdf
+from metricas import etapa, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos, tabela_arquivo, juntar
+from normalizacao import MESES
+from filtro import Filtro
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+COLUNAS = ("Data", "Movimentações", "Valor")
+
+# Cabeçalho/rodapé e início de cada movimentação (sem diferença de caixa)
+PADROES_IGNORAR = Filtro(
+    trechos=["NU PAGAMENTOS", "CNPJ", "EXTRATO", "PÁGINA", "VALORES EM R$",
+             "SALDO FINAL", "SALDO INICIAL", "SALDO DO PERÍODO", "MOVIMENTAÇÕES -"],
+    padroes=[r"AGÊNCIA.*CONTA"],
+)
+
+FRASES_CHAVE = Filtro([
+    "transferência enviada", "pix recebido", "pagamento de boleto",
+    "compra aprovada", "cartão", "débito automático", "transferência recebida",
+    "recarga", "resgate", "aplicação", "pagamento realizado"
+])
 
 
 # ==========================================================
 # 🔹 Função auxiliar para extrair lançamentos do PDF
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_dados_pdf(caminho_pdf):
-    texto_total = ''
-    with fitz.open(caminho_pdf) as doc:
-        for pagina in doc:
-            texto_total += pagina.get_text()
-
-    linhas = texto_total.splitlines()
-    dados = []
+    dados = Lancamentos(COLUNAS, valores=["Valor"], datas=["Data"])
     data_atual = ''
     buffer_movimentacao = []
     movimentacao_valida = False
     tipo_movimentacao = None
 
-    meses = {
-        "JAN": "01", "FEV": "02", "MAR": "03", "ABR": "04",
-        "MAI": "05", "JUN": "06", "JUL": "07", "AGO": "08",
-        "SET": "09", "OUT": "10", "NOV": "11", "DEZ": "12"
-    }
-
-    padroes_ignorar = [
-        r'NU PAGAMENTOS', r'CNPJ', r'EXTRATO', r'PÁGINA', r'VALORES EM R\$',
-        r'SALDO (FINAL|INICIAL|DO PERÍODO)', r'AGÊNCIA.*CONTA', r'MOVIMENTAÇÕES -'
-    ]
-
-    frases_chave = [
-        "transferência enviada", "pix recebido", "pagamento de boleto",
-        "compra aprovada", "cartão", "débito automático", "transferência recebida",
-        "recarga", "resgate", "aplicação", "pagamento realizado"
-    ]
-
-    for linha in linhas:
+    for linha in linhas_pdf(caminho_pdf):
         linha = linha.strip()
 
         if "total de entradas" in linha.lower():
@@ -62,37 +57,29 @@ def extrair_dados_pdf(caminho_pdf):
             tipo_movimentacao = "saida"
             continue
 
-        if not linha or any(re.search(p, linha, re.IGNORECASE) for p in padroes_ignorar):
+        if not linha or PADROES_IGNORAR.acha(linha):
             continue
 
+        # "05 JAN 2025" e "1.234,56" ficam em texto: convertidos
+        # por coluna na tabela
         match_data = re.match(r'^(\d{2}) (\w{3}) (\d{4})$', linha)
         if match_data:
-            dia, mes_abrev, ano = match_data.groups()
-            mes_num = meses.get(mes_abrev.upper())
-            if mes_num:
-                data_atual = f"{dia}/{mes_num}/{ano}"
+            if match_data.group(2).lower() in MESES:
+                data_atual = linha
             continue
 
         match_valor = re.match(r'^-?\d{1,3}(?:\.\d{3})*,\d{2}$', linha)
         if match_valor and data_atual and movimentacao_valida:
-            valor_str = linha.replace('.', '').replace(',', '.')
-            try:
-                valor = float(valor_str)
-                if tipo_movimentacao == "saida":
-                    valor *= -1
-                descricao = ' '.join(buffer_movimentacao).strip()
-                if descricao:
-                    dados.append({
-                        'Data': data_atual,
-                        'Movimentações': descricao,
-                        'Valor': valor
-                    })
-                buffer_movimentacao = []
-                movimentacao_valida = False
-            except ValueError:
-                continue
+            valor = linha
+            if tipo_movimentacao == "saida":
+                valor = valor[1:] if valor.startswith("-") else "-" + valor
+            descricao = ' '.join(buffer_movimentacao).strip()
+            if descricao:
+                dados.adicionar(data_atual, descricao, valor)
+            buffer_movimentacao = []
+            movimentacao_valida = False
         else:
-            if any(palavra in linha.lower() for palavra in frases_chave):
+            if FRASES_CHAVE.acha(linha):
                 buffer_movimentacao = [linha]
                 movimentacao_valida = True
             elif movimentacao_valida:
@@ -105,72 +92,21 @@ def extrair_dados_pdf(caminho_pdf):
 # 🔹 Função para salvar o Excel formatado (usada em ambos os modos)
 # ==========================================================
 def salvar_em_excel(dados, caminho_pdf):
-    df = pd.DataFrame(dados)
-    df['Valor'] = df['Valor'].round(2)
-    df['Data'] = pd.to_datetime(
-        df['Data'], format='%d/%m/%Y', errors='coerce').dt.strftime('%d/%m/%Y')
+    with etapa(TABELA, linhas=len(dados)):
+        df = dados.tabela()
 
     caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
-    df.to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(color="FFFFFF", bold=True)
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    col_valor = df.columns.get_loc('Valor') + 1
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == col_valor:
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = '#,##0.00'
-                    cor = "0000FF" if cell.value > 0 else "FF0000"
-                    cell.font = Font(color=cor)
-                    cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    ref_final = f"{get_column_letter(ws.max_column)}{ws.max_row}"
-    tabela = Table(displayName="TabelaExtrato", ref=f"A1:{ref_final}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tabela.tableStyleInfo = estilo
-    ws.add_table(tabela)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor",
+                           tabela="TabelaExtrato")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione um ou mais PDFs do extrato Nubank", "", "Arquivos PDF (*.pdf)"
@@ -186,7 +122,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                dados = extrair_dados_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    dados = extrair_dados_pdf(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 if not dados:
@@ -221,30 +158,31 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento de arquivos Nubank...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_dados_pdf,
+        progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
 
-        try:
-            dados = extrair_dados_pdf(pdf_path)
-            if not dados:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-            registros.extend(dados)
+        if dados.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        tabelas.append(dados)
 
-    if registros:
-        df = pd.DataFrame(registros)
+    if tabelas:
+        df = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Nubank_Resultados.xlsx")
-        df.to_excel(excel_path, index=False)
+        salvar_planilha(df, excel_path, coluna_valor="Valor", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
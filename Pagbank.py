@@ -7,29 +7,37 @@
 
 import os
 import re
-import time
-import fitz
 import pandas as pd
 from pathlib import Path
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+COLUNAS = ("Data", "Descrição", "Valor")
 
 
 # ==========================================================
 # 🔹 Extração de lançamentos do PDF
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path):
-    doc = fitz.open(pdf_path)
+    with etapa(ABRIR):
+        doc = abrir_pdf(pdf_path)
     blocos = []
 
-    for page in doc:
-        blocos.extend(page.get_text("blocks"))
+    for page in paginas(doc):
+        with etapa(TEXTO):
+            blocos.extend(page.get_text("blocks"))
 
-    dados = []
+    # Valor fica como texto ("R$ 1.234,56"): convertido por coluna na tabela
+    dados = Lancamentos(COLUNAS, valores=["Valor"], datas=["Data"])
     for bloco in blocos:
         texto = bloco[4].strip()
 
@@ -53,94 +61,28 @@ def extrair_lancamentos(pdf_path):
                 descricao = " ".join(
                     l.strip() for l in linhas[1:] if l.strip() and l.strip() != valor
                 )
-                dados.append({
-                    "Data": data,
-                    "Descrição": descricao,
-                    "Valor": valor
-                })
+                dados.adicionar(data, descricao, valor)
 
-    return pd.DataFrame(dados)
+    with etapa(TABELA, linhas=len(dados)):
+        return dados.tabela()
 
 
 # ==========================================================
 # 🔹 Formatação e salvamento do Excel
 # ==========================================================
 def salvar_em_excel_com_formatacao(df, pdf_path):
-    def formatar_valor(valor_str):
-        valor_str = valor_str.replace("R$", "").replace(
-            " ", "").replace(".", "").replace(",", ".")
-        return float(valor_str)
-
-    df["Valor"] = df["Valor"].apply(formatar_valor)
-
     excel_path = os.path.splitext(pdf_path)[0] + ".xlsx"
-    df.to_excel(excel_path, index=False)
-
-    wb = load_workbook(excel_path)
-    ws = wb.active
-
-    # ✅ Congelar cabeçalho
-    ws.freeze_panes = 'A2'
-
-    # ✅ Estilo do cabeçalho
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(color="FFFFFF", bold=True)
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    # ✅ Bordas finas
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    col_valor = df.columns.get_loc('Valor') + 1
-
-    # ✅ Formatação e cor do valor
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == col_valor:
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = '#,##0.00'
-                    cor = "0000FF" if cell.value > 0 else "FF0000"
-                    cell.font = Font(color=cor)
-                    cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    # ✅ Ajuste automático da largura das colunas
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    # ✅ Criar tabela azul clara
-    ref_final = f"{get_column_letter(ws.max_column)}{ws.max_row}"
-    tabela = Table(displayName="TabelaPagbank", ref=f"A1:{ref_final}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tabela.tableStyleInfo = estilo
-    ws.add_table(tabela)
-
-    wb.save(excel_path)
-    return excel_path
+    return salvar_planilha(df, excel_path, coluna_valor="Valor",
+                           tabela="TabelaPagbank")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -159,7 +101,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                df = extrair_lancamentos(file_path)
+                with dialog.acompanhar(10, 50):
+                    df = extrair_lancamentos(file_path)
                 dialog.atualizar_progresso(50)
 
                 if df.empty:
@@ -195,28 +138,28 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     registros = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
 
-        try:
-            df = extrair_lancamentos(pdf_path)
-            if df.empty:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-            registros.extend(df.to_dict('records'))
+        if df.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        registros.append(df)
 
     if registros:
-        df_final = pd.DataFrame(registros)
+        with etapa(TABELA):
+            df_final = pd.concat(registros, ignore_index=True)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "PagBank_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="Valor", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
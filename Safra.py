@@ -7,30 +7,49 @@
 
 import os
 import re
-import time
-import pdfplumber
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
 from pathlib import Path
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import tabela_arquivo, juntar
+from normalizacao import normalizar
+from filtro import Filtro
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "2"
+
+# Cabeçalhos e saldos (a linha já chega em minúsculas) e palavras
+# soltas que não entram na descrição (sem diferença de caixa)
+CABECALHOS = Filtro([
+    "saldo + limite disponível", "saldo bloqueado", "limite cheque",
+    "lançamentos realizados", "data lançamento complemento",
+    "saldo", "conta corrente", "pagamento de bloqueto",
+    "aplicacao cdb", "safra pay sa", "transf entre contas mesmo cpf"
+], caixa=True)
+
+PALAVRAS_IGNORAR = Filtro(["Banco", "Safra", "CNPJ", "Página", "Saldo"])
 
 
 # ==========================================================
 # 🔹 Extração dos lançamentos do PDF Safra
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_safra(caminho_pdf):
     lancamentos = []
     padrao_data = re.compile(r"^(\d{2}/\d{2})")
     padrao_valor = re.compile(r"^-?[\d\.]+,[\d]{2}$")
     ano_extrato = "2025"
 
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for pagina in pdf.pages:
-            palavras = pagina.extract_words(use_text_flow=True)
+    with etapa(ABRIR):
+        pdf = abrir_pdf(caminho_pdf, "pdfplumber")
+    with pdf:
+        for pagina in paginas(pdf.pages):
+            with etapa(TEXTO):
+                palavras = pagina.extract_words(use_text_flow=True)
             linha = []
 
             for palavra in palavras:
@@ -56,13 +75,7 @@ def extrair_lancamentos_safra(caminho_pdf):
 # 🔹 Função auxiliar para ignorar cabeçalhos e saldos
 # ==========================================================
 def ignorar_linha(linha_texto):
-    cabecalhos = [
-        "saldo + limite disponível", "saldo bloqueado", "limite cheque",
-        "lançamentos realizados", "data lançamento complemento",
-        "saldo", "conta corrente", "pagamento de bloqueto",
-        "aplicacao cdb", "safra pay sa", "transf entre contas mesmo cpf"
-    ]
-    return "conta corrente" in linha_texto or any(c in linha_texto for c in cabecalhos)
+    return CABECALHOS.acha(linha_texto)
 
 
 # ==========================================================
@@ -73,13 +86,11 @@ def processar_linha(linha, padrao_valor, ano_extrato):
     data = linha[0] + f"/{ano_extrato}"
     valor = None
     descricao = []
-    ignorar = ["Banco", "Safra", "CNPJ", "Página", "Saldo"]
-
     for item in linha[1:]:
-        if any(palavra.lower() in item.lower() for palavra in ignorar):
+        if PALAVRAS_IGNORAR.acha(item):
             continue
         if padrao_valor.match(item.replace(".", "")):
-            valor = item.replace('.', '').replace(',', '.')
+            valor = item  # convertido por coluna na tabela
         else:
             descricao.append(item)
 
@@ -90,9 +101,7 @@ def processar_linha(linha, padrao_valor, ano_extrato):
             r'S/A\s*58\.160\.789/0001-28', '', descricao_limpa)
         descricao_limpa = re.sub(r'\b\d{9}\b', '', descricao_limpa)
         descricao_limpa = re.sub(r'\s{2,}', ' ', descricao_limpa).strip()
-        valor_float = float(valor.replace(
-            '-', '')) if '-' not in valor else -float(valor.replace('-', ''))
-        resultados.append([data, descricao_limpa, round(valor_float, 2)])
+        resultados.append([data, descricao_limpa, valor])
 
     return resultados
 
@@ -100,73 +109,26 @@ def processar_linha(linha, padrao_valor, ano_extrato):
 # ==========================================================
 # 🔹 Salvamento e formatação Excel
 # ==========================================================
+def montar_tabela(dados):
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(dados, columns=["Data", "Descrição", "Valor (R$)"])
+        return normalizar(df, colunas_valor=["Valor (R$)"], colunas_data=["Data"])
+
+
 def salvar_excel(dados, caminho_pdf):
-    df = pd.DataFrame(dados, columns=["Data", "Descrição", "Valor (R$)"])
+    df = montar_tabela(dados)
     caminho_final = Path(caminho_pdf).with_suffix('.xlsx')
-    df.to_excel(caminho_final, index=False)
-
-    wb = load_workbook(caminho_final)
-    ws = wb.active
-
-    # Congelar cabeçalho
-    ws.freeze_panes = 'A2'
-
-    # Estilo cabeçalho
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    # Bordas e cores
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    for row in ws.iter_rows(min_row=2, min_col=3, max_col=3):
-        for cell in row:
-            valor = cell.value
-            cell.border = thin_border
-            if isinstance(valor, (int, float)):
-                cell.number_format = '#,##0.00'
-                cell.font = Font(color="FF0000" if valor < 0 else "0000FF")
-                cell.alignment = Alignment(horizontal="right")
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=2):
-        for cell in row:
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        ws.column_dimensions[get_column_letter(
-            col[0].column)].width = max_len + 2
-
-    ref_final = f"{get_column_letter(ws.max_column)}{ws.max_row}"
-    tabela = Table(displayName="TabelaSafra", ref=f"A1:{ref_final}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tabela.tableStyleInfo = estilo
-    ws.add_table(tabela)
-    wb.save(caminho_final)
-
-    return caminho_final
+    return salvar_planilha(df, caminho_final, coluna_valor="Valor (R$)",
+                           tabela="TabelaSafra")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione um ou mais extratos Safra (PDF)", "", "Arquivos PDF (*.pdf)"
@@ -181,7 +143,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                dados = extrair_lancamentos_safra(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    dados = extrair_lancamentos_safra(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 if not dados:
@@ -215,31 +178,31 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento de arquivos Safra...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_lancamentos_safra, montar_tabela,
+        progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
 
-        try:
-            dados = extrair_lancamentos_safra(pdf_path)
-            if not dados:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-            registros.extend(dados)
+        if dados.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        tabelas.append(dados)
 
-    if registros:
-        df = pd.DataFrame(registros, columns=[
-                          "Data", "Descrição", "Valor (R$)"])
+    if tabelas:
+        df = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Safra_Resultados.xlsx")
-        df.to_excel(excel_path, index=False)
+        salvar_planilha(df, excel_path, coluna_valor="Valor (R$)", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
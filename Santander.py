@@ -6,30 +6,39 @@
 # ==========================================================
 
 import os
-import re
-import time
-import fitz
 import pandas as pd
 from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos
+from lexico import Linha, DATA, VALOR, DOCUMENTO
+from normalizacao import datas, NULO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "5"
+
+COLUNAS = ("Data", "Descrição", "Valor (R$)")
 
 
 # ==========================================================
 # 🔹 Extração de lançamentos do PDF Santander
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_pdf(caminho_pdf):
     nome_base = os.path.splitext(os.path.basename(caminho_pdf))[0]
     caminho_debug = f"{nome_base}.debug.txt"
 
-    doc = fitz.open(caminho_pdf)
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
     linhas_extraidas = []
 
-    for pagina in doc:
-        blocks = pagina.get_text("blocks")
+    for pagina in paginas(doc):
+        with etapa(TEXTO):
+            blocks = pagina.get_text("blocks")
         for b in blocks:
             for linha in b[4].split('\n'):
                 linha_limpa = linha.strip()
@@ -41,49 +50,44 @@ def extrair_lancamentos_pdf(caminho_pdf):
         for linha in linhas_extraidas:
             f.write(linha + "\n")
 
-    padrao_data = re.compile(r"^\d{2}/\d{2}/\d{4}$")
-    padrao_valor = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{2}")
-    padrao_documento = re.compile(r"\b\d{6}\b")
+    # cada linha é tokenizada uma vez só, mesmo lida duas vezes abaixo
+    linhas_extraidas = [Linha(linha) for linha in linhas_extraidas]
 
-    blocos = []
+    blocos = Lancamentos(COLUNAS, valores=["Valor (R$)"])
     i = 0
     while i < len(linhas_extraidas):
         linha = linhas_extraidas[i]
 
-        if padrao_data.match(linha):
-            data = linha
+        if linha.so(DATA):
+            data = linha.texto
             i += 1
             descricao_linhas = []
             valor = None
             documento = ""
 
             while i < len(linhas_extraidas):
-                atual = linhas_extraidas[i].strip()
+                atual = linhas_extraidas[i]
 
-                if padrao_data.match(atual):
+                if atual.so(DATA):
                     break
 
-                if padrao_valor.search(atual):
-                    valor_raw = padrao_valor.search(atual).group()
-                    try:
-                        valor = float(valor_raw.replace(
-                            ".", "").replace(",", "."))
-                    except ValueError:
-                        valor = None
-
-                    grupos6 = list(padrao_documento.finditer(atual))
-                    if len(grupos6) >= 2:
-                        documento = grupos6[1].group()
-                        desc_fixa = atual[:grupos6[1].start()].strip()
+                valor_raw = atual.primeiro(VALOR)
+                if valor_raw:
+                    valor = valor_raw  # convertido por coluna na tabela
+
+                    if sum(len(d) == 6 for d in atual.todos(DOCUMENTO)) >= 2:
+                        grupos6 = [p for p in atual.posicoes(DOCUMENTO) if len(p[0]) == 6]
+                        documento, inicio_documento = grupos6[1]
+                        desc_fixa = atual.texto[:inicio_documento].strip()
                         descricao_linhas.append(desc_fixa)
                     else:
-                        atual_sem_valor = atual.replace(valor_raw, "").strip()
+                        atual_sem_valor = atual.texto.replace(valor_raw, "").strip()
                         descricao_linhas.append(atual_sem_valor)
 
                     i += 1
                     break
                 else:
-                    descricao_linhas.append(atual)
+                    descricao_linhas.append(atual.texto)
                     i += 1
 
             descricao_final = " ".join(descricao_linhas).strip()
@@ -94,14 +98,14 @@ def extrair_lancamentos_pdf(caminho_pdf):
 
             if data and descricao_final and valor is not None:
                 descricao_completa = f"{descricao_final} {documento}".strip()
-                blocos.append((data, descricao_completa, valor))
+                blocos.adicionar(data, descricao_completa, valor)
         else:
             i += 1
 
-    df = pd.DataFrame(blocos, columns=["Data", "Descrição", "Valor (R$)"])
-    df["Data"] = pd.to_datetime(df["Data"], format="%d/%m/%Y", errors='coerce')
-    df = df.dropna(subset=["Data"]).reset_index(drop=True)
-    df["Data"] = df["Data"].dt.strftime("%d/%m/%Y")
+    with etapa(TABELA, linhas=len(blocos)):
+        df = blocos.tabela()
+        df["Data"] = datas(df["Data"], erros=NULO).to_numpy()
+        df = df.dropna(subset=["Data"]).reset_index(drop=True)
 
     return df
 
@@ -110,51 +114,19 @@ def extrair_lancamentos_pdf(caminho_pdf):
 # 🔹 Formatação e salvamento em Excel
 # ==========================================================
 def salvar_em_excel(df, caminho_excel):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Lançamentos"
-
-    bold = Font(bold=True, color="FFFFFF")
-    center = Alignment(horizontal="center")
-    money_fmt = "#,##0.00"
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-
-    ws.freeze_panes = 'A2'
-
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = border
-            if r_idx == 1:
-                cell.font = bold
-                cell.alignment = center
-                cell.fill = header_fill
-            elif c_idx == 3:
-                cell.number_format = money_fmt
-                if isinstance(value, float):
-                    if value < 0:
-                        cell.font = Font(color="FF0000")
-                    else:
-                        cell.font = Font(color="0000FF")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    ws.column_dimensions["A"].width = 14
-    ws.column_dimensions["B"].width = 80
-    ws.column_dimensions["C"].width = 16
-
-    wb.save(caminho_excel)
+    larguras = {"Data": 14, "Descrição": 80, "Valor (R$)": 16}
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor (R$)",
+                           larguras=larguras, tabela=None,
+                           titulo="Lançamentos")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -173,7 +145,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    df = extrair_lancamentos_pdf(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
@@ -203,28 +176,28 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     registros = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_pdf, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
-
-        try:
-            df = extrair_lancamentos_pdf(pdf_path)
-            if df.empty:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
 
-            registros.extend(df.to_dict('records'))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
+
+        if df.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        registros.append(df)
 
     if registros:
-        df_final = pd.DataFrame(registros)
+        with etapa(TABELA):
+            df_final = pd.concat(registros, ignore_index=True)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Santander_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="Valor (R$)", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
@@ -6,43 +6,49 @@
 # ==========================================================
 
 import os
-import re
-import time
-import fitz  # PyMuPDF
-import pandas as pd
 from pathlib import Path
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.styles.numbers import FORMAT_NUMBER_COMMA_SEPARATED1
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos, tabela_arquivo, juntar
+from lexico import Linha, DATA, VALOR
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+COLUNAS = ("DATA", "DESCRIÇÃO", "DOCUMENTO", "VALOR")
 
 
 # ==========================================================
 # 🔹 Extração dos lançamentos do PDF Sicredi
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path):
-    doc = fitz.open(pdf_path)
-    lancamentos = []
-
-    padrao_data = re.compile(r"\d{2}/\d{2}/\d{4}")
-    padrao_valor = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{2}$")
+    with etapa(ABRIR):
+        doc = abrir_pdf(pdf_path)
+    lancamentos = Lancamentos(COLUNAS, valores=["VALOR"], datas=["DATA"])
 
     buffer = {}
-    for page in doc:
-        linhas = page.get_text().split('\n')
+    for page in paginas(doc):
+        with etapa(TEXTO):
+            linhas = page.get_text().split('\n')
         for linha in linhas:
             linha = linha.strip()
 
             if linha.upper() in ['DATA', 'DESCRIÇÃO', 'DOCUMENTO', 'VALOR (R$)', 'SALDO (R$)', 'SALDO ANTERIOR']:
                 continue
 
-            if padrao_valor.fullmatch(linha) and not buffer:
+            # uma leitura da linha responde a todos os testes abaixo
+            lida = Linha(linha)
+            eh_valor = lida.so(VALOR)
+
+            if eh_valor and not buffer:
                 continue
 
-            if padrao_data.fullmatch(linha):
+            if lida.so(DATA):
                 buffer["DATA"] = linha
                 continue
 
@@ -50,27 +56,18 @@ def extrair_lancamentos(pdf_path):
                 buffer["DESCRIÇÃO"] = linha
                 continue
 
-            if "DESCRIÇÃO" in buffer and "DOCUMENTO" not in buffer and not padrao_valor.fullmatch(linha):
+            if "DESCRIÇÃO" in buffer and "DOCUMENTO" not in buffer and not eh_valor:
                 buffer["DOCUMENTO"] = linha
                 continue
 
-            if padrao_valor.fullmatch(linha):
-                valor_str = linha.replace('.', '').replace(',', '.')
-                try:
-                    valor = float(valor_str)
-                    buffer["VALOR"] = valor
-
-                    if all(k in buffer for k in ["DATA", "DESCRIÇÃO", "VALOR"]):
-                        lancamentos.append({
-                            "DATA": buffer["DATA"],
-                            "DESCRIÇÃO": buffer["DESCRIÇÃO"],
-                            "DOCUMENTO": buffer.get("DOCUMENTO", ""),
-                            "VALOR": buffer["VALOR"]
-                        })
-                except ValueError:
-                    pass
-                finally:
-                    buffer = {}
+            if eh_valor:
+                # valor e data convertidos por coluna na tabela
+                buffer["VALOR"] = linha
+                if all(k in buffer for k in ["DATA", "DESCRIÇÃO", "VALOR"]):
+                    lancamentos.adicionar(
+                        buffer["DATA"], buffer["DESCRIÇÃO"],
+                        buffer.get("DOCUMENTO", ""), buffer["VALOR"])
+                buffer = {}
 
     return lancamentos
 
@@ -78,64 +75,18 @@ def extrair_lancamentos(pdf_path):
 # ==========================================================
 # 🔹 Formatação e salvamento do Excel
 # ==========================================================
-def formatar_excel(caminho_excel):
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = "A2"
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-    align_center = Alignment(horizontal="center")
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = align_center
-        cell.border = thin_border
-
-    for row in range(2, ws.max_row + 1):
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.border = thin_border
-            if col == 1:
-                cell.alignment = Alignment(horizontal="center")
-            elif col == 4:
-                cell.number_format = FORMAT_NUMBER_COMMA_SEPARATED1
-                if isinstance(cell.value, (int, float)):
-                    cell.font = Font(
-                        color="0000FF" if cell.value >= 0 else "FF0000")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in range(1, ws.max_column + 1):
-        max_length = max(
-            len(str(ws.cell(row=row, column=col).value)) if ws.cell(
-                row=row, column=col).value else 0
-            for row in range(1, ws.max_row + 1)
-        )
-        col_letter = get_column_letter(col)
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    ref_final = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
-    tab = Table(displayName="TabelaSicredi", ref=ref_final)
-    estilo = TableStyleInfo(name="TableStyleMedium2", showRowStripes=True)
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+def salvar_em_excel(df, caminho_excel):
+    return salvar_planilha(df, caminho_excel, coluna_valor="VALOR",
+                           centralizar=["DATA"], tabela="TabelaSicredi")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione os arquivos PDF do Sicredi", "", "Arquivos PDF (*.pdf)"
@@ -151,7 +102,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                dados = extrair_lancamentos(caminho_pdf)
+                with dialog.acompanhar(10, 40):
+                    dados = extrair_lancamentos(caminho_pdf)
                 dialog.atualizar_progresso(40)
 
                 if not dados:
@@ -161,12 +113,10 @@ def processar_pdf_custom(janela):
                     dialog.accept()
                     continue
 
-                df = pd.DataFrame(dados)
+                with etapa(TABELA, linhas=len(dados)):
+                    df = dados.tabela()
                 caminho_excel = os.path.splitext(caminho_pdf)[0] + ".xlsx"
-                df.to_excel(caminho_excel, index=False)
-                dialog.atualizar_progresso(80)
-
-                formatar_excel(caminho_excel)
+                salvar_em_excel(df, caminho_excel)
                 dialog.atualizar_progresso(100)
 
             except Exception as e:
@@ -191,30 +141,31 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento dos extratos Sicredi...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_lancamentos,
+        progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
-
-        try:
-            dados = extrair_lancamentos(pdf_path)
-            if not dados:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
 
-            registros.extend(dados)
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
+
+        if dados.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        tabelas.append(dados)
 
-    if registros:
-        df_final = pd.DataFrame(registros)
+    if tabelas:
+        df_final = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Sicredi_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="VALOR", centralizar=["DATA"], tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
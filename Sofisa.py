@@ -7,27 +7,34 @@
 
 import os
 import re
-import time
-import fitz  # PyMuPDF
 import pandas as pd
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, convert_from_bytes
 import pytesseract
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.styles.numbers import FORMAT_NUMBER_COMMA_SEPARATED1
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from main import LoaderDialog
+import ocr
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf, PdfEmMemoria
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import tabela_arquivo, juntar
+from normalizacao import normalizar
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+# Página com menos letras/dígitos que isto é tratada como escaneada
+MIN_CARACTERES_TEXTO = 10
 
 
 # ==========================================================
 # 🔹 Extração dos lançamentos
 # ==========================================================
-def extrair_lancamentos(texto):
-    linhas = texto.splitlines()
+def extrair_lancamentos(linhas):
+    if isinstance(linhas, str):
+        linhas = linhas.splitlines()
     dados = []
-    grupo_atual = []
+    grupo_atual = None
 
     def is_linha_invalida(linha):
         return (
@@ -51,9 +58,9 @@ def extrair_lancamentos(texto):
         for linha in grupo:
             match = re.search(r"([-=]?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})", linha)
             if match:
+                # texto cru: convertido por coluna em montar_tabela
                 sinal, valor_txt = match.groups()
-                valor = float(valor_txt.replace('.', '').replace(',', '.'))
-                return -abs(valor) if '-' in sinal or '=' in sinal else valor
+                return "-" + valor_txt if sinal in ('-', '=') else valor_txt
         return None
 
     def remover_valores(grupo):
@@ -68,7 +75,7 @@ def extrair_lancamentos(texto):
         match = re.match(r"^(\d{2}/\d{2}/\d{2})(.*)", grupo[0])
         if not match:
             return None
-        data = pd.to_datetime(match.group(1), format='%d/%m/%y')
+        data = match.group(1)
         grupo[0] = match.group(2).strip()
         valor = extrair_valor(grupo)
         grupo_limpo = remover_valores(grupo)
@@ -80,28 +87,26 @@ def extrair_lancamentos(texto):
             "Valor (R$)": valor
         }
 
-    i = 0
-    while i < len(linhas):
-        linha = linhas[i].strip()
-
-        if not linha or is_linha_invalida(linha):
-            i += 1
-            continue
-
-        if re.match(r"^\d{2}/\d{2}/\d{2}", linha):
-            grupo_atual = [linha]
-            i += 1
-            while i < len(linhas):
-                prox = linhas[i].strip()
-                if is_linha_invalida(prox) or re.match(r"^\d{2}/\d{2}/\d{2}", prox):
-                    break
-                grupo_atual.append(prox)
-                i += 1
-            registro = processar_grupo(grupo_atual)
-            if registro:
-                dados.append(registro)
-        else:
-            i += 1
+    for linha in linhas:
+        linha = linha.strip()
+
+        # Linha inválida ou nova data fecham o lançamento em aberto
+        nova_data = re.match(r"^\d{2}/\d{2}/\d{2}", linha)
+        if is_linha_invalida(linha) or nova_data:
+            if grupo_atual:
+                registro = processar_grupo(grupo_atual)
+                if registro:
+                    dados.append(registro)
+            grupo_atual = None
+            if linha and nova_data and not is_linha_invalida(linha):
+                grupo_atual = [linha]
+        elif grupo_atual is not None:
+            grupo_atual.append(linha)
+
+    if grupo_atual:
+        registro = processar_grupo(grupo_atual)
+        if registro:
+            dados.append(registro)
 
     return dados
 
@@ -109,92 +114,75 @@ def extrair_lancamentos(texto):
 # ==========================================================
 # 🔹 Extração de texto (PDF direto ou OCR)
 # ==========================================================
-def extrair_texto_pdf_ou_ocr(caminho_pdf):
-    texto_completo = ''
+def linhas_pdf_ou_ocr(caminho_pdf):
+    """
+    Gera as linhas do PDF página a página, na ordem
+    ---------------------------------------------------------
+    Páginas com camada de texto saem direto do PyMuPDF; só as
+    sem texto (escaneadas) são rasterizadas e passam pelo OCR
+    (ocr.py, em paralelo). Se o PyMuPDF não abrir o arquivo,
+    todas as páginas vão para o OCR pelo pdf2image.
+    """
     try:
-        doc = fitz.open(caminho_pdf)
-        for pagina in doc:
-            texto_completo += pagina.get_text()
-        doc.close()
-        if texto_completo.strip():
-            return texto_completo
+        with etapa(ABRIR):
+            doc = abrir_pdf(caminho_pdf)
     except Exception as e:
         print("Erro ao usar PyMuPDF:", e)
+        # Rasterizar e reconhecer contam como extração de texto
+        with etapa(TEXTO):
+            imagens = _rasterizar(caminho_pdf)
+        for imagem in paginas(imagens):
+            with etapa(TEXTO):
+                texto = pytesseract.image_to_string(imagem, lang=ocr.IDIOMA)
+            yield from texto.splitlines()
+        return
+
+    with doc:
+        for texto in ocr.textos_paginas(doc, precisa_ocr=_escaneada):
+            yield from texto.splitlines()
+
+
+def _escaneada(texto):
+    # Página escaneada: sem camada de texto (ou só sobras dela)
+    return sum(c.isalnum() for c in texto) < MIN_CARACTERES_TEXTO
+
+
+def _rasterizar(caminho_pdf):
+    # Só quando o PyMuPDF não abre o arquivo: o poppler tenta
+    if isinstance(caminho_pdf, PdfEmMemoria):
+        return convert_from_bytes(bytes(caminho_pdf.conteudo))
+    return convert_from_path(caminho_pdf)
 
-    imagens = convert_from_path(caminho_pdf)
-    for imagem in imagens:
-        texto_completo += pytesseract.image_to_string(imagem, lang='por')
-    return texto_completo
+
+# ==========================================================
+# 🔹 Texto (ou OCR) + lançamentos de um arquivo
+# ==========================================================
+@memorizar(VERSAO_PARSER)
+def extrair_lancamentos_arquivo(caminho_pdf):
+    return extrair_lancamentos(linhas_pdf_ou_ocr(caminho_pdf))
 
 
 # ==========================================================
 # 🔹 Formatação e salvamento Excel
 # ==========================================================
-def formatar_excel(caminho_excel):
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = "A2"
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    col_valor = 3
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == 1:
-                cell.number_format = 'DD/MM/YYYY'
-                cell.alignment = Alignment(horizontal="center")
-            elif cell.col_idx == col_valor:
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = FORMAT_NUMBER_COMMA_SEPARATED1
-                    cor = "0000FF" if cell.value >= 0 else "FF0000"
-                    cell.font = Font(color=cor)
-                    cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for column_cells in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in column_cells)
-        column_letter = column_cells[0].column_letter
-        ws.column_dimensions[column_letter].width = max_length + 2
-
-    num_linhas = ws.max_row
-    ref_final = f"{get_column_letter(ws.max_column)}{num_linhas}"
-    tab = Table(displayName="TabelaSofisa", ref=f"A1:{ref_final}")
-
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+def montar_tabela(dados):
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(dados, columns=["Data", "Lançamentos", "Valor (R$)"])
+        return normalizar(df, colunas_valor=["Valor (R$)"], colunas_data=["Data"])
+
+
+def salvar_em_excel(df, caminho_excel):
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor (R$)",
+                           centralizar=["Data"], tabela="TabelaSofisa")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -213,10 +201,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                texto = extrair_texto_pdf_ou_ocr(caminho_pdf)
-                dialog.atualizar_progresso(40)
-
-                dados = extrair_lancamentos(texto)
+                with dialog.acompanhar(10, 60):
+                    dados = extrair_lancamentos_arquivo(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 if not dados:
@@ -226,12 +212,9 @@ def processar_pdf_custom(janela):
                     dialog.accept()
                     continue
 
-                df = pd.DataFrame(dados)
+                df = montar_tabela(dados)
                 caminho_excel = os.path.splitext(caminho_pdf)[0] + '.xlsx'
-                df.to_excel(caminho_excel, index=False)
-                dialog.atualizar_progresso(80)
-
-                formatar_excel(caminho_excel)
+                salvar_em_excel(df, caminho_excel)
                 dialog.atualizar_progresso(100)
 
             except Exception as e:
@@ -256,31 +239,31 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento de extratos Sofisa...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_lancamentos_arquivo, montar_tabela,
+        progress_cb=progress_cb, faixa=(0, 60))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 60))
 
-        try:
-            texto = extrair_texto_pdf_ou_ocr(pdf_path)
-            dados = extrair_lancamentos(texto)
-            if not dados:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-            registros.extend(dados)
+        if dados.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        tabelas.append(dados)
 
-    if registros:
-        df_final = pd.DataFrame(registros)
+    if tabelas:
+        df_final = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Sofisa_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="Valor (R$)", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
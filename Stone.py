@@ -7,35 +7,46 @@
 
 import os
 import re
-import time
-import pdfplumber
-import pandas as pd
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils import get_column_letter
 
-# ✅ Importa a classe LoaderDialog
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos, tabela_arquivo, juntar
+from filtro import Filtro
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
+
+# COR pinta o valor no Excel e não vira coluna da planilha
+COLUNAS = ("DATA", "LANÇAMENTO", "VALOR (R$)", "COR")
+COLUNAS_EXCEL = COLUNAS[:3]
+
+# Rodapé do comprovante e cabeçalho do extrato (sem diferença de caixa)
+PALAVRAS_CHAVE_IGNORAR = Filtro([
+    "informações do comprovante", "código de autenticação", "ouvidoria",
+    "meajuda@stone.com.br", "cnpj", "ligue para", "fale com a gente",
+    "extrato de conta corrente", "emitido no dia", "titular", "instituição",
+    "documento", "período", "agência", "conta", "saldo (r$)", "contraparte"
+])
 
 
 # ==========================================================
 # 🔹 Extração dos lançamentos do PDF
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_dados_pdf(caminho_pdf):
-    dados = []
-    palavras_chave_ignorar = [
-        "informações do comprovante", "código de autenticação", "ouvidoria",
-        "meajuda@stone.com.br", "cnpj", "ligue para", "fale com a gente",
-        "extrato de conta corrente", "emitido no dia", "titular", "instituição",
-        "documento", "período", "agência", "conta", "saldo (r$)", "contraparte"
-    ]
-
-    with pdfplumber.open(caminho_pdf) as pdf:
+    dados = Lancamentos(COLUNAS, valores=["VALOR (R$)"], datas=["DATA"])
+
+    with etapa(ABRIR):
+        pdf = abrir_pdf(caminho_pdf, "pdfplumber")
+    with pdf:
         linhas = []
-        for pagina in pdf.pages:
-            texto = pagina.extract_text()
+        for pagina in paginas(pdf.pages):
+            with etapa(TEXTO):
+                texto = pagina.extract_text()
             if texto:
                 linhas.extend(texto.split('\n'))
 
@@ -45,7 +56,7 @@ def extrair_dados_pdf(caminho_pdf):
 
     while i < len(linhas):
         linha = linhas[i].strip()
-        if any(p in linha.lower() for p in palavras_chave_ignorar):
+        if PALAVRAS_CHAVE_IGNORAR.acha(linha):
             i += 1
             continue
 
@@ -53,12 +64,7 @@ def extrair_dados_pdf(caminho_pdf):
         if match_data:
             if data_atual and descricao_temp:
                 descricao = ' '.join(descricao_temp).strip()
-                dados.append({
-                    'DATA': data_atual,
-                    'LANÇAMENTO': descricao,
-                    'VALOR (R$)': valor_encontrado,
-                    'COR': cor
-                })
+                dados.adicionar(data_atual, descricao, valor_encontrado, cor)
                 descricao_temp = []
 
             data_atual = match_data.group(1)
@@ -66,9 +72,9 @@ def extrair_dados_pdf(caminho_pdf):
             is_credito = "crédito" in tipo_linha
             cor = 'FF0000' if is_credito else '0000FF'
 
+            # convertido por coluna na tabela
             valores = re.findall(r'\d{1,3}(?:\.\d{3})*,\d{2}', linha)
-            valor_encontrado = float(valores[0].replace(
-                '.', '').replace(',', '.')) if valores else 0.0
+            valor_encontrado = valores[0] if valores else "0,00"
 
             descricao_temp = []
             i += 1
@@ -80,7 +86,7 @@ def extrair_dados_pdf(caminho_pdf):
                 if re.match(r'^\d{2}/\d{2}/\d{4}', prox_linha):
                     i -= 1
                     break
-                if any(p in prox_linha.lower() for p in palavras_chave_ignorar):
+                if PALAVRAS_CHAVE_IGNORAR.acha(prox_linha):
                     break
                 if re.search(r'\d{1,3}(?:\.\d{3})*,\d{2}', prox_linha):
                     break
@@ -90,13 +96,8 @@ def extrair_dados_pdf(caminho_pdf):
 
     if data_atual and descricao_temp:
         descricao = ' '.join(descricao_temp).strip()
-        if not any(p in descricao.lower() for p in palavras_chave_ignorar):
-            dados.append({
-                'DATA': data_atual,
-                'LANÇAMENTO': descricao,
-                'VALOR (R$)': valor_encontrado,
-                'COR': cor
-            })
+        if not PALAVRAS_CHAVE_IGNORAR.acha(descricao):
+            dados.adicionar(data_atual, descricao, valor_encontrado, cor)
 
     return dados
 
@@ -105,63 +106,21 @@ def extrair_dados_pdf(caminho_pdf):
 # 🔹 Formatação e salvamento em Excel
 # ==========================================================
 def salvar_em_excel(dados, caminho_pdf):
-    df = pd.DataFrame(dados)
+    with etapa(TABELA, linhas=len(dados)):
+        df = dados.tabela(COLUNAS_EXCEL)
     caminho_excel = caminho_pdf.replace('.pdf', '.xlsx')
-    df.drop(columns=['COR']).to_excel(caminho_excel, index=False)
-
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    for idx, row in enumerate(dados, start=2):
-        valor_cell = ws[f'C{idx}']
-        valor_cell.font = Font(color=row['COR'])
-        valor_cell.number_format = '#,##0.00'
-        valor_cell.alignment = Alignment(horizontal="right")
-
-        for col in ('A', 'B'):
-            ws[f"{col}{idx}"].border = thin_border
-            ws[f"{col}{idx}"].alignment = Alignment(horizontal="left")
-        valor_cell.border = thin_border
-
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        col_letter = col[0].column_letter
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    ultima_linha = len(dados) + 1
-    tab = Table(displayName="TabelaStone", ref=f"A1:C{ultima_linha}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showRowStripes=True
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
-    return caminho_excel
+    return salvar_planilha(df, caminho_excel,
+                           coluna_valor='VALOR (R$)', cores=dados.coluna('COR'),
+                           tabela="TabelaStone")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione um ou mais extratos da Stone", "", "Arquivos PDF (*.pdf)"
@@ -177,7 +136,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                dados = extrair_dados_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 50):
+                    dados = extrair_dados_pdf(caminho_pdf)
                 dialog.atualizar_progresso(50)
 
                 if not dados:
@@ -211,31 +171,32 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     log_cb("Iniciando processamento de extratos Stone...")
 
     total = len(files)
-    registros = []
+    tabelas = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    # Convertidos no worker: valor inválido derruba só o seu arquivo
+    resultados = mapear_arquivos(
+        tabela_arquivo, files, extrair_dados_pdf,
+        progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, dados, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
 
-        try:
-            dados = extrair_dados_pdf(pdf_path)
-            if not dados:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
 
-            registros.extend(dados)
+        if dados.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        tabelas.append(dados)
 
-    if registros:
-        df_final = pd.DataFrame(registros)
+    if tabelas:
+        df_final = juntar(tabelas)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(output_dir, "Stone_Resultados.xlsx")
-        df_final.drop(columns=['COR'], errors='ignore').to_excel(
-            excel_path, index=False)
+        salvar_planilha(df_final[list(COLUNAS_EXCEL)], excel_path,
+                        coluna_valor="VALOR (R$)", cores=df_final["COR"], tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
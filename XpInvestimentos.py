@@ -7,28 +7,32 @@
 
 import os
 import re
-import time
 import pandas as pd
-import fitz  # PyMuPDF
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 
-# ✅ Importa a classe LoaderDialog
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "3"
 
 
 # ==========================================================
 # 🔹 Extração de lançamentos do PDF
 # ==========================================================
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos(pdf_path):
-    doc = fitz.open(pdf_path)
+    with etapa(ABRIR):
+        doc = abrir_pdf(pdf_path)
     dados = []
 
-    for page in doc:
-        text = page.get_text("text")
+    for page in paginas(doc):
+        with etapa(TEXTO):
+            text = page.get_text("text")
         linhas = text.split('\n')
 
         buffer = ""
@@ -55,12 +59,8 @@ def extrair_lancamentos(pdf_path):
             if match1 and data_atual:
                 historico = match1.group(1).strip()
                 sinal = match1.group(2)
-                valor = match1.group(3)
-                valor_float = round(
-                    float(valor.replace('.', '').replace(',', '.')), 2)
-                if sinal == "-":
-                    valor_float *= -1
-                dados.append([data_atual, historico, valor_float])
+                valor = sinal + match1.group(3)  # convertido na tabela
+                dados.append([data_atual, historico, valor])
                 buffer = ""
                 data_atual = ""
                 capturando = False
@@ -73,15 +73,14 @@ def extrair_lancamentos(pdf_path):
             if match2 and data_atual:
                 historico = match2.group(1).strip()
                 valor = match2.group(2)
-                valor_float = round(
-                    float(valor.replace('.', '').replace(',', '.')), 2)
-                dados.append([data_atual, historico, valor_float])
+                dados.append([data_atual, historico, valor])
                 buffer = ""
                 data_atual = ""
                 capturando = False
 
-    df = pd.DataFrame(dados, columns=["Data", "Histórico", "Valor (R$)"])
-    return df
+    with etapa(TABELA, linhas=len(dados)):
+        df = pd.DataFrame(dados, columns=["Data", "Histórico", "Valor (R$)"])
+        return normalizar(df, colunas_valor=["Valor (R$)"], colunas_data=["Data"])
 
 
 # ==========================================================
@@ -89,68 +88,18 @@ def extrair_lancamentos(pdf_path):
 # ==========================================================
 def salvar_em_excel(df, pdf_path):
     excel_path = os.path.splitext(pdf_path)[0] + ".xlsx"
-    df.to_excel(excel_path, index=False)
-
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    ws.freeze_panes = 'A2'
-
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Ajuste de colunas e formatação
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = max(max_length + 2, 12)
-
-    # Formatação da coluna de valor
-    for row in range(2, ws.max_row + 1):
-        for col_idx in range(1, ws.max_column + 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.border = thin_border
-            if col_idx == 3:
-                valor = cell.value
-                if isinstance(valor, (int, float)):
-                    cell.number_format = '#,##0.00'
-                    cor = "0000FF" if valor >= 0 else "FF0000"
-                    cell.font = Font(color=cor)
-                    cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    # Criação da tabela formatada
-    ref_final = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
-    tab = Table(displayName="TabelaXpInvestimentos", ref=ref_final)
-    style = TableStyleInfo(
-        name="TableStyleMedium2",
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = style
-    ws.add_table(tab)
-
-    wb.save(excel_path)
-    return excel_path
+    return salvar_planilha(df, excel_path, coluna_valor="Valor (R$)",
+                           largura_minima=12,
+                           tabela="TabelaXpInvestimentos")
 
 
 # ==========================================================
 # 💻 Modo Desktop (PyQt5)
 # ==========================================================
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela,
@@ -169,7 +118,8 @@ def processar_pdf_custom(janela):
             try:
                 dialog.atualizar_progresso(10)
 
-                df = extrair_lancamentos(pdf_path)
+                with dialog.acompanhar(10, 50):
+                    df = extrair_lancamentos(pdf_path)
                 dialog.atualizar_progresso(50)
 
                 if df.empty:
@@ -206,30 +156,29 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     registros = []
 
-    for i, pdf_path in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos, files, progress_cb=progress_cb, faixa=(0, 70))
+    for i, (pdf_path, df, erro) in enumerate(resultados, start=1):
         log_cb(f"Lendo arquivo {i}/{total}: {os.path.basename(pdf_path)}")
-        time.sleep(0.3)
-        progress_cb(int((i / total) * 70))
-
-        try:
-            df = extrair_lancamentos(pdf_path)
-            if df.empty:
-                log_cb(
-                    f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
-                continue
 
-            registros.extend(df.values.tolist())
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {erro}")
+            continue
+
+        if df.empty:
+            log_cb(
+                f"⚠️ Nenhum lançamento encontrado em {os.path.basename(pdf_path)}")
+            continue
 
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {os.path.basename(pdf_path)}: {e}")
+        registros.append(df)
 
     if registros:
-        df_final = pd.DataFrame(
-            registros, columns=["Data", "Histórico", "Valor (R$)"])
+        with etapa(TABELA):
+            df_final = pd.concat(registros, ignore_index=True)
         os.makedirs(output_dir, exist_ok=True)
         excel_path = os.path.join(
             output_dir, "XpInvestimentos_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
+        salvar_planilha(df_final, excel_path, coluna_valor="Valor (R$)", tabela=None)
         log_cb(f"✅ Planilha gerada: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento encontrado nos PDFs enviados.")
@@ -3,21 +3,26 @@
 # ==========================================================
 # - Login seguro com expiração individual
 # - Painel Administrativo (adicionar/editar usuários)
+# - Métricas de desempenho por etapa (somente admin)
+# - Uso do disco pelos processamentos (somente admin)
 # - Bloqueio remoto via arquivo online (GitHub)
 # - Interface web para processamento de bancos
 # ==========================================================
 
 import streamlit as st
 import streamlit_authenticator as stauth
-import importlib
-import tempfile
+import time
 import os
-import glob
 import requests
 import json
+import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
+import bancos
+import fila
+import metricas
+
 # ==========================================================
 # CONFIG INICIAL
 # ==========================================================
@@ -153,6 +158,16 @@ if usuario == "admin":
     st.sidebar.markdown("🧩 **Painel Administrativo**")
     if st.sidebar.button("Gerenciar Usuários"):
         st.session_state["admin_panel"] = True
+        st.session_state["admin_metricas"] = False
+        st.session_state["admin_disco"] = False
+    if st.sidebar.button("Métricas de Desempenho"):
+        st.session_state["admin_metricas"] = True
+        st.session_state["admin_panel"] = False
+        st.session_state["admin_disco"] = False
+    if st.sidebar.button("Uso do Disco"):
+        st.session_state["admin_disco"] = True
+        st.session_state["admin_panel"] = False
+        st.session_state["admin_metricas"] = False
 
 if st.session_state.get("admin_panel", False) and usuario == "admin":
     st.title("👑 Painel Administrativo — Gerenciar Usuários")
@@ -208,6 +223,103 @@ if st.session_state.get("admin_panel", False) and usuario == "admin":
 
     st.stop()  # encerra painel aqui
 
+
+def tabela_metricas(registros):
+    """Uma linha por execução, com o tempo (s) de cada etapa."""
+    linhas = []
+    for r in registros:
+        linha = {"Quando": r["quando"], "Banco": r["banco"], "Modo": r["modo"],
+                 "Arquivos": len(r["arquivos"]), "Linhas": r["linhas"],
+                 "Total (s)": r["parede"], "CPU (s)": r["cpu"]}
+        for nome in metricas.ETAPAS:
+            linha[f"{nome} (s)"] = r["etapas"].get(nome, {}).get("parede", 0.0)
+        linha["Erro"] = r.get("erro") or ""
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+if st.session_state.get("admin_metricas", False) and usuario == "admin":
+    st.title("⏱️ Painel Administrativo — Métricas de Desempenho")
+    st.caption(f"Arquivo: {metricas.ARQUIVO}")
+
+    registros = metricas.ler(500)
+    if not registros:
+        st.info("Nenhuma execução registrada ainda.")
+    else:
+        df_metricas = tabela_metricas(registros)
+        colunas_tempo = ["Total (s)", "CPU (s)"] + \
+            [f"{nome} (s)" for nome in metricas.ETAPAS]
+
+        st.subheader("Média por banco")
+        por_banco = df_metricas.groupby("Banco")
+        st.dataframe(por_banco[colunas_tempo].mean().round(3)
+                     .assign(Execuções=por_banco.size(),
+                             Linhas=por_banco["Linhas"].sum()),
+                     use_container_width=True)
+
+        st.subheader("Últimas execuções")
+        st.dataframe(df_metricas.iloc[::-1], use_container_width=True,
+                     hide_index=True)
+
+        st.subheader("Arquivos de uma execução")
+        recentes = list(reversed(registros))[:50]
+        escolhida = st.selectbox(
+            "Execução", range(len(recentes)),
+            format_func=lambda i: f"{recentes[i]['quando']} · {recentes[i]['banco']}")
+        arquivos = [
+            {"Arquivo": a["arquivo"], "Cache": a["cache"], "Linhas": a["linhas"],
+             "Total (s)": a["parede"], "CPU (s)": a["cpu"],
+             **{f"{nome} (s)": a["etapas"].get(nome, {}).get("parede", 0.0)
+                for nome in metricas.ETAPAS}}
+            for a in recentes[escolhida]["arquivos"]]
+        if arquivos:
+            st.dataframe(pd.DataFrame(arquivos), use_container_width=True,
+                         hide_index=True)
+        else:
+            st.info("Execução sem arquivos medidos.")
+
+    if st.button("« Voltar"):
+        st.session_state["admin_metricas"] = False
+        st.experimental_rerun()
+    st.stop()  # encerra painel aqui
+
+
+def _mb(n_bytes):
+    return round(n_bytes / (1024 * 1024), 1)
+
+
+if st.session_state.get("admin_disco", False) and usuario == "admin":
+    st.title("💽 Painel Administrativo — Uso do Disco")
+    uso = fila.uso_disco()
+    st.caption(f"Pasta: {uso['pasta']} · jobs finalizados são apagados após "
+               f"{uso['validade_horas']:g} h")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Em uso (MB)", _mb(uso["total"]),
+                help=f"Cota total: {_mb(uso['cota_total'])} MB" if uso["cota_total"] else None)
+    col2.metric("Processamentos", uso["jobs"])
+    col3.metric("Na fila / processando", uso["ativos"])
+    if uso["cota_total"]:
+        st.progress(min(1.0, uso["total"] / uso["cota_total"]))
+
+    st.subheader("Por usuário")
+    if uso["por_usuario"]:
+        st.dataframe(pd.DataFrame(
+            [{"Usuário": u, "MB": _mb(d["bytes"]), "Processamentos": d["jobs"],
+              "Cota (MB)": _mb(uso["cota_usuario"]) if uso["cota_usuario"] else None}
+             for u, d in sorted(uso["por_usuario"].items(),
+                                key=lambda item: -item[1]["bytes"])]),
+            use_container_width=True, hide_index=True)
+    else:
+        st.info("Nenhum processamento em disco.")
+
+    if st.button("🧹 Limpar vencidos agora"):
+        st.success(f"{fila.faxinar()} processamento(s) apagado(s).")
+    if st.button("« Voltar"):
+        st.session_state["admin_disco"] = False
+        st.experimental_rerun()
+    st.stop()  # encerra painel aqui
+
 # ==========================================================
 # INTERFACE DO SISTEMA
 # ==========================================================
@@ -215,6 +327,13 @@ if "current_page" not in st.session_state:
     st.session_state.current_page = 0
 if "selected_bank" not in st.session_state:
     st.session_state.selected_bank = None
+if "jobs" not in st.session_state:
+    st.session_state.jobs = []
+
+# Fila de processamentos (sobe o despachante deste servidor)
+fila.iniciar()
+INTERVALO_ATUALIZACAO = 1.5  # segundos entre as consultas de status
+_recarregar = getattr(st, "rerun", None) or st.experimental_rerun
 
 
 def set_theme(is_dark: bool):
@@ -261,14 +380,9 @@ def inject_theme_css():
 
 inject_theme_css()
 
-# Bancos
-BANKS = [
-    dict(nome="Asaas", icone="imagens/Asaas1.ico", modulo="Asaas"),
-    dict(nome="Itaú Consolidado", icone="imagens/ItauConsolidado1.ico",
-         modulo="ItauConsolidado"),
-    dict(nome="Santander", icone="imagens/santander-br.ico", modulo="Santander"),
-]
-BANKS = sorted(BANKS, key=lambda b: b["nome"])
+# Bancos (registro compartilhado com o Desktop; import sob demanda)
+# "Detectar banco" abre a grade: aceita PDFs de vários bancos juntos
+BANKS = [bancos.AUTOMATICO] + bancos.listar(bancos.STREAMLIT)
 BANKS_PER_PAGE = 20
 TOTAL_PAGES = max(1, (len(BANKS) + BANKS_PER_PAGE - 1) // BANKS_PER_PAGE)
 
@@ -299,51 +413,137 @@ def render_grid():
             st.markdown("</div>", unsafe_allow_html=True)
 
 
-def run_bank_processor(module_name, uploaded_files):
-    tmp_dir = tempfile.mkdtemp(prefix="central-bancos-")
-    files = []
-    for uf in uploaded_files or []:
-        safe = uf.name.replace("/", "_").replace("\\", "_")
-        path = os.path.join(tmp_dir, safe)
-        with open(path, "wb") as f:
-            f.write(uf.getbuffer())
-        files.append(path)
-    if not files:
-        st.warning("Envie pelo menos 1 PDF.")
+def _job_da_url():
+    # ?job=<id> mantém o processamento após recarregar a página
+    qp = getattr(st, "query_params", None)
+    if qp is not None:
+        return qp.get("job")
+    return (st.experimental_get_query_params().get("job") or [None])[0]
+
+
+def _job_na_url(job_id):
+    qp = getattr(st, "query_params", None)
+    if qp is not None:
+        qp["job"] = job_id
+    else:
+        st.experimental_set_query_params(job=job_id)
+
+
+def _do_usuario(estado):
+    # Job existe e pertence a quem está logado (o admin vê todos)
+    return estado is not None and (estado.get("usuario") in (None, usuario)
+                                   or usuario == "admin")
+
+
+def acompanhar_job(job_id):
+    """
+    Inclui o job na lista acompanhada por esta sessão
+    ---------------------------------------------------------
+    ID digitado ou vindo da URL que não existe (ou é de outro
+    usuário) só gera um aviso: não entra na lista nem na URL.
+    """
+    if job_id in st.session_state.jobs:
+        _job_na_url(job_id)
+        return
+    if not _do_usuario(fila.estado(job_id)):
+        st.warning(f"Processamento `{job_id}` não encontrado.")
         return
+    st.session_state.jobs.append(job_id)
+    _job_na_url(job_id)
 
-    out_dir = os.path.join(tmp_dir, "output")
-    os.makedirs(out_dir, exist_ok=True)
-    progress = st.progress(0)
-    log = st.empty()
 
-    def progress_cb(p): progress.progress(max(0, min(100, int(p))))
-    def log_cb(msg): log.info(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+def run_bank_processor(bank, uploaded_files):
+    if not uploaded_files:
+        st.warning("Envie pelo menos 1 PDF.")
+        return
 
+    # Só enfileira: o processamento roda fora desta execução do script
     try:
-        mod = importlib.import_module(module_name)
-        fn = getattr(mod, "processar_pdf_streamlit", None)
-        if not callable(fn):
-            st.warning(
-                f"O módulo **{module_name}** não possui a função esperada.")
-            return
-        log_cb("Iniciando processamento...")
-        fn(files, out_dir, progress_cb, log_cb)
-        progress_cb(100)
-        log_cb("Processamento concluído.")
-    except Exception as e:
-        st.error(f"❌ Erro: {e}")
+        job_id = fila.enviar(
+            bank, [(uf.name, uf.getbuffer()) for uf in uploaded_files], usuario)
+    except fila.CotaExcedida as e:
+        st.error(f"💽 {e}")
         return
-
-    excels = glob.glob(os.path.join(out_dir, "*.xlsx"))
-    if not excels:
-        st.info("Nenhum Excel gerado.")
-    else:
-        st.success("✅ Processamento finalizado! Baixe os resultados abaixo:")
-        for p in excels:
-            with open(p, "rb") as f:
-                st.download_button(f"📥 {os.path.basename(p)}", f.read(), os.path.basename(p),
-                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    acompanhar_job(job_id)
+    st.success(f"📨 Enviado para processamento. ID: `{job_id}`")
+
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def botao_download(job_id, nome, caminho, mime):
+    """
+    Download lido do disco só quando pedido
+    ---------------------------------------------------------
+    - caminho: função que devolve o arquivo no disco
+    ---------------------------------------------------------
+    A sessão guarda só a referência (job/nome) do pedido e o
+    arquivo só é lido depois do clique. Cada execução com o
+    pedido pendente reenvia os bytes ao navegador: por isso a
+    atualização automática fica parada até o download (ou até
+    o pedido ser cancelado).
+    """
+    chave = f"{job_id}/{nome}"
+    if st.session_state.get("baixar") != chave:
+        if st.button(f"📥 {nome}", key=f"pedir-{chave}"):
+            st.session_state.baixar = chave
+            _recarregar()
+        return
+    try:
+        arquivo = open(caminho(), "rb")
+    except (KeyError, OSError):
+        st.warning(f"{nome} não está mais disponível.")
+        st.session_state.pop("baixar", None)
+        return
+    with arquivo:
+        st.download_button(f"💾 Salvar {nome}", arquivo, nome, mime=mime,
+                           key=f"dl-{chave}", type="primary",
+                           on_click=lambda: st.session_state.pop("baixar", None))
+    if st.button("Cancelar", key=f"cancelar-{chave}"):
+        st.session_state.pop("baixar", None)
+        _recarregar()
+
+
+def render_job(job_id):
+    estado = fila.estado(job_id)
+    if not _do_usuario(estado):
+        st.warning(f"Processamento `{job_id}` não encontrado.")
+        return True
+
+    situacao = estado["situacao"]
+    st.markdown(f"**{estado['banco']}** · {len(estado['arquivos'])} PDF(s) · "
+                f"{situacao} · enviado em {estado['criado']}")
+    st.caption(f"ID: {job_id}")
+    st.progress(max(0, min(100, int(estado["progresso"]))))
+    if estado["log"]:
+        with st.expander("Log", expanded=situacao not in fila.FINAIS):
+            st.text("\n".join(estado["log"][-15:]))
+
+    if situacao == fila.ERRO:
+        st.error(f"❌ Erro: {estado['erro']}")
+    elif situacao == fila.CONCLUIDO:
+        excels = [os.path.basename(p) for p in fila.resultados(job_id)]
+        if not excels:
+            st.info("Nenhum Excel gerado.")
+        for nome in excels:
+            botao_download(job_id, nome, lambda nome=nome: fila.resultado(job_id, nome),
+                           MIME_XLSX)
+        if len(excels) > 1:
+            botao_download(job_id, f"{estado['banco']}_{job_id[:8]}.zip",
+                           lambda: fila.pacote_zip(job_id), "application/zip")
+    return situacao in fila.FINAIS
+
+
+def render_jobs():
+    if not st.session_state.jobs:
+        return True
+    st.divider()
+    st.markdown("### 📋 Processamentos")
+    finalizados = True
+    for job_id in reversed(st.session_state.jobs):
+        with st.container():
+            finalizados = render_job(job_id) and finalizados
+    return finalizados
 
 
 if st.session_state.selected_bank is None:
@@ -351,13 +551,35 @@ if st.session_state.selected_bank is None:
 else:
     bank = st.session_state.selected_bank
     st.markdown(f"### 🏦 {bank['nome']}")
+    if bank["modulo"] == bancos.AUTOMATICO["modulo"]:
+        st.caption("Envie PDFs de qualquer banco: cada um vai ao parser "
+                   "identificado pela 1ª página.")
+    else:
+        st.caption(f"Leitor de PDF: {bank['motor']} · parser v{bancos.versao(bank)}")
     uploaded = st.file_uploader("Selecione PDFs", type=[
                                 "pdf"], accept_multiple_files=True)
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🔄 Processar", type="primary"):
-            run_bank_processor(bank["modulo"], uploaded)
+            run_bank_processor(bank, uploaded)
     with col2:
         if st.button("« Voltar"):
             st.session_state.selected_bank = None
             st.experimental_rerun()
+
+# Processamentos desta sessão (ou recuperados pelo ID)
+with st.sidebar:
+    id_recuperar = st.text_input("🔎 Recuperar processamento (ID)").strip()
+if id_recuperar:
+    acompanhar_job(id_recuperar)
+elif _job_da_url():
+    acompanhar_job(_job_da_url())
+
+if st.session_state.get("baixar"):
+    # Download pendente: uma atualização reenviaria o arquivo inteiro
+    render_jobs()
+    st.caption("⏸️ Atualização automática pausada até o download.")
+elif not render_jobs():
+    # Ainda há job rodando: consulta o status de novo em instantes
+    time.sleep(INTERVALO_ATUALIZACAO)
+    _recarregar()
@@ -0,0 +1,149 @@
+# ==========================================================
+# Módulo: automatico.py
+# Upload misturado: cada PDF vai ao parser do seu banco
+#   - O banco (ou a variante do Itaú) sai da 1ª página de cada
+#     PDF (deteccao.py), sem rodar parser nenhum
+#   - Cada grupo roda uma vez no parser certo: nenhum PDF é
+#     lido duas vezes
+#   - Os Excel de cada grupo ganham o nome do banco na frente
+#   - Compatível com:
+#       - Streamlit (função processar_pdf_streamlit)
+#       - PyQt5 (função processar_pdf_custom)
+# ==========================================================
+
+import os
+import shutil
+import tempfile
+
+import bancos
+
+# Nomes listados no log para os PDFs não reconhecidos
+MAX_NOMES_LOG = 10
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🔹 Execução por grupo
+# ══════════════════════════════════════════════════════════════════════════════
+def executar(banco, arquivos, output_dir, progress_cb, log_cb):
+    """
+    Processa os PDFs no parser de cada um
+    ---------------------------------------------------------
+    - banco: bancos.AUTOMATICO ou o banco escolhido (as
+      variantes do Itaú também são separadas)
+    - arquivos: caminhos ou PdfEmMemoria
+    - output_dir: pasta dos Excel
+    - progress_cb / log_cb: como em processar_pdf_streamlit
+    ---------------------------------------------------------
+    Banco sem variantes roda direto, como antes. Retorna
+    [(banco, arquivos)] dos grupos (banco None = não reconhecidos).
+    """
+    banco = bancos.obter(banco)
+    grupos = bancos.rotear(banco, arquivos, bancos.STREAMLIT)
+    if len(grupos) == 1 and grupos[0][0] is not None \
+            and grupos[0][0]["modulo"] == banco["modulo"]:
+        fn = bancos.carregar(banco, bancos.STREAMLIT)
+        fn(grupos[0][1], output_dir, progress_cb, log_cb)
+        return grupos
+
+    total = max(1, sum(len(lote) for _, lote in grupos))
+    feitos = 0
+    for destino, lote in grupos:
+        inicio = 100 * feitos / total
+        fatia = 100 * len(lote) / total
+        feitos += len(lote)
+        if destino is None:
+            nomes = [os.path.basename(a) for a in lote]
+            resto = f" (+{len(nomes) - MAX_NOMES_LOG})" if len(nomes) > MAX_NOMES_LOG else ""
+            log_cb(f"❓ Banco não identificado em {len(lote)} arquivo(s): "
+                   f"{', '.join(nomes[:MAX_NOMES_LOG])}{resto}")
+            progress_cb(inicio + fatia)
+            continue
+
+        log_cb(f"🔀 {len(lote)} arquivo(s) no layout {destino['nome']}")
+        try:
+            _executar_grupo(destino, lote, output_dir,
+                            lambda p, inicio=inicio, fatia=fatia:
+                            progress_cb(inicio + p * fatia / 100), log_cb)
+        except Exception as e:
+            # Erro de um banco não interrompe os demais grupos
+            log_cb(f"❌ Erro ao processar os arquivos {destino['nome']}: {e}")
+    return grupos
+
+
+def _executar_grupo(banco, lote, output_dir, progress_cb, log_cb):
+    # Cada parser grava numa subpasta própria e os Excel sobem com
+    # o nome do banco na frente (dois parsers podem usar o mesmo nome)
+    subpasta = tempfile.mkdtemp(prefix=f".{banco['modulo']}-", dir=output_dir)
+    try:
+        fn = bancos.carregar(banco, bancos.STREAMLIT)
+        fn(lote, subpasta, progress_cb, log_cb)
+        for nome in sorted(os.listdir(subpasta)):
+            if nome.endswith(".xlsx"):
+                os.replace(os.path.join(subpasta, nome),
+                           os.path.join(output_dir, f"{banco['nome']} - {nome}"))
+    finally:
+        shutil.rmtree(subpasta, ignore_errors=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🌐 Modo Web (Streamlit)
+# ══════════════════════════════════════════════════════════════════════════════
+def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
+    """
+    Compatível com Central de Bancos Web (Streamlit)
+    ---------------------------------------------------------
+    PDFs de vários bancos num envio só; os não reconhecidos
+    são listados no log.
+    ---------------------------------------------------------
+    """
+    log_cb(f"Identificando o banco de {len(files)} arquivo(s)...")
+    os.makedirs(output_dir, exist_ok=True)
+    executar(bancos.AUTOMATICO, files, output_dir, progress_cb, log_cb)
+    progress_cb(100)
+    log_cb("✅ Processamento concluído com sucesso! 🚀")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 💻 Modo Desktop (PyQt5)
+# ══════════════════════════════════════════════════════════════════════════════
+def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QApplication
+    from main import LoaderDialog
+
+    while True:
+        arquivos, _ = QFileDialog.getOpenFileNames(
+            janela,
+            "Selecione os extratos PDF (de qualquer banco)",
+            "",
+            "Arquivos PDF (*.pdf)"
+        )
+        if not arquivos:
+            break
+
+        dialog = LoaderDialog(janela, janela.light_theme)
+        dialog.show()
+        QApplication.processEvents()
+
+        log = []
+
+        def progress_cb(p):
+            dialog.atualizar_progresso(int(p))
+            QApplication.processEvents()
+
+        # Os Excel ficam na pasta do primeiro PDF
+        try:
+            processar_pdf_streamlit(arquivos, os.path.dirname(arquivos[0]),
+                                    progress_cb, log.append)
+        except Exception as e:
+            log.append(f"❌ Erro: {e}")
+        dialog.accept()
+
+        janela.mostrar_mensagem(
+            "Resumo", "\n".join(m for m in log if not m.startswith("⏱️")))
+
+        continuar = janela.mostrar_confirmacao(
+            "Concluído",
+            "Todos os arquivos selecionados foram processados.\n\nDeseja selecionar novos arquivos?"
+        )
+        if not continuar:
+            break
@@ -0,0 +1,196 @@
+# ==========================================================
+# Módulo: bancos.py
+# Registro declarativo dos parsers de banco
+#   - Nome, ícone, módulo, motor de PDF e capacidades de cada banco
+#   - Fonte única para o Desktop (main.py) e para a Web (app.py)
+#   - O módulo do banco (e suas dependências pesadas) só é
+#     importado quando o banco é escolhido
+#   - Os módulos dos bancos não importam PyQt5 nem main.py no
+#     topo: esses imports ficam dentro de processar_pdf_custom
+#     (e de quem só roda no Desktop), para a Web importar o
+#     banco sem carregar o Qt
+#   - Cada chamada é medida por etapa (metricas.py)
+# ==========================================================
+
+import os
+import re
+import importlib
+import functools
+
+import metricas
+
+# Capacidades
+DESKTOP = "desktop"      # processar_pdf_custom(janela)
+STREAMLIT = "streamlit"  # processar_pdf_streamlit(arquivos, saida, progress_cb, log_cb)
+OCR = "ocr"              # cai para OCR quando o PDF não tem texto
+
+_AMBOS = (DESKTOP, STREAMLIT)
+
+FUNCOES = {
+    DESKTOP: "processar_pdf_custom",
+    STREAMLIT: "processar_pdf_streamlit",
+}
+
+_PASTA = os.path.dirname(os.path.abspath(__file__))
+
+
+def _banco(nome, icone, modulo, motor, capacidades=_AMBOS):
+    return dict(nome=nome, icone=icone, modulo=modulo, motor=motor,
+                capacidades=tuple(capacidades))
+
+
+# ==========================================================
+# 🔹 Registro
+# ==========================================================
+BANCOS = sorted([
+    _banco("Asaas", "imagens/Asaas1.ico", "Asaas", "fitz"),
+    _banco("Banco do Brasil", "imagens/brasil1.ico", "Brasil", "pdfplumber"),
+    _banco("Nordeste", "imagens/bnb-icon.ico", "BNB", "fitz"),
+    _banco("Bradesco", "imagens/bradesco.ico", "Bradesco", "fitz"),
+    _banco("Btg", "imagens/btg.ico", "Btg", "fitz"),
+    _banco("Caixa", "imagens/caixa.ico", "Caixa", "fitz"),
+    _banco("Daycoval", "imagens/daycoval.ico", "Daycoval", "fitz"),
+    _banco("Inter", "imagens/icon inter3.ico", "Inter", "fitz"),
+    _banco("Itaú", "imagens/itau11.ico", "itau", "PyPDF2"),
+    _banco("Itaú BBA", "imagens/itau25.ico", "Itau2", "fitz"),
+    _banco("Itaú Manix", "imagens/itaumanix1.ico", "itau_MANIX", "fitz"),
+    _banco("Itaú Consolidado", "imagens/ItauConsolidado1.ico",
+           "ItauConsolidado", "pdfplumber"),
+    _banco("Nubank", "imagens/nubank1.ico", "Nubank", "fitz"),
+    _banco("Pagbank", "imagens/pagbank1.ico", "Pagbank", "fitz"),
+    _banco("Safra", "imagens/Safra.ico", "Safra", "pdfplumber"),
+    _banco("Santander", "imagens/santander-br.ico", "Santander", "fitz"),
+    _banco("Sicredi", "imagens/Sicredi.ico", "Sicredi", "fitz"),
+    _banco("Sofisa", "imagens/sofisa1.ico", "Sofisa", "fitz",
+           _AMBOS + (OCR,)),
+    _banco("Stone", "imagens/stone.ico", "Stone", "pdfplumber"),
+    _banco("Xp Investimentos", "imagens/Xp-Investimentos-Logo.ico",
+           "XpInvestimentos", "fitz"),
+], key=lambda b: b["nome"])
+
+# Opção à parte (fora de BANCOS): o banco de cada PDF é
+# identificado pela 1ª página e o lote vai ao parser certo
+AUTOMATICO = _banco("Detectar banco", "imagens/icone_principal.ico",
+                    "automatico", "fitz")
+
+_POR_NOME = {b["nome"]: b for b in BANCOS + [AUTOMATICO]}
+_POR_MODULO = {b["modulo"]: b for b in BANCOS + [AUTOMATICO]}
+
+
+# ==========================================================
+# 🔹 Consultas
+# ==========================================================
+def listar(capacidade=None):
+    """Bancos do registro (opcionalmente só os que têm a capacidade)."""
+    if capacidade is None:
+        return list(BANCOS)
+    return [b for b in BANCOS if capacidade in b["capacidades"]]
+
+
+def obter(chave):
+    """Banco pelo nome de exibição ou pelo nome do módulo."""
+    if isinstance(chave, dict):
+        return chave
+    banco = _POR_NOME.get(chave) or _POR_MODULO.get(chave)
+    if banco is None:
+        raise KeyError(f"Banco não registrado: {chave}")
+    return banco
+
+
+@functools.lru_cache(maxsize=None)
+def _versao_do_fonte(modulo):
+    # Lê VERSAO_PARSER direto do arquivo, sem importar o módulo
+    caminho = os.path.join(_PASTA, f"{modulo}.py")
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            achou = re.search(r'^VERSAO_PARSER\s*=\s*["\']([^"\']+)["\']',
+                              f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return achou.group(1) if achou else None
+
+
+def versao(banco):
+    """VERSAO_PARSER do banco (a mesma usada na chave do cache)."""
+    return _versao_do_fonte(obter(banco)["modulo"])
+
+
+# ==========================================================
+# 🔹 Roteamento pelo layout do PDF
+# ==========================================================
+def rotear(banco, arquivos, capacidade=STREAMLIT):
+    """
+    Separa os PDFs entre os parsers pela 1ª página (deteccao.py)
+    ---------------------------------------------------------
+    - AUTOMATICO: cada PDF vai ao banco reconhecido; os não
+      reconhecidos ficam num grupo com banco None
+    - variantes do Itaú: o PDF vai à variante reconhecida; os
+      não reconhecidos ficam com `banco`
+    - demais bancos: tudo fica com `banco`
+    ---------------------------------------------------------
+    Nenhum parser roda aqui. Retorna [(banco, arquivos)], na
+    ordem em que os bancos aparecem (o escolhido primeiro e os
+    não reconhecidos por último).
+    """
+    import deteccao  # PyMuPDF só é carregado quando há o que detectar
+
+    banco = obter(banco)
+    arquivos = list(arquivos)
+    if banco is AUTOMATICO:
+        assinaturas, padrao = deteccao.ASSINATURAS, None
+    elif banco["modulo"] in deteccao.ITAU:
+        assinaturas, padrao = deteccao.ITAU, banco
+    else:
+        return [(banco, arquivos)]
+
+    grupos = {} if padrao is None else {padrao["modulo"]: []}
+    for arquivo in arquivos:
+        destino = _POR_MODULO.get(deteccao.identificar(arquivo, assinaturas))
+        if destino is None or capacidade not in destino["capacidades"]:
+            destino = padrao
+        grupos.setdefault(destino and destino["modulo"], []).append(arquivo)
+    if None in grupos:
+        grupos[None] = grupos.pop(None)  # não reconhecidos por último
+    return [(_POR_MODULO.get(modulo), lote) for modulo, lote in grupos.items() if lote]
+
+
+# ==========================================================
+# 🔹 Carregamento sob demanda
+# ==========================================================
+def carregar(banco, capacidade=DESKTOP):
+    """
+    Importa o módulo do banco e retorna a função da capacidade
+    ---------------------------------------------------------
+    - banco: dict do registro, nome de exibição ou módulo
+    - capacidade: DESKTOP ou STREAMLIT
+    ---------------------------------------------------------
+    Levanta LookupError se o banco não oferecer a capacidade.
+    A função retornada registra os tempos de cada etapa.
+    """
+    banco = obter(banco)
+    if capacidade not in banco["capacidades"] or capacidade not in FUNCOES:
+        raise LookupError(
+            f"{banco['nome']} não oferece a capacidade '{capacidade}'.")
+
+    modulo = importlib.import_module(banco["modulo"])
+    funcao = getattr(modulo, FUNCOES[capacidade], None)
+    if not callable(funcao):
+        raise LookupError(
+            f"O módulo {banco['modulo']} não possui {FUNCOES[capacidade]}.")
+    return _medida(banco, capacidade, funcao)
+
+
+def _medida(banco, capacidade, funcao):
+    # Toda chamada vira uma execução medida (metricas.py); na Web
+    # o resumo dos tempos também vai para o log_cb. O Desktop
+    # alterna processamento e diálogos (arquivos, avisos,
+    # "continuar?"): lá só o tempo medido conta como parede
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        log_cb = kwargs.get("log_cb")
+        if log_cb is None and capacidade == STREAMLIT and len(args) > 3:
+            log_cb = args[3]
+        with metricas.execucao(banco["nome"], capacidade, log_cb,
+                               so_medido=capacidade == DESKTOP):
+            return funcao(*args, **kwargs)
+    return medida
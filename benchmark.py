@@ -0,0 +1,294 @@
+# ==========================================================
+# Módulo: benchmark.py
+# Medição de desempenho dos parsers com extratos sintéticos
+#   - Um PDF por banco e tamanho (pdf_sintetico.py)
+#   - Páginas/s, linhas/s, CPU, pico de memória e tempo do Excel
+#   - Cada medição roda num processo novo (memória isolada)
+#   - Resultado em JSON, comparável com uma execução anterior
+#
+# Uso:
+#   python benchmark.py
+#   python benchmark.py --bancos Santander Bradesco --paginas 1 10 100
+#   python benchmark.py --saida atual.json --comparar base.json
+# ==========================================================
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import bancos
+
+PAGINAS_PADRAO = [1, 10, 100, 1000]
+TOLERANCIA = 0.10  # piora acima de 10% conta como regressão
+
+
+# ==========================================================
+# 🔹 Casos: função de extração e gravação do Excel de cada banco
+# (mesmas chamadas do fluxo Desktop: dados -> salvar)
+# ==========================================================
+CASOS = {
+    "Asaas": ("extrair_lancamentos_arquivo",
+              lambda m, dados, pdf, xlsx: m.salvar_em_excel(pdf, dados)),
+    "BNB": ("extrair_lancamentos_arquivo",
+            lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "Bradesco": ("extrair_lancamentos",
+                 lambda m, dados, pdf, xlsx: m.salvar_excel(dados, pdf)),
+    "Brasil": ("extrair_dados_pdf",
+               lambda m, dados, pdf, xlsx: m.salvar_para_excel(dados, pdf)),
+    "Btg": ("extrair_lancamentos_pdf",
+            lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "Caixa": ("extrair_lancamentos",
+              lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+    "Daycoval": ("extrair_lancamentos",
+                 lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados.tabela(), xlsx)),
+    "Inter": ("extrair_lancamentos_por_posicao",
+              lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+    "Itau2": ("extrair_lancamentos_pdf",
+              lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+    "ItauConsolidado": ("extrair_lancamentos",
+                        lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "Nubank": ("extrair_dados_pdf",
+               lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "Pagbank": ("extrair_lancamentos",
+                lambda m, dados, pdf, xlsx: m.salvar_em_excel_com_formatacao(dados, pdf)),
+    "Safra": ("extrair_lancamentos_safra",
+              lambda m, dados, pdf, xlsx: m.salvar_excel(dados, pdf)),
+    "Santander": ("extrair_lancamentos_pdf",
+                  lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+    "Sicredi": ("extrair_lancamentos",
+                lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados.tabela(), xlsx)),
+    "Sofisa": ("extrair_lancamentos_arquivo",
+               lambda m, dados, pdf, xlsx: m.salvar_em_excel(m.montar_tabela(dados), xlsx)),
+    "Stone": ("extrair_dados_pdf",
+              lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "XpInvestimentos": ("extrair_lancamentos",
+                        lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, pdf)),
+    "itau": ("extrair_lancamentos_pdf",
+             lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+    "itau_MANIX": ("extrair_lancamentos_itau",
+                   lambda m, dados, pdf, xlsx: m.salvar_em_excel(dados, xlsx)),
+}
+
+
+# ==========================================================
+# 🔹 Memória
+# ==========================================================
+def pico_rss_mb():
+    """Pico de memória residente deste processo em MB (None se indisponível)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return pico / divisor
+
+
+# ==========================================================
+# 🔹 Medição (executada num processo novo)
+# ==========================================================
+def _medir(modulo, caminho_pdf, pasta):
+    import cache_extracao
+    import metricas
+    cache_extracao.LIMITE_MB = 0  # mede a extração, não o cache
+
+    # Alguns bancos gravam o Excel ao lado do PDF e arquivos
+    # auxiliares na pasta atual: tudo fica na pasta temporária
+    os.chdir(pasta)
+    caminho_pdf = shutil.copy(caminho_pdf, pasta)
+    nome_funcao, salvar = CASOS[modulo]
+
+    inicio = time.perf_counter()
+    mod = importlib.import_module(modulo)
+    importacao = time.perf_counter() - inicio
+
+    with metricas.coletar() as medicao:
+        inicio, cpu = time.perf_counter(), time.process_time()
+        dados = getattr(mod, nome_funcao)(caminho_pdf)
+        extracao = time.perf_counter() - inicio
+        cpu = time.process_time() - cpu
+
+        xlsx = os.path.join(pasta, f"{modulo}.xlsx")
+        inicio = time.perf_counter()
+        salvar(mod, dados, caminho_pdf, xlsx)
+        tempo_xlsx = time.perf_counter() - inicio
+
+    # Tempo de parede por etapa (abrir, texto, parse, tabela, excel)
+    etapas = {}
+    for m in [medicao] + medicao["arquivos"]:
+        for nome, medida in m["etapas"].items():
+            etapas[nome] = etapas.get(nome, 0.0) + medida["parede"]
+
+    return dict(linhas=len(dados), importacao_s=importacao,
+                extracao_s=extracao, cpu_s=cpu, xlsx_s=tempo_xlsx,
+                etapas_s=etapas, pico_rss_mb=pico_rss_mb())
+
+
+def caminho_pdf_sintetico(pasta, modulo, paginas, semente=0):
+    """Gera (uma vez) o PDF sintético e retorna (caminho, lançamentos)."""
+    import pdf_sintetico
+
+    nome = f"{modulo}_{paginas}p_s{semente}_v{pdf_sintetico.VERSAO}"
+    caminho = os.path.join(pasta, nome + ".pdf")
+    contagem = os.path.join(pasta, nome + ".json")
+    if os.path.exists(caminho) and os.path.exists(contagem):
+        with open(contagem, encoding="utf-8") as f:
+            return caminho, json.load(f)["lancamentos"]
+
+    _, lancamentos = pdf_sintetico.gerar_pdf(modulo, paginas, caminho, semente)
+    with open(contagem, "w", encoding="utf-8") as f:
+        json.dump({"lancamentos": lancamentos}, f)
+    return caminho, lancamentos
+
+
+def medir(modulo, paginas, pasta_pdfs, repeticoes=1):
+    """
+    Mede um banco com um extrato de `paginas` páginas
+    ---------------------------------------------------------
+    - repeticoes: mantém a execução mais rápida (menos ruído)
+    ---------------------------------------------------------
+    Retorna o dict do resultado (com "erro" se falhar).
+    """
+    banco = bancos.obter(modulo)
+    resultado = dict(banco=banco["nome"], modulo=modulo, paginas=paginas,
+                     versao_parser=bancos.versao(banco), erro=None)
+    try:
+        caminho, gerados = caminho_pdf_sintetico(pasta_pdfs, modulo, paginas)
+    except Exception as e:
+        resultado["erro"] = f"PDF sintético: {e}"
+        return resultado
+    resultado["lancamentos_gerados"] = gerados
+
+    # spawn: processo limpo, sem herdar módulos nem memória do pai
+    ctx = multiprocessing.get_context("spawn")
+    melhor = None
+    for _ in range(max(1, repeticoes)):
+        with tempfile.TemporaryDirectory(prefix="bench-") as pasta:
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    medida = pool.submit(_medir, modulo, caminho, pasta).result()
+            except Exception as e:
+                resultado["erro"] = f"{type(e).__name__}: {e}"
+                return resultado
+        if melhor is None or medida["extracao_s"] < melhor["extracao_s"]:
+            melhor = medida
+
+    resultado.update(melhor)
+    resultado["paginas_por_s"] = paginas / melhor["extracao_s"] if melhor["extracao_s"] else None
+    resultado["linhas_por_s"] = melhor["linhas"] / melhor["extracao_s"] if melhor["extracao_s"] else None
+    return resultado
+
+
+# ==========================================================
+# 🔹 Comparação com uma execução anterior
+# ==========================================================
+def comparar(atual, base, tolerancia=TOLERANCIA):
+    """
+    Casos (banco + páginas) que pioraram além da tolerância
+    ---------------------------------------------------------
+    - páginas/s caiu ou tempo do Excel subiu mais que `tolerancia`
+    - lançamentos extraídos diferentes também contam
+    ---------------------------------------------------------
+    Retorna lista de (banco, páginas, métrica, antes, depois).
+    """
+    anteriores = {(r["modulo"], r["paginas"]): r for r in base["resultados"]}
+    piores = []
+    for r in atual["resultados"]:
+        antes = anteriores.get((r["modulo"], r["paginas"]))
+        if not antes or r["erro"] or antes["erro"]:
+            continue
+        if antes["paginas_por_s"] and r["paginas_por_s"] < antes["paginas_por_s"] * (1 - tolerancia):
+            piores.append((r["banco"], r["paginas"], "páginas/s",
+                           antes["paginas_por_s"], r["paginas_por_s"]))
+        if antes["xlsx_s"] and r["xlsx_s"] > antes["xlsx_s"] * (1 + tolerancia):
+            piores.append((r["banco"], r["paginas"], "Excel (s)",
+                           antes["xlsx_s"], r["xlsx_s"]))
+        if r["linhas"] != antes["linhas"]:
+            piores.append((r["banco"], r["paginas"], "linhas",
+                           antes["linhas"], r["linhas"]))
+    return piores
+
+
+# ==========================================================
+# 🔹 Execução
+# ==========================================================
+def executar(modulos, paginas, pasta_pdfs, repeticoes=1, log=print):
+    resultados = []
+    for modulo in modulos:
+        for n in paginas:
+            log(f"⏱️ {modulo} — {n} página(s)...")
+            r = medir(modulo, n, pasta_pdfs, repeticoes)
+            resultados.append(r)
+            if r["erro"]:
+                log(f"   ❌ {r['erro']}")
+            else:
+                log(f"   {r['paginas_por_s']:.1f} pág/s · {r['linhas_por_s']:.0f} linhas/s · "
+                    f"Excel {r['xlsx_s']:.2f}s · {r['linhas']}/{r['lancamentos_gerados']} linhas"
+                    + (f" · pico {r['pico_rss_mb']:.0f} MB" if r["pico_rss_mb"] else ""))
+
+    return dict(
+        gerado_em=datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        plataforma=platform.platform(),
+        cpus=os.cpu_count(),
+        repeticoes=repeticoes,
+        resultados=resultados,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark dos parsers com extratos sintéticos.")
+    parser.add_argument("--bancos", nargs="+", metavar="MODULO",
+                        help="módulos a medir (padrão: todos do registro)")
+    parser.add_argument("--paginas", nargs="+", type=int, default=PAGINAS_PADRAO)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--pdfs", default=os.path.join(
+        tempfile.gettempdir(), "central-bancos-bench"),
+        help="pasta dos PDFs sintéticos (reaproveitados entre execuções)")
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--comparar", metavar="JSON",
+                        help="resultado anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args(argv)
+
+    modulos = args.bancos or [b["modulo"] for b in bancos.listar()]
+    desconhecidos = [m for m in modulos if m not in CASOS]
+    if desconhecidos:
+        parser.error(f"bancos sem caso de benchmark: {', '.join(desconhecidos)}")
+
+    os.makedirs(args.pdfs, exist_ok=True)
+    relatorio = executar(modulos, args.paginas, args.pdfs, args.repeticoes)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        piores = comparar(relatorio, base, args.tolerancia)
+        for banco, paginas, metrica, antes, depois in piores:
+            print(f"⚠️ {banco} ({paginas} pág.): {metrica} {antes:.2f} → {depois:.2f}")
+        if piores:
+            return 1
+        print("✅ Nenhuma regressão em relação à base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# ==========================================================
+# Módulo: cache_extracao.py
+# Cache em disco dos lançamentos extraídos
+#   - Chave: SHA-256 do PDF + função do banco + versão do parser
+#     + código dos módulos compartilhados pelos parsers
+#   - Expulsão LRU quando o diretório passa do limite (o tamanho
+#     é estimado a cada gravação; a pasta só é varrida quando a
+#     estimativa estoura ou a cada EXPULSAR_A_CADA gravações)
+#   - Usado pelo Streamlit e pelo Desktop (via @memorizar)
+#   - @memorizar também abre a medição do arquivo (metricas.py)
+# ==========================================================
+
+import os
+import pickle
+import hashlib
+import functools
+import tempfile
+import threading
+
+import metricas
+import progresso
+from texto_pdf import PdfEmMemoria
+
+CACHE_DIR = os.environ.get(
+    "CENTRAL_BANCOS_CACHE",
+    os.path.join(os.path.expanduser("~"), ".central-bancos", "cache"))
+
+# Limite total do cache em MB (0 desliga o cache)
+try:
+    LIMITE_MB = float(os.environ.get("CENTRAL_BANCOS_CACHE_MB", "256"))
+except ValueError:
+    LIMITE_MB = 256.0
+
+# Código usado pela extração de todos os bancos: entra na chave
+MODULOS_COMPARTILHADOS = ("lexico", "filtro", "normalizacao", "texto_pdf",
+                          "lancamentos", "ocr")
+
+_PASTA = os.path.dirname(os.path.abspath(__file__))
+
+# Gravações entre duas varreduras da pasta (outros processos também
+# gravam nela: a estimativa local não vê o que eles gravaram)
+EXPULSAR_A_CADA = 200
+
+# Estimativa por pasta: {pasta: [bytes, gravações desde a varredura]}
+_ocupacao = {}
+_trava = threading.Lock()
+
+
+# ==========================================================
+# 🔹 Chaves
+# ==========================================================
+def hash_pdf(caminho_pdf):
+    """SHA-256 do conteúdo do PDF (lido em blocos de 1 MB)."""
+    if isinstance(caminho_pdf, PdfEmMemoria):
+        return hashlib.sha256(caminho_pdf.conteudo).hexdigest()
+    h = hashlib.sha256()
+    with open(caminho_pdf, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def versao_compartilhada():
+    """
+    SHA-256 do código de MODULOS_COMPARTILHADOS
+    ---------------------------------------------------------
+    Mudou o léxico, a normalização, a leitura do PDF...: as
+    entradas antigas de todos os bancos deixam de valer, sem
+    depender de alguém subir cada VERSAO_PARSER à mão.
+    """
+    h = hashlib.sha256()
+    for nome in MODULOS_COMPARTILHADOS:
+        h.update(nome.encode("utf-8"))
+        try:
+            with open(os.path.join(_PASTA, f"{nome}.py"), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"?")
+    return h.hexdigest()[:16]
+
+
+def montar_chave(funcao, versao, caminho_pdf, *args):
+    nome = f"{funcao.__module__}.{funcao.__qualname__}"
+    base = (f"{nome}|{versao}|{versao_compartilhada()}|"
+            f"{hash_pdf(caminho_pdf)}|{args!r}")
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def _arquivo(chave, pasta=None):
+    return os.path.join(pasta or CACHE_DIR, chave[:2], f"{chave}.pkl")
+
+
+# ==========================================================
+# 🔹 Leitura / gravação
+# ==========================================================
+def obter(chave, pasta=None):
+    """Retorna (True, valor) se a chave existir; (False, None) caso contrário."""
+    caminho = _arquivo(chave, pasta)
+    try:
+        with open(caminho, "rb") as f:
+            valor = pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception:
+        # Entrada corrompida/incompatível: descarta e reprocessa
+        _remover(caminho)
+        return False, None
+    try:
+        os.utime(caminho)  # marca como usado recentemente (LRU)
+    except OSError:
+        pass
+    return True, valor
+
+
+def gravar(chave, valor, pasta=None, limite_mb=None):
+    caminho = _arquivo(chave, pasta)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    fd, temporario = tempfile.mkstemp(
+        dir=os.path.dirname(caminho), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tamanho = f.tell()
+        os.replace(temporario, caminho)
+    except Exception:
+        _remover(temporario)
+        raise
+    _contar(pasta, limite_mb, tamanho)
+
+
+def _contar(pasta, limite_mb, tamanho):
+    # Soma a gravação à estimativa; só varre a pasta (expulsar) na
+    # primeira gravação, quando passar do limite ou a cada
+    # EXPULSAR_A_CADA gravações
+    pasta = pasta or CACHE_DIR
+    limite = (LIMITE_MB if limite_mb is None else limite_mb) * 1024 * 1024
+    with _trava:
+        atual = _ocupacao.get(pasta)
+        if atual is not None:
+            atual[0] += tamanho
+            atual[1] += 1
+            if atual[0] <= limite and atual[1] < EXPULSAR_A_CADA:
+                return
+    total = expulsar(pasta, limite_mb)
+    with _trava:
+        _ocupacao[pasta] = [total, 0]
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def expulsar(pasta=None, limite_mb=None):
+    """
+    Remove as entradas menos usadas até o cache caber no limite
+    (deixa 10% de folga para não rodar a cada gravação).
+    Gravações em andamento (*.tmp) não contam nem são apagadas.
+    Retorna o tamanho do cache em bytes depois da expulsão.
+    """
+    pasta = pasta or CACHE_DIR
+    limite = (LIMITE_MB if limite_mb is None else limite_mb) * 1024 * 1024
+    entradas = []
+    total = 0
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            if nome.endswith(".tmp"):
+                continue
+            caminho = os.path.join(raiz, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, caminho))
+            total += st.st_size
+
+    if total <= limite:
+        return total
+    alvo = limite * 0.9
+    for _, tamanho, caminho in sorted(entradas):
+        _remover(caminho)
+        total -= tamanho
+        if total <= alvo:
+            break
+    return total
+
+
+# ==========================================================
+# 🔹 Decorador para as funções de extração dos bancos
+# ==========================================================
+def memorizar(versao):
+    """
+    Memoriza `funcao(caminho_pdf, *args)` pelo conteúdo do PDF.
+    Altere `versao` (VERSAO_PARSER do banco) ao mudar o parser.
+    """
+    def decorador(funcao):
+        def consultar(caminho_pdf, *args):
+            if LIMITE_MB <= 0:
+                return False, funcao(caminho_pdf, *args)
+
+            try:
+                chave = montar_chave(funcao, versao, caminho_pdf, *args)
+                achou, valor = obter(chave)
+            except OSError:
+                chave, achou = None, False
+            if achou:
+                progresso.reportar(1.0)
+                return True, valor
+
+            valor = funcao(caminho_pdf, *args)
+            if chave is not None:
+                try:
+                    gravar(chave, valor)
+                except Exception:
+                    pass  # cache é opcional: nunca derruba a extração
+            return False, valor
+
+        @functools.wraps(funcao)
+        def envolvida(caminho_pdf, *args):
+            # Cada extração também é medida (metricas.py)
+            with metricas.arquivo(caminho_pdf) as medicao:
+                medicao["cache"], valor = consultar(caminho_pdf, *args)
+                medicao["linhas"] = len(valor) if hasattr(valor, "__len__") else None
+            return valor
+        return envolvida
+    return decorador
@@ -0,0 +1,256 @@
+# ==========================================================
+# Módulo: deteccao.py
+# Identificação do layout do extrato pela primeira página
+#   - Só a 1ª página é lida (PyMuPDF, blocos): milissegundos
+#     por PDF, sem rodar parser nenhum
+#   - Impressão digital: textos do cabeçalho, títulos de coluna
+#     e a geometria dos lançamentos (data sozinha na linha,
+#     data e valor na mesma linha, data curta...)
+#   - Cada layout tem uma assinatura; vence a de maior pontuação
+#     (empate ou nenhuma = não identificado)
+#   - Índice com as assinaturas de todos os bancos (ASSINATURAS),
+#     compilado uma vez na importação: identifica o banco de
+#     cada PDF de um upload misturado
+# ==========================================================
+
+from texto_pdf import abrir_pdf
+from filtro import Filtro
+from lexico import Linha, DATA, VALOR, DATA_CURTA
+
+# Pesos de cada parte da assinatura
+PESO_CABECALHO = 3
+PESO_COLUNAS = 2
+PESO_GEOMETRIA = 2
+
+# Lançamentos com a mesma forma para a geometria valer
+MIN_LANCAMENTOS = 3
+
+# Pontuação mínima: nem o cabeçalho nem a geometria sozinhos
+# identificam o layout (o nome do banco pode aparecer numa página
+# de outro); títulos de coluna ou geometria confirmam o cabeçalho
+MIN_PONTOS = PESO_CABECALHO + 1
+
+# Cabeçalho e rodapé: primeiras e últimas linhas da página (o
+# nome de outro banco num histórico não conta como cabeçalho)
+LINHAS_CABECALHO = 20
+LINHAS_RODAPE = 5
+
+
+# ==========================================================
+# 🔹 Impressão digital da 1ª página
+# ==========================================================
+class Impressao:
+    """
+    Resumo da 1ª página usado nas assinaturas
+    ---------------------------------------------------------
+    - texto: linhas dos blocos de texto, sem espaços nas pontas
+    - bordas: só as linhas do cabeçalho e do rodapé
+    - data_sozinha / valor_sozinho: linhas só com a data/valor
+    - data_e_valor: linhas que abrem com dd/mm/aaaa e têm valor
+    - data_curta_e_valor: idem com dd/mm
+    ---------------------------------------------------------
+    """
+
+    __slots__ = ("texto", "bordas", "data_sozinha", "valor_sozinho",
+                 "data_e_valor", "data_curta_e_valor")
+
+    def __init__(self, linhas):
+        self.texto = "\n".join(linhas)
+        if len(linhas) > LINHAS_CABECALHO + LINHAS_RODAPE:
+            linhas_bordas = linhas[:LINHAS_CABECALHO] + linhas[-LINHAS_RODAPE:]
+        else:
+            linhas_bordas = linhas
+        self.bordas = "\n".join(linhas_bordas)
+        self.data_sozinha = self.valor_sozinho = 0
+        self.data_e_valor = self.data_curta_e_valor = 0
+        for texto in linhas:
+            linha = Linha(texto)
+            if linha.so(DATA):
+                self.data_sozinha += 1
+            elif linha.so(VALOR):
+                self.valor_sozinho += 1
+            elif linha.primeiro(VALOR):
+                if linha.comeca(DATA):
+                    self.data_e_valor += 1
+                elif linha.comeca(DATA_CURTA):
+                    self.data_curta_e_valor += 1
+
+    def __repr__(self):
+        return (f"Impressao({self.texto.count(chr(10)) + 1} linhas, "
+                f"data_sozinha={self.data_sozinha}, valor_sozinho={self.valor_sozinho}, "
+                f"data_e_valor={self.data_e_valor}, "
+                f"data_curta_e_valor={self.data_curta_e_valor})")
+
+
+def impressao(fonte):
+    """Impressão digital da 1ª página (caminho ou PdfEmMemoria); None se não abrir."""
+    try:
+        doc = abrir_pdf(fonte)
+    except Exception:
+        return None
+    with doc:
+        if not len(doc):
+            return None
+        blocos = doc[0].get_text("blocks")
+    linhas = [linha.strip() for bloco in blocos
+              for linha in bloco[4].splitlines() if linha.strip()]
+    return Impressao(linhas)
+
+
+# ==========================================================
+# 🔹 Assinaturas
+# ==========================================================
+class Assinatura:
+    """
+    Como reconhecer um layout
+    ---------------------------------------------------------
+    - cabecalho: trechos do cabeçalho/rodapé (Filtro)
+    - colunas: títulos de coluna, em qualquer linha (Filtro)
+    - geometria: função(Impressao) → bool
+    ---------------------------------------------------------
+    pontos(impressao) soma o peso de cada parte encontrada.
+    Os filtros rodam no texto da página inteiro (linhas
+    separadas por "\n"): "^" de linha é escrito (?m:^...).
+    """
+
+    __slots__ = ("cabecalho", "colunas", "geometria")
+
+    def __init__(self, cabecalho=None, colunas=None, geometria=None):
+        self.cabecalho = cabecalho
+        self.colunas = colunas
+        self.geometria = geometria
+
+    def pontos(self, impressao):
+        pontos = 0
+        if self.cabecalho is not None and self.cabecalho.acha(impressao.bordas):
+            pontos += PESO_CABECALHO
+        if self.colunas is not None and self.colunas.acha(impressao.texto):
+            pontos += PESO_COLUNAS
+        if self.geometria is not None and self.geometria(impressao):
+            pontos += PESO_GEOMETRIA
+        return pontos
+
+
+def _data_e_valor_na_linha(imp):
+    return imp.data_e_valor >= MIN_LANCAMENTOS
+
+
+def _data_em_linha_propria(imp):
+    return imp.data_sozinha >= MIN_LANCAMENTOS
+
+
+def _data_e_valor_em_linhas_proprias(imp):
+    return min(imp.data_sozinha, imp.valor_sozinho) >= MIN_LANCAMENTOS
+
+
+def _data_curta_e_valor_na_linha(imp):
+    return imp.data_curta_e_valor >= MIN_LANCAMENTOS
+
+
+# Variantes do Itaú, pelo módulo do parser
+ITAU = {
+    # PyPDF2: data, histórico, valor e saldo na mesma linha
+    "itau": Assinatura(
+        cabecalho=Filtro(["itaú empresas"]),
+        # "." não passa de linha: os três títulos na mesma linha
+        colunas=Filtro(["lançamentos período"], padroes=[r"data\b.*lançamentos.*valor"]),
+        geometria=_data_e_valor_na_linha),
+    # Blocos: data, histórico e valor em linhas separadas
+    "Itau2": Assinatura(
+        cabecalho=Filtro(["itaú bba"]),
+        geometria=_data_e_valor_em_linhas_proprias),
+    # Relatório do financeiro (Manix): mesma geometria do Itaú BBA
+    "itau_MANIX": Assinatura(
+        cabecalho=Filtro(["financeiro extrato de contas"],
+                         padroes=[r"(?m:^manix\b)", r"(?m:^hora:\s*\d)",
+                                  r"(?m:^pág\.\s*\d)"]),
+        geometria=_data_e_valor_em_linhas_proprias),
+    # pdfplumber: dd/mm, histórico e valor com "-" no fim
+    "ItauConsolidado": Assinatura(
+        cabecalho=Filtro(["período de visualização", "conta corrente | movimentação",
+                          "(créditos) (débitos)"]),
+        colunas=Filtro(["data descrição entradas r$ saídas r$ saldo"]),
+        geometria=_data_curta_e_valor_na_linha),
+}
+
+
+# Índice de todos os bancos, pelo módulo do parser (bancos.py)
+ASSINATURAS = {
+    **ITAU,
+    # Data numa linha, histórico e "R$ valor" nas seguintes
+    "Asaas": Assinatura(cabecalho=Filtro(["asaas"]),
+                        geometria=_data_em_linha_propria),
+    # Documento e valor com o sinal no fim: "12345 1.234,56-"
+    "BNB": Assinatura(cabecalho=Filtro(["banco do nordeste"]),
+                      colunas=Filtro(padroes=[r"\d{4,5}\s+[\d.]+,\d{2}[+-]"])),
+    "Bradesco": Assinatura(
+        cabecalho=Filtro(["bradesco", "net empresa"]),
+        colunas=Filtro(padroes=[r"extrato mensal\s*/\s*por período"])),
+    "Brasil": Assinatura(cabecalho=Filtro(["banco do brasil"]),
+                         colunas=Filtro(["dt. balancete"])),
+    "Btg": Assinatura(cabecalho=Filtro(["btg pactual"]),
+                      colunas=Filtro(["descrição do lançamento", "entradas / saídas (r$)"])),
+    "Caixa": Assinatura(cabecalho=Filtro(["caixa econômica", "caixa economica"]),
+                        colunas=Filtro(["data mov."])),
+    "Daycoval": Assinatura(cabecalho=Filtro(["daycoval"]),
+                           geometria=_data_curta_e_valor_na_linha),
+    # Dias por extenso com o saldo do dia
+    "Inter": Assinatura(cabecalho=Filtro(["banco inter"]),
+                        colunas=Filtro(["saldo do dia"],
+                                       padroes=[r"\d{1,2} de [^\W\d_]+ de \d{4}"])),
+    "Nubank": Assinatura(cabecalho=Filtro(["nu pagamentos", "nubank"]),
+                         colunas=Filtro(["valores em r$"])),
+    "Pagbank": Assinatura(cabecalho=Filtro(["pagbank", "pagseguro"]),
+                          geometria=_data_em_linha_propria),
+    "Safra": Assinatura(cabecalho=Filtro(["banco safra"]),
+                        colunas=Filtro(["data lançamento complemento",
+                                        "lançamentos realizados"])),
+    "Santander": Assinatura(cabecalho=Filtro(["santander", "ibpj",
+                                              "conta corrente > extrato"]),
+                            geometria=_data_e_valor_em_linhas_proprias),
+    "Sicredi": Assinatura(cabecalho=Filtro(["sicredi"]),
+                          geometria=_data_e_valor_em_linhas_proprias),
+    "Sofisa": Assinatura(cabecalho=Filtro(["sofisa"]),
+                         colunas=Filtro(["entradas/saídas"])),
+    "Stone": Assinatura(cabecalho=Filtro(["stone instituição de pagamento",
+                                          "meajuda@stone.com.br"]),
+                        colunas=Filtro(["contraparte"])),
+    # Valor e saldo em reais lado a lado: "R$ 1.234,56 R$ 9.876,54"
+    "XpInvestimentos": Assinatura(cabecalho=Filtro(["xp investimentos"]),
+                                  colunas=Filtro(padroes=[r"r\$\s*-?[\d.]+,\d{2}\s+-?r\$"])),
+}
+
+
+# ==========================================================
+# 🔹 Identificação
+# ==========================================================
+def identificar(fonte, assinaturas):
+    """
+    Módulo cuja assinatura melhor descreve a 1ª página
+    ---------------------------------------------------------
+    - fonte: caminho do PDF ou PdfEmMemoria
+    - assinaturas: {módulo: Assinatura} (ITAU ou ASSINATURAS)
+    ---------------------------------------------------------
+    Retorna o nome do módulo, ou None se o PDF não abrir,
+    nada chegar a MIN_PONTOS ou houver empate.
+    """
+    imp = impressao(fonte)
+    if imp is None:
+        return None
+    pontos = sorted(((a.pontos(imp), modulo) for modulo, a in assinaturas.items()),
+                    reverse=True)
+    if not pontos or pontos[0][0] < MIN_PONTOS:
+        return None
+    if len(pontos) > 1 and pontos[1][0] == pontos[0][0]:
+        return None
+    return pontos[0][1]
+
+
+def variante_itau(fonte):
+    """Parser do Itaú (itau, Itau2, itau_MANIX ou ItauConsolidado) do PDF, ou None."""
+    return identificar(fonte, ITAU)
+
+
+def banco_do_pdf(fonte):
+    """Módulo do parser (bancos.py) do PDF, entre todos os bancos; ou None."""
+    return identificar(fonte, ASSINATURAS)
@@ -0,0 +1,89 @@
+# ==========================================================
+# Módulo: estilos.py
+# Estilos nomeados (NamedStyle) compartilhados pelos bancos
+#   - Cabeçalho, texto, moeda e valores azul/vermelho
+#   - Fontes, bordas e alinhamentos criados uma única vez
+#   - As células recebem só o nome do estilo
+#   - Variações (outra cor, outro formato) derivadas sob demanda
+# ==========================================================
+
+from openpyxl.styles import NamedStyle, Font, Alignment, PatternFill, Border, Side
+
+AZUL = "0000FF"
+VERMELHO = "FF0000"
+
+FORMATO_MOEDA = "#,##0.00"
+FORMATO_DATA = "DD/MM/YYYY"
+
+_borda = Border(left=Side(style='thin'), right=Side(style='thin'),
+                top=Side(style='thin'), bottom=Side(style='thin'))
+_esquerda = Alignment(horizontal="left")
+_centro = Alignment(horizontal="center")
+_direita = Alignment(horizontal="right")
+
+
+# ==========================================================
+# 🔹 Registro de estilos
+# ==========================================================
+CABECALHO = "cabecalho"
+TEXTO = "texto"
+TEXTO_CENTRO = "texto_centro"
+MOEDA = "moeda"
+VALOR_POSITIVO = "valor_positivo"
+VALOR_NEGATIVO = "valor_negativo"
+
+# Partes de cada estilo; cada workbook recebe o seu NamedStyle
+# (o openpyxl vincula o NamedStyle ao workbook que o registra)
+ESTILOS = {
+    CABECALHO: dict(font=Font(bold=True, color="FFFFFF"),
+                    fill=PatternFill("solid", fgColor="1F4E78"),
+                    border=_borda, alignment=_centro),
+    TEXTO: dict(border=_borda, alignment=_esquerda),
+    TEXTO_CENTRO: dict(border=_borda, alignment=_centro),
+    MOEDA: dict(number_format=FORMATO_MOEDA, border=_borda,
+                alignment=_direita),
+    VALOR_POSITIVO: dict(font=Font(color=AZUL), number_format=FORMATO_MOEDA,
+                         border=_borda, alignment=_direita),
+    VALOR_NEGATIVO: dict(font=Font(color=VERMELHO),
+                         number_format=FORMATO_MOEDA, border=_borda,
+                         alignment=_direita),
+}
+
+
+def derivar(base, cor=None, formato=None):
+    """
+    Nome de uma variação de `base` com outra cor de fonte e/ou
+    outro formato numérico (registrada na primeira vez).
+    """
+    if not cor and not formato:
+        return base
+    nome = "|".join(p for p in (base, cor, formato) if p)
+    if nome not in ESTILOS:
+        partes = dict(ESTILOS[base])
+        if cor:
+            partes["font"] = Font(color=cor)
+        if formato:
+            partes["number_format"] = formato
+        ESTILOS[nome] = partes
+    return nome
+
+
+def estilo_valor(cor):
+    """Estilo da célula de valor para a cor pedida (None = sem cor)."""
+    if cor == AZUL:
+        return VALOR_POSITIVO
+    if cor == VERMELHO:
+        return VALOR_NEGATIVO
+    return derivar(MOEDA, cor=cor)
+
+
+# ==========================================================
+# 🔹 Workbook
+# ==========================================================
+def registrar(wb, *nomes):
+    """Adiciona ao workbook (uma vez) os estilos citados."""
+    existentes = set(wb.named_styles)
+    for nome in nomes:
+        if nome not in existentes:
+            wb.add_named_style(NamedStyle(name=nome, **ESTILOS[nome]))
+            existentes.add(nome)
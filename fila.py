@@ -0,0 +1,478 @@
+# ==========================================================
+# Módulo: fila.py
+# Fila local de processamentos da versão Web
+#   - O upload vira um job e a página volta na hora
+#   - Cada job roda num processo próprio (limite de simultâneos)
+#   - Estado, log e Excel ficam em disco, recuperáveis pelo ID
+#   - Os PDFs enviados não passam pelo disco: seguem em memória
+#     até o processo do job (texto_pdf.PdfEmMemoria)
+#   - Cotas de disco (por usuário e total) e faxina em segundo
+#     plano dos jobs vencidos
+#   - Downloads lidos do disco pelo ID do job (Excel ou ZIP)
+# ==========================================================
+
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import shutil
+import tempfile
+import zipfile
+import threading
+import multiprocessing
+from datetime import datetime
+
+import bancos
+import automatico
+from texto_pdf import PdfEmMemoria
+
+JOBS_DIR = os.environ.get(
+    "CENTRAL_BANCOS_JOBS",
+    os.path.join(os.path.expanduser("~"), ".central-bancos", "jobs"))
+
+
+def _numero_env(nome, padrao):
+    try:
+        return float(os.environ.get(nome, padrao))
+    except ValueError:
+        return float(padrao)
+
+
+# Jobs processados ao mesmo tempo (cada um já usa vários núcleos)
+SIMULTANEOS = max(1, int(_numero_env("CENTRAL_BANCOS_JOBS_SIMULTANEOS", 2)))
+
+# Jobs finalizados são apagados depois deste tempo sem mudanças
+VALIDADE_HORAS = _numero_env("CENTRAL_BANCOS_JOBS_HORAS", 24)
+
+# Cotas de disco em MB (0 desliga a cota)
+COTA_TOTAL_MB = _numero_env("CENTRAL_BANCOS_JOBS_MB", 2048)
+COTA_USUARIO_MB = _numero_env("CENTRAL_BANCOS_JOBS_MB_USUARIO", 256)
+
+INTERVALO_FAXINA = 600  # segundos entre as passadas do faxineiro
+
+LINHAS_LOG = 200
+
+# Situações de um job
+NA_FILA = "na fila"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluído"
+ERRO = "erro"
+FINAIS = (CONCLUIDO, ERRO)
+
+_ID_VALIDO = re.compile(r"^[0-9a-f]{32}$")
+
+
+class CotaExcedida(RuntimeError):
+    """Sem espaço para um novo job (cota do usuário ou total)."""
+
+
+# ==========================================================
+# 🔹 Pastas e estado em disco
+# ==========================================================
+def _pasta(job_id):
+    if not _ID_VALIDO.match(job_id or ""):
+        raise KeyError(f"ID de processamento inválido: {job_id}")
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def pasta_saida(job_id):
+    return os.path.join(_pasta(job_id), "saida")
+
+
+def _agora():
+    return datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+
+def _gravar_estado(job_id, estado):
+    # Gravação atômica: quem lê nunca vê o JSON pela metade
+    pasta = _pasta(job_id)
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporario, os.path.join(pasta, "estado.json"))
+    except Exception:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+def estado(job_id):
+    """
+    Estado do job (dict) ou None se o ID não existir
+    ---------------------------------------------------------
+    - situacao: na fila | processando | concluído | erro
+    - progresso: 0–100
+    - log: últimas mensagens do banco
+    - banco, usuario, arquivos, criado, atualizado, erro
+    ---------------------------------------------------------
+    """
+    try:
+        with open(os.path.join(_pasta(job_id), "estado.json"),
+                  encoding="utf-8") as f:
+            return json.load(f)
+    except (KeyError, OSError, ValueError):
+        return None
+
+
+def resultados(job_id):
+    """Caminhos dos Excel gerados pelo job (vazio enquanto roda)."""
+    try:
+        saida = pasta_saida(job_id)
+        nomes = sorted(os.listdir(saida))
+    except (KeyError, OSError):
+        return []
+    return [os.path.join(saida, n) for n in nomes if n.endswith(".xlsx")]
+
+
+def resultado(job_id, nome):
+    """Caminho do Excel `nome` do job (KeyError se não existir)."""
+    for caminho in resultados(job_id):
+        if os.path.basename(caminho) == nome:
+            return caminho
+    raise KeyError(f"Resultado não encontrado: {nome}")
+
+
+def pacote_zip(job_id):
+    """
+    ZIP com todos os Excel do job, montado direto no disco
+    (planilha por planilha) e reaproveitado enquanto valer.
+    Fica na pasta do job: conta na cota e sai na faxina.
+    """
+    excels = resultados(job_id)
+    if not excels:
+        raise KeyError(f"Processamento sem resultados: {job_id}")
+    pasta = _pasta(job_id)
+    caminho = os.path.join(pasta, "resultados.zip")
+    try:
+        if os.path.getmtime(caminho) >= max(map(os.path.getmtime, excels)):
+            return caminho
+    except OSError:
+        pass
+
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        # .xlsx já é compactado: só armazena
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as zf:
+            for excel in excels:
+                zf.write(excel, os.path.basename(excel))
+        os.replace(temporario, caminho)
+    except Exception:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+    return caminho
+
+
+# ==========================================================
+# 🔹 Lado do processo do job
+# ==========================================================
+def _executar_job(job_id, arquivos):
+    atual = estado(job_id)
+
+    def salvar(**campos):
+        atual.update(campos, atualizado=_agora())
+        _gravar_estado(job_id, atual)
+
+    def progress_cb(p):
+        p = max(0, min(100, int(p)))
+        if p > atual["progresso"]:
+            salvar(progresso=p)
+
+    def log_cb(msg):
+        log = atual["log"]
+        log.append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+        del log[:-LINHAS_LOG]
+        salvar()
+
+    salvar(situacao=PROCESSANDO, progresso=0)
+    try:
+        log_cb("Iniciando processamento...")
+        # os parsers (e suas dependências) só são importados aqui, no
+        # processo do job; PDFs de outro layout vão ao parser certo
+        automatico.executar(atual["modulo"], arquivos, pasta_saida(job_id),
+                            progress_cb, log_cb)
+        log_cb("Processamento concluído.")
+    except Exception as e:
+        salvar(situacao=ERRO, erro=str(e))
+    else:
+        salvar(situacao=CONCLUIDO, progresso=100)
+
+
+# ==========================================================
+# 🔹 Lado do servidor: despacha os jobs para os processos
+# ==========================================================
+class _Despachante:
+    def __init__(self, simultaneos):
+        self._pendentes = queue.Queue()
+        self._vagas = threading.Semaphore(simultaneos)
+        # spawn: um fork do servidor (cheio de threads) pode herdar
+        # travas presas e travar o filho; os PDFs seguem como bytes
+        self._ctx = multiprocessing.get_context("spawn")
+        threading.Thread(target=self._laco, name="fila-jobs",
+                         daemon=True).start()
+
+    def enfileirar(self, job_id, arquivos):
+        self._pendentes.put((job_id, arquivos))
+
+    def _laco(self):
+        while True:
+            job_id, arquivos = self._pendentes.get()
+            self._vagas.acquire()
+            try:
+                processo = self._ctx.Process(
+                    target=_executar_job, args=(job_id, arquivos))
+                processo.start()
+            except Exception as e:
+                self._vagas.release()
+                _encerrar_com_erro(job_id, f"Falha ao iniciar: {e}")
+                continue
+            threading.Thread(target=self._aguardar, args=(job_id, processo),
+                             daemon=True).start()
+
+    def _aguardar(self, job_id, processo):
+        try:
+            processo.join()
+            if processo.exitcode != 0:
+                _encerrar_com_erro(
+                    job_id, f"Processo encerrado (código {processo.exitcode}).")
+        finally:
+            self._vagas.release()
+
+
+def _encerrar_com_erro(job_id, mensagem):
+    atual = estado(job_id)
+    if atual is not None and atual["situacao"] not in FINAIS:
+        atual.update(situacao=ERRO, erro=mensagem, atualizado=_agora())
+        _gravar_estado(job_id, atual)
+
+
+_despachante = None
+_trava = threading.Lock()
+# Conferência de cota + criação do job (enviar)
+_trava_envio = threading.Lock()
+
+
+def iniciar():
+    """
+    Sobe o despachante e o faxineiro deste processo do servidor
+    (uma vez). Na primeira chamada marca como erro os jobs
+    interrompidos por um reinício (os PDFs na fila só existiam
+    em memória).
+    """
+    global _despachante
+    with _trava:
+        if _despachante is None:
+            _despachante = _Despachante(SIMULTANEOS)
+            for job_id in _jobs_em_disco():
+                situacao = (estado(job_id) or {}).get("situacao")
+                if situacao in (NA_FILA, PROCESSANDO):
+                    _encerrar_com_erro(job_id, "Interrompido pelo reinício do servidor.")
+            threading.Thread(target=_faxinar_sempre, name="fila-faxina",
+                             daemon=True).start()
+        return _despachante
+
+
+def _jobs_em_disco():
+    try:
+        nomes = os.listdir(JOBS_DIR)
+    except OSError:
+        return []
+    return [n for n in nomes if _ID_VALIDO.match(n)]
+
+
+# ==========================================================
+# 🔹 Espaço em disco: uso, cotas e faxina
+# ==========================================================
+def _tamanho(pasta):
+    total = 0
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            try:
+                total += os.path.getsize(os.path.join(raiz, nome))
+            except OSError:
+                pass
+    return total
+
+
+def _ocupacao():
+    # Um dict por job: id, usuário, situação, bytes e última mudança
+    jobs = []
+    for job_id in _jobs_em_disco():
+        pasta = _pasta(job_id)
+        atual = estado(job_id) or {}
+        try:
+            # estado.json é regravado a cada mudança do job
+            modificado = os.path.getmtime(os.path.join(pasta, "estado.json"))
+        except OSError:
+            try:
+                modificado = os.path.getmtime(pasta)
+            except OSError:
+                continue
+        tamanho = _tamanho(pasta)
+        if atual.get("situacao") not in FINAIS:
+            # Job em andamento ocupa pelo menos o que foi enviado: os
+            # PDFs estão em memória e os Excel ainda vão ser gravados
+            tamanho = max(tamanho, atual.get("enviado", 0))
+        jobs.append(dict(id=job_id, usuario=atual.get("usuario"),
+                         situacao=atual.get("situacao"),
+                         tamanho=tamanho, modificado=modificado))
+    return jobs
+
+
+def _apagar(job):
+    shutil.rmtree(_pasta(job["id"]), ignore_errors=True)
+
+
+def _liberar(jobs, limite_mb, novos=0):
+    """
+    Apaga os jobs finalizados mais antigos de `jobs` até o total
+    (mais `novos` bytes ainda por chegar) caber no limite (deixa
+    10% de folga, como o cache). Retorna os jobs apagados.
+    """
+    limite = limite_mb * 1024 * 1024
+    total = sum(j["tamanho"] for j in jobs) + novos
+    if not limite_mb or total < limite:
+        return []
+    apagados = []
+    for job in sorted(jobs, key=lambda j: j["modificado"]):
+        if total < limite * 0.9:
+            break
+        if job["situacao"] in FINAIS:
+            _apagar(job)
+            apagados.append(job)
+            total -= job["tamanho"]
+    return apagados
+
+
+def faxinar(agora=None):
+    """
+    Uma passada do faxineiro
+    ---------------------------------------------------------
+    - apaga jobs finalizados parados há mais de VALIDADE_HORAS
+      (e pastas sem estado, restos de um job que não nasceu)
+    - se o total passar de COTA_TOTAL_MB, apaga os finalizados
+      mais antigos
+    ---------------------------------------------------------
+    Jobs na fila ou em processamento nunca são apagados.
+    Retorna o nº de jobs apagados.
+    """
+    agora = time.time() if agora is None else agora
+    vencimento = agora - VALIDADE_HORAS * 3600
+    restantes, apagados = [], 0
+    for job in _ocupacao():
+        sem_estado = job["situacao"] is None
+        if (job["situacao"] in FINAIS or sem_estado) and job["modificado"] < vencimento:
+            _apagar(job)
+            apagados += 1
+        else:
+            restantes.append(job)
+    return apagados + len(_liberar(restantes, COTA_TOTAL_MB))
+
+
+def _faxinar_sempre():
+    while True:
+        try:
+            faxinar()
+        except Exception:
+            pass  # a faxina nunca derruba o servidor
+        time.sleep(INTERVALO_FAXINA)
+
+
+def _garantir_espaco(usuario, novos):
+    # Antes de um job novo de `novos` bytes: abre espaço apagando os
+    # finalizados mais antigos (do próprio usuário, depois de todos)
+    # ou recusa o job. Chamar com _trava_envio presa.
+    jobs = _ocupacao()
+    do_usuario = [j for j in jobs if j["usuario"] == usuario]
+    apagados = {j["id"] for j in _liberar(do_usuario, COTA_USUARIO_MB, novos)}
+    jobs = [j for j in jobs if j["id"] not in apagados]
+    apagados = {j["id"] for j in _liberar(jobs, COTA_TOTAL_MB, novos)}
+    jobs = [j for j in jobs if j["id"] not in apagados]
+
+    mb = 1024 * 1024
+    if COTA_USUARIO_MB and novos + sum(
+            j["tamanho"] for j in jobs if j["usuario"] == usuario) > COTA_USUARIO_MB * mb:
+        raise CotaExcedida("Cota de disco do usuário esgotada: aguarde os "
+                           "processamentos em andamento terminarem.")
+    if COTA_TOTAL_MB and novos + sum(j["tamanho"] for j in jobs) > COTA_TOTAL_MB * mb:
+        raise CotaExcedida("Disco do servidor cheio: tente novamente mais tarde.")
+
+
+def uso_disco():
+    """
+    Uso atual do disco pelos jobs (painel do admin)
+    ---------------------------------------------------------
+    - total / cota_total / cota_usuario: bytes
+    - jobs / ativos: nº de jobs e quantos estão na fila
+      ou em processamento
+    - por_usuario: {usuário: dict(bytes, jobs)}
+    - validade_horas, pasta
+    ---------------------------------------------------------
+    """
+    jobs = _ocupacao()
+    por_usuario = {}
+    for job in jobs:
+        dono = por_usuario.setdefault(job["usuario"] or "-", dict(bytes=0, jobs=0))
+        dono["bytes"] += job["tamanho"]
+        dono["jobs"] += 1
+    return dict(
+        total=sum(j["tamanho"] for j in jobs),
+        cota_total=int(COTA_TOTAL_MB * 1024 * 1024),
+        cota_usuario=int(COTA_USUARIO_MB * 1024 * 1024),
+        jobs=len(jobs),
+        ativos=sum(j["situacao"] not in FINAIS for j in jobs),
+        por_usuario=por_usuario,
+        validade_horas=VALIDADE_HORAS,
+        pasta=JOBS_DIR,
+    )
+
+
+# ==========================================================
+# 🔹 API usada pelo app.py
+# ==========================================================
+def enviar(banco, arquivos, usuario=None):
+    """
+    Cria um job e o coloca na fila
+    ---------------------------------------------------------
+    - banco: dict do registro (bancos.py), nome ou módulo
+    - arquivos: lista de (nome, bytes/memoryview) dos PDFs
+      enviados (mantidos em memória, sem cópia em disco)
+    - usuario: dono do job (quem pode consultá-lo)
+    ---------------------------------------------------------
+    Retorna o ID do job (sem esperar o processamento).
+    CotaExcedida se não houver espaço em disco para ele.
+    """
+    banco = bancos.obter(banco)
+    despachante = iniciar()  # antes do estado: a retomada não vê este job
+
+    nomes, pdfs = [], []
+    for nome, conteudo in arquivos:
+        nome = os.path.basename(nome.replace("\\", "/")) or "arquivo.pdf"
+        base, ext = os.path.splitext(nome)
+        n = 1
+        while nome in nomes:  # mesmo nome enviado duas vezes
+            n += 1
+            nome = f"{base} ({n}){ext}"
+        nomes.append(nome)
+        pdfs.append(PdfEmMemoria(nome, conteudo))
+    enviado = sum(len(conteudo) for _, conteudo in arquivos)
+
+    # Conferência da cota e criação do job de uma vez: dois envios
+    # simultâneos não cabem juntos numa cota que só comporta um
+    with _trava_envio:
+        _garantir_espaco(usuario, enviado)
+        job_id = uuid.uuid4().hex
+        os.makedirs(pasta_saida(job_id))
+        _gravar_estado(job_id, dict(
+            id=job_id, banco=banco["nome"], modulo=banco["modulo"], usuario=usuario,
+            arquivos=nomes, situacao=NA_FILA, progresso=0, log=[], erro=None,
+            enviado=enviado, criado=_agora(), atualizado=_agora()))
+    despachante.enfileirar(job_id, pdfs)
+    return job_id
@@ -0,0 +1,79 @@
+# ==========================================================
+# Módulo: filtro.py
+# Listas de palavras-chave (cabeçalho, rodapé, ignorar...)
+# testadas numa passada só por linha
+#   - Cada banco declara a lista uma vez (no módulo) e o
+#     filtro a compila uma vez
+#   - Trechos fixos viram um regex em trie (prefixos comuns
+#     fatorados): a linha é percorrida uma vez, qualquer que
+#     seja o tamanho da lista
+#   - Sem diferença de caixa, a linha é passada para minúsculas
+#     (str.lower, como os bancos já faziam) em vez de usar
+#     re.IGNORECASE, que desliga a busca rápida do regex
+#   - Regex de verdade (ex.: "Folha \d+/\d+") vão juntos num
+#     segundo regex compilado
+# ==========================================================
+
+import re
+
+
+class Filtro:
+    """
+    Trechos procurados em qualquer posição da linha
+    ---------------------------------------------------------
+    - trechos: textos fixos
+    - padroes: regex (como em re.search)
+    - caixa: False (padrão) ignora maiúsculas/minúsculas
+    ---------------------------------------------------------
+    acha(linha) → True se algum trecho ou padrão aparece.
+    """
+
+    __slots__ = ("trechos", "padroes", "caixa", "_trie", "_padroes")
+
+    def __init__(self, trechos=(), padroes=(), caixa=False):
+        self.trechos = tuple(trechos)
+        self.padroes = tuple(padroes)
+        self.caixa = caixa
+        self._trie = self._padroes = None
+        if self.trechos:
+            self._trie = re.compile(_trie(
+                self.trechos if caixa else [t.lower() for t in self.trechos]))
+        if self.padroes:
+            self._padroes = re.compile("|".join(f"(?:{p})" for p in self.padroes),
+                                       0 if caixa else re.IGNORECASE)
+
+    def __repr__(self):
+        return f"Filtro({len(self.trechos)} trechos, {len(self.padroes)} padrões)"
+
+    def acha(self, linha):
+        if self._trie is not None and self._trie.search(
+                linha if self.caixa else linha.lower()):
+            return True
+        return self._padroes is not None and self._padroes.search(linha) is not None
+
+
+def _trie(trechos):
+    # Trecho que contém outro nunca muda a resposta: basta o menor
+    # (e o trecho vazio está em qualquer linha)
+    minimos = []
+    for t in sorted(set(trechos), key=len):
+        if not any(m in t for m in minimos):
+            minimos.append(t)
+    if minimos == [""]:
+        return ""
+
+    raiz = {}
+    for t in minimos:
+        no = raiz
+        for letra in t:
+            no = no.setdefault(letra, {})
+    return _regex_do_no(raiz) if raiz else r"(?!)"
+
+
+def _regex_do_no(no):
+    # Nó sem filhos = fim de um trecho (nenhum é prefixo de outro)
+    ramos = [re.escape(letra) + _regex_do_no(filho)
+             for letra, filho in sorted(no.items())]
+    if len(ramos) <= 1:
+        return "".join(ramos)
+    return "(?:" + "|".join(ramos) + ")"
@@ -2,15 +2,18 @@ import os
 import re
 import pandas as pd
 from pathlib import Path
-from PyPDF2 import PdfReader
-from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
 
-# ✅ Importa a classe LoaderDialog
-from main import LoaderDialog
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from normalizacao import normalizar, NULO
+from lexico import Linha, DATA, VALOR
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -30,26 +33,25 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     dfs = []
 
-    for i, caminho_pdf in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_pdf, files, progress_cb=progress_cb, faixa=(0, 60))
+    for i, (caminho_pdf, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(caminho_pdf)
         log_cb(f"📄 Processando {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
 
-        try:
-            df = extrair_lancamentos_pdf(caminho_pdf)
-            if not df.empty:
-                dfs.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {e}")
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {erro}")
+        elif not df.empty:
+            dfs.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if dfs:
-        df_final = pd.concat(dfs, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(dfs, ignore_index=True)
         excel_path = os.path.join(output_dir, "Extratos_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
-        formatar_excel(excel_path)
+        salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento válido encontrado.")
@@ -61,45 +63,48 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ══════════════════════════════════════════════════════════════════════════════
 # Extração dos lançamentos de PDF (dois modelos)
 # ══════════════════════════════════════════════════════════════════════════════
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_pdf(caminho_pdf):
-    leitor = PdfReader(caminho_pdf)
+    with etapa(ABRIR):
+        leitor = abrir_pdf(caminho_pdf, "PyPDF2")
     texto = ""
-    for pagina in leitor.pages:
-        texto += pagina.extract_text() + "\n"
+    for pagina in paginas(leitor.pages):
+        with etapa(TEXTO):
+            texto += pagina.extract_text() + "\n"
 
-    linhas = texto.splitlines()
-    padrao_data_completa = re.compile(r"\d{2}/\d{2}/\d{4}")
-    padrao_valor = re.compile(r"-?\d{1,3}(?:\.\d{3})*,\d{2}")
+    # cada linha é tokenizada uma vez (texto cru, sem strip: as
+    # descrições são recortadas por posição)
+    linhas = [Linha(linha) for linha in texto.splitlines()]
 
     lancamentos = []
 
     # Detecta se é um modelo tabular (com cabeçalho)
     eh_modelo_tabela = any(
         "Data" in linha and "Lançamentos" in linha and "Valor" in linha
-        for linha in linhas
+        for linha in (lida.texto for lida in linhas)
     )
 
     if eh_modelo_tabela:
         # Modelo novo (tabela visível no PDF)
         for linha in linhas:
-            if not padrao_data_completa.search(linha):
+            data_token = linha.primeiro(DATA)
+            if not data_token:
                 continue
 
             try:
-                valores = padrao_valor.findall(linha)
+                valores = linha.todos(VALOR)
                 if not valores:
                     continue
                 valor = valores[-2] if len(valores) > 1 else valores[0]
-                valor_float = float(valor.replace('.', '').replace(',', '.'))
 
-                data = padrao_data_completa.search(linha).group(0)
-                pos_valor = linha.find(valor)
-                descricao = linha[10:pos_valor].strip()
+                data = data_token
+                pos_valor = linha.texto.find(valor)
+                descricao = linha.texto[10:pos_valor].strip()
 
                 if not re.search(r"[a-zA-Z]", descricao):
                     continue
 
-                lancamentos.append([data, descricao.title(), valor_float])
+                lancamentos.append([data, descricao.title(), valor])
             except Exception:
                 continue
     else:
@@ -115,15 +120,16 @@ def extrair_lancamentos_pdf(caminho_pdf):
         capturar = False
         data_atual = None
 
-        for linha in linhas:
+        for lida in linhas:
+            linha = lida.texto
             linha_baixa = linha.lower().strip()
 
             # Ignora saldos
-            if ("saldo" in linha_baixa or "sdo" in linha_baixa) and padrao_valor.search(linha):
+            if ("saldo" in linha_baixa or "sdo" in linha_baixa) and lida.primeiro(VALOR):
                 continue
 
-            # Identifica ano
-            if any(mes in linha_baixa for mes in meses) and re.search(r"\b\d{4}\b", linha_baixa):
+            # Identifica ano (palavra de 4 dígitos)
+            if any(mes in linha_baixa for mes in meses):
                 partes = linha_baixa.split()
                 for parte in partes:
                     if parte.isdigit() and len(parte) == 4:
@@ -138,9 +144,9 @@ def extrair_lancamentos_pdf(caminho_pdf):
             if not capturar:
                 continue
 
-            data_completa = padrao_data_completa.search(linha)
+            data_completa = lida.primeiro(DATA)
             if data_completa:
-                data_atual = data_completa.group(0)
+                data_atual = data_completa
             else:
                 data_match = re.search(padrao_data, linha)
                 if not data_match or not ano:
@@ -149,7 +155,7 @@ def extrair_lancamentos_pdf(caminho_pdf):
                 mes_num = meses.get(mes_txt.lower().replace('#', ''), "01")
                 data_atual = f"{dia.zfill(2)}/{mes_num}/{ano}"
 
-            valor_match = padrao_valor.findall(linha)
+            valor_match = lida.todos(VALOR)
             if len(valor_match) != 1:
                 continue
 
@@ -160,76 +166,31 @@ def extrair_lancamentos_pdf(caminho_pdf):
             if not re.search(r"[a-zA-Z]", descricao):
                 continue
 
-            lancamentos.append([
-                data_atual,
-                descricao.title(),
-                float(valor_str.replace('.', '').replace(',', '.'))
-            ])
+            lancamentos.append([data_atual, descricao.title(), valor_str])
 
-    df = pd.DataFrame(lancamentos, columns=[
-                      "Data", "Lançamento", "Valor (R$)"])
-    df = df[~df["Lançamento"].str.upper().str.contains("SALDO", na=False)]
-    return df
+    with etapa(TABELA, linhas=len(lancamentos)):
+        df = pd.DataFrame(lancamentos, columns=[
+                          "Data", "Lançamento", "Valor (R$)"])
+        df = df[~df["Lançamento"].str.upper().str.contains("SALDO", na=False)]
+        # Valores e datas ficam em texto até aqui: uma conversão por coluna
+        return normalizar(df, colunas_valor=["Valor (R$)"], colunas_data=["Data"],
+                          erros=NULO)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# Formatação do Excel (azul, bordas, cores de valor)
+# Salvamento formatado do Excel (azul, bordas, cores de valor)
 # ══════════════════════════════════════════════════════════════════════════════
-def formatar_excel(caminho_excel):
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    ws.freeze_panes = 'A2'
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="1F4E78")
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            if cell.col_idx == 3:  # Coluna 'Valor (R$)'
-                cell.number_format = '#,##0.00'
-                cell.font = Font(color="FF0000") if cell.value < 0 else Font(
-                    color="0000FF")
-                cell.alignment = Alignment(horizontal="right")
-            else:
-                cell.alignment = Alignment(horizontal="left")
-
-    for col in ws.columns:
-        max_length = max(len(str(cell.value))
-                         if cell.value else 0 for cell in col)
-        ws.column_dimensions[col[0].column_letter].width = max_length + 2
-
-    num_linhas = ws.max_row
-    tab = Table(displayName="TabelaLancamentos", ref=f"A1:C{num_linhas}")
-    estilo = TableStyleInfo(
-        name="TableStyleMedium2",
-        showFirstColumn=False,
-        showLastColumn=False,
-        showRowStripes=True,
-        showColumnStripes=False
-    )
-    tab.tableStyleInfo = estilo
-    ws.add_table(tab)
-
-    wb.save(caminho_excel)
+def salvar_em_excel(df, caminho_excel):
+    return salvar_planilha(df, caminho_excel, coluna_valor="Valor (R$)")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Fluxo PyQt5 (Desktop)
 # ══════════════════════════════════════════════════════════════════════════════
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QMessageBox, QApplication
+    from main import LoaderDialog
+
     while True:
         arquivos, _ = QFileDialog.getOpenFileNames(
             janela, "Selecione um ou mais extratos PDF", "", "Arquivos PDF (*.pdf)"
@@ -245,7 +206,8 @@ def processar_pdf_custom(janela):
 
             try:
                 dialog.atualizar_progresso(10)
-                df = extrair_lancamentos_pdf(caminho_pdf)
+                with dialog.acompanhar(10, 60):
+                    df = extrair_lancamentos_pdf(caminho_pdf)
                 dialog.atualizar_progresso(60)
 
                 if df.empty:
@@ -256,10 +218,7 @@ def processar_pdf_custom(janela):
                     continue
 
                 caminho_excel = Path(caminho_pdf).with_suffix('.xlsx')
-                df.to_excel(caminho_excel, index=False)
-                dialog.atualizar_progresso(80)
-
-                formatar_excel(caminho_excel)
+                salvar_em_excel(df, caminho_excel)
                 dialog.atualizar_progresso(100)
 
             except Exception as e:
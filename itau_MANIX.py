@@ -1,14 +1,20 @@
 import os
 import re
-import fitz
 import pandas as pd
-import time
-from PyQt5.QtWidgets import QFileDialog, QApplication
-from main import LoaderDialog
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Border, Side
-from openpyxl.formatting.rule import CellIsRule
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from processamento import mapear_arquivos
+from progresso import paginas
+from texto_pdf import abrir_pdf
+from metricas import etapa, ABRIR, TEXTO, TABELA
+from cache_extracao import memorizar
+from planilha import salvar_planilha
+from lancamentos import Lancamentos
+from normalizacao import datas, NULO
+
+# Versão do parser: altere ao mudar a extração (invalida o cache)
+VERSAO_PARSER = "4"
+
+COLUNAS = ("EMISSÃO", "ORIGEM", "CONTA/FORMA PGTO", "OBSERVAÇÃO", "CHEQUE",
+           "VALOR")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -28,29 +34,25 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
     total = len(files)
     all_dataframes = []
 
-    for i, caminho_pdf in enumerate(files, start=1):
+    resultados = mapear_arquivos(
+        extrair_lancamentos_itau, files, progress_cb=progress_cb, faixa=(0, 80))
+    for i, (caminho_pdf, df, erro) in enumerate(resultados, start=1):
         nome = os.path.basename(caminho_pdf)
         log_cb(f"📄 Lendo arquivo {i}/{total}: {nome}")
-        progress_cb(int((i - 1) / total * 60))
 
-        try:
-            df = extrair_lancamentos_itau(caminho_pdf)
-            if not df.empty:
-                all_dataframes.append(df)
-                log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
-            else:
-                log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
-        except Exception as e:
-            log_cb(f"❌ Erro ao processar {nome}: {e}")
-
-        time.sleep(0.2)
-        progress_cb(int((i / total) * 80))
+        if erro is not None:
+            log_cb(f"❌ Erro ao processar {nome}: {erro}")
+        elif not df.empty:
+            all_dataframes.append(df)
+            log_cb(f"✅ {len(df)} lançamentos extraídos de {nome}")
+        else:
+            log_cb(f"⚠️ Nenhum lançamento encontrado em {nome}")
 
     if all_dataframes:
-        df_final = pd.concat(all_dataframes, ignore_index=True)
+        with etapa(TABELA):
+            df_final = pd.concat(all_dataframes, ignore_index=True)
         excel_path = os.path.join(output_dir, "Itau_Manix_Resultados.xlsx")
-        df_final.to_excel(excel_path, index=False)
-        aplicar_formatacao_excel(excel_path)
+        salvar_em_excel(df_final, excel_path)
         log_cb(f"💾 Planilha salva em: {excel_path}")
     else:
         log_cb("⚠️ Nenhum lançamento válido encontrado.")
@@ -62,13 +64,16 @@ def processar_pdf_streamlit(files, output_dir, progress_cb, log_cb):
 # ══════════════════════════════════════════════════════════════════════════════
 # Extração dos lançamentos do Itaú Manix (versão condensada e robusta)
 # ══════════════════════════════════════════════════════════════════════════════
+@memorizar(VERSAO_PARSER)
 def extrair_lancamentos_itau(caminho_pdf):
-    doc = fitz.open(caminho_pdf)
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
     linhas = []
 
     # Extração e filtragem de linhas
-    for i, page in enumerate(doc):
-        texto = page.get_text("text")
+    for i, page in enumerate(paginas(doc)):
+        with etapa(TEXTO):
+            texto = page.get_text("text")
         linhas_pagina = [l for l in texto.split(
             '\n') if not re.match(r'^ {2,}', l)]
 
@@ -91,19 +96,15 @@ def extrair_lancamentos_itau(caminho_pdf):
     )]
 
     # Identifica o mês predominante
-    datas_detectadas = [re.match(r"\d{2}/\d{2}/\d{4}", l)
-                        for l in linhas if re.match(r"\d{2}/\d{2}/\d{4}", l)]
-    datas_convertidas = [pd.to_datetime(m.group(), dayfirst=True)
-                         for m in datas_detectadas if m]
-    if not datas_convertidas:
+    datas_detectadas = datas([l[:10] for l in linhas
+                              if re.match(r"\d{2}/\d{2}/\d{4}", l)], erros=NULO).dropna()
+    if datas_detectadas.empty:
         return pd.DataFrame()
 
-    contagem = pd.Series((d.month, d.year)
-                         for d in datas_convertidas).value_counts()
-    mes_referencia, ano_referencia = contagem.idxmax()
+    mes_referencia = datas_detectadas.dt.to_period("M").value_counts().idxmax()
 
     # Monta os lançamentos
-    lancamentos = []
+    lancamentos = Lancamentos(COLUNAS, valores=["VALOR"])
     i = 0
     while i < len(linhas):
         linha = linhas[i]
@@ -133,96 +134,36 @@ def extrair_lancamentos_itau(caminho_pdf):
                 else:
                     conta += " " + b_limpo
 
-            try:
-                data_dt = pd.to_datetime(emissao, dayfirst=True)
-                if (data_dt.month != mes_referencia or data_dt.year != ano_referencia):
-                    continue
-            except:
-                continue
-
             if emissao and valor:
-                valor_limpo = valor.replace(".", "").replace(",", ".")
-                lancamentos.append({
-                    "EMISSÃO": emissao,
-                    "ORIGEM": origem,
-                    "CONTA/FORMA PGTO": conta.strip(),
-                    "OBSERVAÇÃO": observacao.strip(),
-                    "CHEQUE": cheque,
-                    "VALOR": float(valor_limpo)
-                })
+                lancamentos.adicionar(emissao, origem, conta.strip(),
+                                      observacao.strip(), cheque, valor)
         else:
             i += 1
 
-    return pd.DataFrame(lancamentos)
+    # Só o mês predominante (filtro feito na coluna de datas inteira)
+    with etapa(TABELA, linhas=len(lancamentos)):
+        df = lancamentos.tabela()
+        emissao = datas(df["EMISSÃO"], erros=NULO)
+        do_mes = (emissao.dt.to_period("M") == mes_referencia).to_numpy()
+        df["EMISSÃO"] = emissao.to_numpy()
+        return df[do_mes].reset_index(drop=True)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# Formatação do Excel (estilo azul e condicional)
+# Salvamento formatado do Excel (azul e vermelho)
 # ══════════════════════════════════════════════════════════════════════════════
-def aplicar_formatacao_excel(caminho_excel):
-    wb = load_workbook(caminho_excel)
-    ws = wb.active
-
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-
-    header_fill = PatternFill(start_color="1F4E78",
-                              end_color="1F4E78", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = thin_border
-
-    for row in ws.iter_rows(min_row=2):
-        for cell in row:
-            cell.border = thin_border
-
-    # Ajuste largura
-    for col in ws.columns:
-        max_len = max(len(str(cell.value))
-                      if cell.value else 0 for cell in col)
-        ws.column_dimensions[col[0].column_letter].width = max_len + 2
-
-    # Coluna de valor
-    col_valor_index = [cell.value for cell in ws[1]].index("VALOR") + 1
-    valor_col_letter = ws.cell(row=1, column=col_valor_index).column_letter
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row,
-                            min_col=col_valor_index, max_col=col_valor_index):
-        for cell in row:
-            cell.number_format = '#,##0.00'
-
-    # Condicional: azul e vermelho
-    ws.conditional_formatting.add(
-        f"{valor_col_letter}2:{valor_col_letter}{ws.max_row}",
-        CellIsRule(operator='lessThan', formula=[
-                   '0'], stopIfTrue=True, font=Font(color="FF0000"))
-    )
-    ws.conditional_formatting.add(
-        f"{valor_col_letter}2:{valor_col_letter}{ws.max_row}",
-        CellIsRule(operator='greaterThanOrEqual', formula=[
-                   '0'], stopIfTrue=True, font=Font(color="0000FF"))
-    )
-
-    # Tabela estilizada
-    table_ref = f"A1:{valor_col_letter}{ws.max_row}"
-    table = Table(displayName="TabelaDados", ref=table_ref)
-    style = TableStyleInfo(name="TableStyleMedium2", showRowStripes=True)
-    table.tableStyleInfo = style
-    ws.add_table(table)
-
-    ws.freeze_panes = "A2"
-    wb.save(caminho_excel)
+def salvar_em_excel(df, caminho_excel):
+    return salvar_planilha(df, caminho_excel, coluna_valor="VALOR",
+                           tabela="TabelaDados")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Fluxo PyQt5 (Desktop)
 # ══════════════════════════════════════════════════════════════════════════════
 def processar_pdf_custom(janela):
+    from PyQt5.QtWidgets import QFileDialog, QApplication
+    from main import LoaderDialog
+
     try:
         while True:
             caminhos_pdf, _ = QFileDialog.getOpenFileNames(
@@ -238,7 +179,8 @@ def processar_pdf_custom(janela):
                 QApplication.processEvents()
                 dialog.atualizar_progresso(10)
 
-                df = extrair_lancamentos_itau(caminho_pdf)
+                with dialog.acompanhar(10, 70):
+                    df = extrair_lancamentos_itau(caminho_pdf)
                 dialog.atualizar_progresso(70)
 
                 if df.empty:
@@ -251,8 +193,7 @@ def processar_pdf_custom(janela):
                 nome_base = os.path.splitext(os.path.basename(caminho_pdf))[0]
                 caminho_excel = os.path.join(
                     os.path.dirname(caminho_pdf), f"{nome_base}.xlsx")
-                df.to_excel(caminho_excel, index=False)
-                aplicar_formatacao_excel(caminho_excel)
+                salvar_em_excel(df, caminho_excel)
 
                 dialog.atualizar_progresso(100)
                 dialog.accept()
@@ -0,0 +1,115 @@
+# ==========================================================
+# Módulo: lancamentos.py
+# Acumulador colunar dos lançamentos extraídos
+#   - Uma lista por coluna, com o texto cru do PDF
+#   - Nenhum dict por linha: cada lançamento vai direto às colunas
+#   - Vira DataFrame de uma vez só para o planilha.py, com
+#     valores (centavos) e datas convertidos por coluna
+#     (normalizacao.py)
+#   - Upload com vários PDFs: cada arquivo é convertido no seu
+#     worker (tabela_arquivo) e as tabelas são juntadas no fim
+# ==========================================================
+
+import pandas as pd
+
+import normalizacao
+from metricas import etapa, TABELA
+
+
+class Lancamentos:
+    """
+    Lançamentos guardados por coluna
+    ---------------------------------------------------------
+    - colunas: nomes das colunas, na ordem do Excel
+    - valores: colunas de valor em reais (texto ou número)
+    - datas: colunas de data em texto
+    ---------------------------------------------------------
+    adicionar(*valores) inclui uma linha, estender(outros)
+    junta outro acumulador e tabela() devolve o DataFrame.
+    Pode ser enviado entre processos e gravado no cache.
+    """
+
+    __slots__ = ("colunas", "valores", "datas", "_dados")
+
+    def __init__(self, colunas, valores=(), datas=()):
+        self.colunas = tuple(colunas)
+        self.valores = frozenset(valores)
+        self.datas = frozenset(datas)
+        self._dados = tuple([] for _ in self.colunas)
+
+    def __len__(self):
+        return len(self._dados[0]) if self._dados else 0
+
+    def __repr__(self):
+        return f"Lancamentos({len(self)} linhas, colunas={list(self.colunas)})"
+
+    def __getstate__(self):
+        return self.colunas, self.valores, self.datas, self._dados
+
+    def __setstate__(self, estado):
+        self.colunas, self.valores, self.datas, self._dados = estado
+
+    def adicionar(self, *valores):
+        """Inclui um lançamento (um valor por coluna, na ordem)."""
+        if len(valores) != len(self._dados):
+            raise ValueError(
+                f"Esperados {len(self._dados)} valores, recebidos {len(valores)}.")
+        for coluna, valor in zip(self._dados, valores):
+            coluna.append(valor)
+
+    def estender(self, outros):
+        """Junta os lançamentos de outro acumulador com as mesmas colunas."""
+        if outros.colunas != self.colunas:
+            raise ValueError("Acumuladores com colunas diferentes.")
+        for coluna, outra in zip(self._dados, outros._dados):
+            coluna.extend(outra)
+
+    def coluna(self, nome):
+        """Valores crus de uma coluna (a própria lista, sem cópia)."""
+        return self._dados[self.colunas.index(nome)]
+
+    def tabela(self, colunas=None):
+        """
+        DataFrame com as colunas pedidas (padrão: todas).
+        Valores viram centavos Int64 e datas datetime64 numa passada
+        por coluna; ValueError se algum não tiver formato válido.
+        """
+        colunas = self.colunas if colunas is None else tuple(colunas)
+        return pd.DataFrame({nome: self._convertida(nome) for nome in colunas},
+                            columns=list(colunas))
+
+    def _convertida(self, nome):
+        coluna = self.coluna(nome)
+        if nome in self.valores:
+            return normalizacao.centavos(coluna).array
+        if nome in self.datas:
+            return normalizacao.datas(coluna).to_numpy()
+        return coluna
+
+
+# ==========================================================
+# 🔹 Vários arquivos numa planilha só
+# ==========================================================
+def tabela_arquivo(caminho_pdf, extrair, montar=None):
+    """
+    Extrai um PDF e já converte a tabela dele
+    ---------------------------------------------------------
+    - extrair(caminho_pdf): função de extração do banco
+    - montar(dados): monta o DataFrame (padrão: tabela() do
+      Lancamentos devolvido)
+    ---------------------------------------------------------
+    Feita para mapear_arquivos(tabela_arquivo, files, extrair):
+    um valor ou data inválido vira o erro só deste arquivo, e
+    não derruba a planilha de todo o upload.
+    """
+    dados = extrair(caminho_pdf)
+    if montar is not None:
+        return montar(dados)
+    with etapa(TABELA, linhas=len(dados)):
+        return dados.tabela()
+
+
+def juntar(tabelas):
+    """DataFrames de tabela_arquivo() numa tabela só, na ordem."""
+    with etapa(TABELA, linhas=sum(len(t) for t in tabelas)):
+        return pd.concat(tabelas, ignore_index=True)
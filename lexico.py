@@ -0,0 +1,128 @@
+# ==========================================================
+# Módulo: lexico.py
+# Léxico das linhas de extrato, compartilhado pelos bancos
+#   - Cada linha é lida uma única vez, por um regex só (em C:
+#     findall, sem objeto Match por token), e só quando algum
+#     parser pergunta pelos tokens
+#   - Tokens: data, data curta, valor e documento; o que
+#     sobra entre eles é texto livre
+#   - Os parsers consultam os tokens em vez de rodar vários
+#     regex (e o mesmo regex mais de uma vez) por linha
+# ==========================================================
+
+import re
+import functools
+
+# Tipos de token = posição do grupo no regex (e na tupla do token)
+DATA = 0          # 05/01/2025
+VALOR = 1         # 1.234,56 / -1.234,56 / 0,50
+DATA_CURTA = 2    # 05/01 ou 05/01/25
+DOCUMENTO = 3     # número solto de 5 dígitos ou mais (\b nas pontas)
+
+# Alternativas na ordem de prioridade; todas começam por dígito
+# ou "-" e o lookahead pula as letras sem testar uma por uma.
+# Data e valor seguem os regex que os parsers já usavam: valores
+# colados pelo PDF ("1.000,002.000,00") continuam separados.
+# Documento só vale como palavra inteira e nunca engole o começo
+# de um valor ("12345,67" segue dando o valor "345,67")
+_TOKENS = re.compile(r"""
+    (?=[-0-9])
+    (?:
+        (\d{2}/\d{2}/\d{4})
+      | (-?\d{1,3}(?:\.\d{3})*,\d{2})
+      | (\d{2}/\d{2}(?:/\d{2})?(?![\d/]))
+      | ((?<!\w)\d{5,}(?!\w|,\d{2}))
+    )
+""", re.VERBOSE)
+
+_INICIO_TOKEN = frozenset("-0123456789")
+
+
+class Linha:
+    """
+    Uma linha de extrato quebrada em tokens
+    ---------------------------------------------------------
+    - texto: a linha, como veio (quem quiser tira os espaços antes)
+    - tokens: um por token, na ordem; tupla com o texto na
+      posição do tipo e "" nas demais (lidos na 1ª consulta)
+    ---------------------------------------------------------
+    Consultas: so, todos, primeiro, ultimo, comeca, termina,
+    posicoes e tem_palavra (o tipo é DATA, VALOR...).
+    """
+
+    __slots__ = ("texto", "_tokens")
+
+    def __init__(self, texto):
+        self.texto = texto
+        self._tokens = None
+
+    def __repr__(self):
+        return f"Linha({self.texto!r})"
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = _TOKENS.findall(self.texto)
+        return self._tokens
+
+    def so(self, tipo):
+        """A linha inteira é um único token de `tipo`."""
+        if self.texto[:1] not in _INICIO_TOKEN:
+            return False  # começa por letra: nem precisa ler os tokens
+        tokens = self.tokens
+        return len(tokens) == 1 and tokens[0][tipo] == self.texto
+
+    def todos(self, tipo):
+        """Textos dos tokens de `tipo`, na ordem da linha."""
+        return [t[tipo] for t in self.tokens if t[tipo]]
+
+    def primeiro(self, tipo):
+        for t in self.tokens:
+            if t[tipo]:
+                return t[tipo]
+        return None
+
+    def ultimo(self, tipo):
+        for t in reversed(self.tokens):
+            if t[tipo]:
+                return t[tipo]
+        return None
+
+    def comeca(self, tipo):
+        """Texto do token de `tipo` que abre a linha (ou None)."""
+        tokens = self.tokens
+        if tokens and tokens[0][tipo] and self.texto.startswith(tokens[0][tipo]):
+            return tokens[0][tipo]
+        return None
+
+    def termina(self, tipo):
+        """Texto do token de `tipo` que fecha a linha (ou None)."""
+        tokens = self.tokens
+        if tokens and tokens[-1][tipo] and self.texto.endswith(tokens[-1][tipo]):
+            return tokens[-1][tipo]
+        return None
+
+    def posicoes(self, tipo):
+        """(texto, início) dos tokens de `tipo`; relê a linha, use só se precisar."""
+        grupo = tipo + 1
+        return [(m.group(grupo), m.start()) for m in _TOKENS.finditer(self.texto)
+                if m.lastindex == grupo]
+
+    def tem_palavra(self, *palavras):
+        """Alguma das palavras, inteira (\\b) e sem diferença de caixa."""
+        return _palavras(palavras).search(self.texto) is not None
+
+
+@functools.lru_cache(maxsize=64)
+def _palavras(palavras):
+    # Um regex por conjunto de palavras, compilado uma vez
+    return re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, palavras)),
+                      re.IGNORECASE)
+
+
+def linhas(textos):
+    """Gera uma Linha por texto, sem os espaços das pontas (vazias são puladas)."""
+    for texto in textos:
+        texto = texto.strip()
+        if texto:
+            yield Linha(texto)
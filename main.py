@@ -2,16 +2,19 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QPixmap, QFont
 from PyQt5.QtWidgets import QScrollArea
 import sys
-import time
 import os
+import functools
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
     QProgressBar, QHBoxLayout, QSpacerItem, QScrollArea, QSizePolicy,
     QDialog, QTextEdit, QDialogButtonBox, QMessageBox, QGridLayout, QDesktopWidget
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QPixmap, QIcon
 
+import bancos
+import progresso
+
 
 def recurso_caminho(rel_path):
     try:
@@ -96,14 +99,12 @@ class LoaderDialog(QDialog):
     def atualizar_progresso(self, valor):
         self.progressBar.setValue(valor)
 
-
-class LoaderThread(QThread):
-    progress = pyqtSignal(int)
-
-    def run(self):
-        for i in range(101):
-            self.progress.emit(i)
-            time.sleep(0.01)
+    def acompanhar(self, inicio, fim):
+        """Liga as páginas lidas pelo extrator à faixa inicio..fim da barra."""
+        def atualizar(fracao):
+            self.atualizar_progresso(int(inicio + (fim - inicio) * fracao))
+            QApplication.processEvents()
+        return progresso.acompanhar(atualizar)
 
 
 # ...
@@ -231,51 +232,13 @@ class BancoApp(QWidget):
         self.ajustar_tamanho_tela()
         self.centralizar_janela()
 
+        # Bancos vêm do registro; o módulo só é importado no clique.
+        # "Detectar banco" (1º da grade) aceita PDFs de vários bancos
         self.bancos = [
-            {"nome": "Asaas", "icone": "imagens/Asaas1.ico",
-                "func": self.executar_asaas},
-            {"nome": "Banco do Brasil", "icone": "imagens/brasil1.ico",
-                "func": self.executar_brasil},
-            {"nome": "Nordeste", "icone": "imagens/bnb-icon.ico",
-                "func": self.executar_bnb},
-            {"nome": "Bradesco", "icone": "imagens/bradesco.ico",
-                "func": self.executar_bradesco},
-            {"nome": "Btg", "icone": "imagens/btg.ico",
-                "func": self.executar_btg},
-            {"nome": "Caixa", "icone": "imagens/caixa.ico",
-                "func": self.executar_caixa},
-            {"nome": "Daycoval", "icone": "imagens/daycoval.ico",
-                "func": self.executar_daycoval},
-            {"nome": "Inter", "icone": "imagens/icon inter3.ico",
-                "func": self.executar_inter},
-            {"nome": "Itaú", "icone": "imagens/itau11.ico",
-                "func": self.executar_itau},
-            {"nome": "Itaú BBA", "icone": "imagens/itau25.ico",
-                "func": self.executar_itau2},
-            {"nome": "Itaú Manix", "icone": "imagens/itaumanix1.ico",
-                "func": self.executar_itaumanix},
-            {"nome": "Itaú Consolidado", "icone": "imagens/ItauConsolidado1.ico",
-                "func": self.executar_itauconsolidado},
-            {"nome": "Nubank", "icone": "imagens/nubank1.ico",
-                "func": self.executar_nubank},
-            {"nome": "Pagbank", "icone": "imagens/pagbank1.ico",
-                "func": self.executar_pagbank},
-            {"nome": "Safra", "icone": "imagens/Safra.ico",
-                "func": self.executar_safra},
-            {"nome": "Santander", "icone": "imagens/santander-br.ico",
-                "func": self.executar_santander},
-            {"nome": "Sicredi", "icone": "imagens/Sicredi.ico",
-                "func": self.executar_sicredi},
-            {"nome": "Sofisa", "icone": "imagens/sofisa1.ico",
-                "func": self.executar_sofisa},
-            {"nome": "Stone", "icone": "imagens/stone.ico",
-                "func": self.executar_stone},
-            {"nome": "Xp Investimentos", "icone": "imagens/Xp-Investimentos-Logo.ico",
-                "func": self.executar_xp}
+            dict(banco, func=functools.partial(bancos.carregar, banco))
+            for banco in [bancos.AUTOMATICO] + bancos.listar(bancos.DESKTOP)
         ]
 
-        self.bancos.sort(key=lambda x: x["nome"])
-
         # refs de botões (usadas pelo tema)
         self.button_refs = []
 
@@ -448,15 +411,9 @@ class BancoApp(QWidget):
         return wrapper
 
     def executar_banco(self, funcao_banco):
-        self.dialog_loader = LoaderDialog(
-            self, getattr(self, "light_theme", True))
-        self.dialog_loader.show()
-        self.loader = LoaderThread()
-        self.loader.progress.connect(self.dialog_loader.atualizar_progresso)
-        self.loader.finished.connect(
-            lambda: self.finalizar_execucao(funcao_banco))
-        self.loader.finished.connect(self.dialog_loader.close)
-        self.loader.start()
+        # Sem carregamento fictício: cada banco abre o próprio
+        # LoaderDialog com o progresso real dos arquivos.
+        self.finalizar_execucao(funcao_banco)
 
     def finalizar_execucao(self, funcao_banco):
         try:
@@ -725,86 +682,6 @@ class BancoApp(QWidget):
 
         dialog.exec_()
 
-    def executar_asaas(self):
-        from Asaas import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_brasil(self):
-        from Brasil import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_bnb(self):
-        from BNB import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_bradesco(self):
-        from Bradesco import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_btg(self):
-        from Btg import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_caixa(self):
-        from Caixa import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_daycoval(self):
-        from Daycoval import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_inter(self):
-        from Inter import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_pagbank(self):
-        from Pagbank import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_itau(self):
-        from itau import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_itau2(self):
-        from Itau2 import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_itaumanix(self):
-        from itau_MANIX import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_itauconsolidado(self):
-        from ItauConsolidado import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_nubank(self):
-        from Nubank import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_safra(self):
-        from Safra import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_santander(self):
-        from Santander import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_sicredi(self):
-        from Sicredi import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_sofisa(self):
-        from Sofisa import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_stone(self):
-        from Stone import processar_pdf_custom
-        return processar_pdf_custom
-
-    def executar_xp(self):
-        from XpInvestimentos import processar_pdf_custom
-        return processar_pdf_custom
-
     def ajustar_tamanho_tela(self):
         screen = QDesktopWidget().screenGeometry()
         largura = min(983, screen.width() - 100)
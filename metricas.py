@@ -0,0 +1,271 @@
+# ==========================================================
+# Módulo: metricas.py
+# Tempo de cada etapa dos processamentos
+#   - Etapas: abrir, texto, parse, tabela e excel
+#   - Tempo de parede, tempo de CPU e nº de linhas por etapa
+#   - Uma medição por arquivo e um resumo por execução do banco
+#   - Resumo vai para o log_cb e para um arquivo JSON-lines
+# ==========================================================
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+ARQUIVO = os.environ.get(
+    "CENTRAL_BANCOS_METRICAS",
+    os.path.join(os.path.expanduser("~"), ".central-bancos", "metricas.jsonl"))
+
+# Acima deste tamanho o arquivo vira "<arquivo>.1" e recomeça
+LIMITE_MB = 20
+
+# Etapas
+ABRIR = "abrir"      # fitz.open / pdfplumber.open / PdfReader
+TEXTO = "texto"      # get_text / extract_text / extract_words / OCR
+PARSE = "parse"      # restante da extração (regex, laços, limpeza)
+TABELA = "tabela"    # montagem do DataFrame
+EXCEL = "excel"      # gravação da planilha
+ETAPAS = (ABRIR, TEXTO, PARSE, TABELA, EXCEL)
+
+# Medições abertas: execução > arquivo. É global (não por thread)
+# para valer também no QThread do Desktop; cada processo roda
+# uma execução por vez.
+_pilha = []
+_trava = threading.Lock()
+
+
+# ==========================================================
+# 🔹 Registro das medições
+# ==========================================================
+def _nova():
+    return dict(etapas={}, arquivos=[])
+
+
+def _somar(etapas, nome, parede, cpu, linhas=None):
+    atual = etapas.setdefault(nome, dict(parede=0.0, cpu=0.0, linhas=0))
+    atual["parede"] += parede
+    atual["cpu"] += cpu
+    if linhas:
+        atual["linhas"] += linhas
+
+
+@contextmanager
+def _aberta(medicao):
+    with _trava:
+        _pilha.append(medicao)
+    try:
+        yield medicao
+    finally:
+        with _trava:
+            # por identidade: medições vazias são iguais entre si
+            for i in range(len(_pilha) - 1, -1, -1):
+                if _pilha[i] is medicao:
+                    del _pilha[i]
+                    break
+
+
+def _atual():
+    return _pilha[-1] if _pilha else None
+
+
+# ==========================================================
+# 🔹 Lado do extrator: etapas e arquivos
+# ==========================================================
+@contextmanager
+def etapa(nome, linhas=None):
+    """
+    Soma o tempo do bloco na etapa `nome`
+    ---------------------------------------------------------
+    - vai para o arquivo em extração ou, fora dele, para a
+      execução do banco; sem medição aberta não faz nada
+    - linhas: nº de linhas tratadas no bloco (opcional)
+    ---------------------------------------------------------
+    """
+    alvo = _atual()
+    if alvo is None:
+        yield
+        return
+    parede, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        _somar(alvo["etapas"], nome, time.perf_counter() - parede,
+               time.thread_time() - cpu, linhas)
+
+
+@contextmanager
+def arquivo(caminho_pdf):
+    """
+    Mede a extração de um PDF (usado por @memorizar)
+    ---------------------------------------------------------
+    O tempo que sobra depois de abrir/texto/tabela é o parse.
+    Quem extrai preenche "linhas" e "cache" no dict retornado.
+    """
+    medicao = dict(arquivo=os.path.basename(str(caminho_pdf)), linhas=None,
+                   cache=False, etapas={})
+    parede, cpu = time.perf_counter(), time.thread_time()
+    with _aberta(medicao):
+        yield medicao
+    medicao["parede"] = time.perf_counter() - parede
+    medicao["cpu"] = time.thread_time() - cpu
+
+    if not medicao["cache"]:
+        medidas = medicao["etapas"].values()
+        _somar(medicao["etapas"], PARSE,
+               max(0.0, medicao["parede"] - sum(m["parede"] for m in medidas)),
+               max(0.0, medicao["cpu"] - sum(m["cpu"] for m in medidas)),
+               medicao["linhas"])
+
+    destino = _atual()
+    if destino is not None:
+        destino["arquivos"].append(medicao)
+
+
+@contextmanager
+def coletar():
+    """
+    Junta as medições feitas no bloco (arquivos e etapas soltas)
+    no lado do worker em processamento.mapear_arquivos.
+    """
+    with _aberta(_nova()) as medicao:
+        yield medicao
+
+
+def incorporar(medicao):
+    """Leva as medições devolvidas por um worker para a execução atual."""
+    destino = _atual()
+    if destino is None or not medicao:
+        return
+    destino["arquivos"].extend(medicao["arquivos"])
+    for nome, m in medicao["etapas"].items():
+        _somar(destino["etapas"], nome, m["parede"], m["cpu"], m["linhas"])
+
+
+# ==========================================================
+# 🔹 Execução de um banco (Desktop ou Web)
+# ==========================================================
+def _resumir(banco, modo, medicao, parede, erro):
+    etapas = {}
+    for arq in medicao["arquivos"]:
+        for nome, m in arq["etapas"].items():
+            _somar(etapas, nome, m["parede"], m["cpu"], m["linhas"])
+    for nome, m in medicao["etapas"].items():
+        _somar(etapas, nome, m["parede"], m["cpu"], m["linhas"])
+
+    return dict(
+        quando=datetime.now().isoformat(timespec="seconds"),
+        banco=banco,
+        modo=modo,
+        parede=round(parede, 4),
+        cpu=round(sum(m["cpu"] for m in etapas.values()), 4),
+        linhas=sum(a["linhas"] or 0 for a in medicao["arquivos"]),
+        erro=erro,
+        etapas=_em_ordem(etapas),
+        arquivos=[dict(a, parede=round(a["parede"], 4), cpu=round(a["cpu"], 4),
+                       etapas=_em_ordem(a["etapas"]))
+                  for a in medicao["arquivos"]],
+    )
+
+
+def _em_ordem(etapas):
+    # Ordem do pipeline (abrir → excel), tempos arredondados
+    ordem = {nome: i for i, nome in enumerate(ETAPAS)}
+    return {nome: dict(etapas[nome], parede=round(etapas[nome]["parede"], 4),
+                       cpu=round(etapas[nome]["cpu"], 4))
+            for nome in sorted(etapas, key=lambda n: ordem.get(n, len(ordem)))}
+
+
+def _texto_etapas(etapas):
+    return " · ".join(f"{nome} {m['parede']:.2f}s" for nome, m in etapas.items())
+
+
+def linhas_log(registro):
+    """Mensagens de log_cb com o resumo de uma execução."""
+    mensagens = []
+    if len(registro["arquivos"]) > 1:
+        for arq in registro["arquivos"]:
+            origem = " (cache)" if arq["cache"] else ""
+            mensagens.append(f"⏱️ {arq['arquivo']}{origem}: "
+                             f"{_texto_etapas(arq['etapas'])} · {arq['linhas'] or 0} linhas")
+    mensagens.append(f"⏱️ Tempos: {_texto_etapas(registro['etapas']) or '-'}")
+    mensagens.append(f"⏱️ Total: {registro['parede']:.2f}s "
+                     f"(CPU {registro['cpu']:.2f}s) · {registro['linhas']} linhas")
+    return mensagens
+
+
+@contextmanager
+def execucao(banco, modo, log_cb=None, so_medido=False):
+    """
+    Mede uma chamada de processar_pdf_streamlit/custom
+    ---------------------------------------------------------
+    - banco: nome do banco
+    - modo: bancos.DESKTOP ou bancos.STREAMLIT
+    - log_cb: recebe o resumo no fim (opcional)
+    - so_medido: a parede é a soma dos arquivos e etapas
+      medidos, não o relógio do bloco (Desktop: o tempo com
+      diálogos abertos esperando o usuário não conta)
+    ---------------------------------------------------------
+    O resumo também é anexado ao arquivo de métricas.
+    """
+    inicio = time.perf_counter()
+    erro = None
+    with _aberta(_nova()) as medicao:
+        try:
+            yield medicao
+        except Exception as e:
+            erro = str(e)
+            raise
+        finally:
+            if so_medido:
+                parede = (sum(a["parede"] for a in medicao["arquivos"])
+                          + sum(m["parede"] for m in medicao["etapas"].values()))
+            else:
+                parede = time.perf_counter() - inicio
+            registro = _resumir(banco, modo, medicao, parede, erro)
+            if log_cb is not None:
+                try:
+                    for mensagem in linhas_log(registro):
+                        log_cb(mensagem)
+                except Exception:
+                    pass  # métrica nunca derruba o processamento
+            registrar(registro)
+
+
+# ==========================================================
+# 🔹 Arquivo JSON-lines
+# ==========================================================
+def registrar(registro, caminho=None):
+    """Anexa `registro` ao arquivo de métricas (falhas são ignoradas)."""
+    caminho = caminho or ARQUIVO
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        try:
+            if os.path.getsize(caminho) > LIMITE_MB * 1024 * 1024:
+                os.replace(caminho, caminho + ".1")
+        except OSError:
+            pass
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linha)
+    except OSError:
+        pass
+
+
+def ler(limite=500, caminho=None):
+    """Últimos `limite` registros do arquivo de métricas (mais antigos primeiro)."""
+    caminho = caminho or ARQUIVO
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            linhas = deque(f, maxlen=limite)
+    except OSError:
+        return []
+    registros = []
+    for linha in linhas:
+        try:
+            registros.append(json.loads(linha))
+        except ValueError:
+            continue  # linha cortada por uma gravação interrompida
+    return registros
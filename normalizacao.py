@@ -0,0 +1,232 @@
+# ==========================================================
+# Módulo: normalizacao.py
+# Conversão de valores e datas brasileiros por coluna inteira
+#   - Valores: "1.234,56", "R$ -1.234,56", "1.234,56-",
+#     "- 1.234,56", "1.234,56 D", "(1.234,56)" → centavos int64
+#   - Datas: "05/01/2025", "05/01/25", "05/01" + ano,
+#     "05 JAN 2025", "5 de janeiro de 2025" → datetime64
+#   - Uma passada vetorizada (pandas .str) por coluna, sem
+#     replace/float linha a linha nos parsers
+#   - Valores seguem em centavos inteiros até a planilha:
+#     somas e conferências de saldo exatas
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+
+# Erros de conversão
+ERRO = "raise"       # ValueError com o primeiro valor inválido
+NULO = "coerce"      # inválidos viram <NA> / NaT
+
+# Classe de cada caractere de um valor (tabela por código):
+# fora da tabela (letras, acentos...) o valor é inválido
+(_INVALIDO, _DIGITO, _VIRGULA, _MENOS, _DEBITO, _ABRE, _FECHA, _ESPACO,
+ _OUTRO, _FIM) = range(10)
+_CLASSES = np.full(256, _INVALIDO, dtype=np.uint8)
+_CLASSES[ord("0"):ord("9") + 1] = _DIGITO
+_CLASSES[[ord(","), ord("-"), ord("D"), ord("("), ord(")")]] = (
+    _VIRGULA, _MENOS, _DEBITO, _ABRE, _FECHA)
+_CLASSES[[ord(" "), 0xA0]] = _ESPACO
+_CLASSES[[ord(c) for c in ".+R$C"]] = _OUTRO
+_CLASSES[0] = _FIM  # preenchimento da matriz
+
+_MAX_DIGITOS = 15  # ×100 ainda cabe em int64
+
+_SEPARADOR = r"(?:\s*[/.-]\s*|\s+de\s+|\s+)"
+_DATA = (
+    rf"^\s*(?P<dia>\d{{1,2}}){_SEPARADOR}(?P<mes>\d{{1,2}}|[^\W\d_]{{3,}})\.?"
+    rf"(?:{_SEPARADOR}(?P<ano>\d{{4}}|\d{{2}}))?\s*$"
+)
+
+# Três primeiras letras do mês (português e inglês)
+MESES = {
+    "jan": 1, "fev": 2, "feb": 2, "mar": 3, "abr": 4, "apr": 4,
+    "mai": 5, "may": 5, "jun": 6, "jul": 7, "ago": 8, "aug": 8,
+    "set": 9, "sep": 9, "out": 10, "oct": 10, "nov": 11, "dez": 12,
+    "dec": 12,
+}
+
+
+# ==========================================================
+# 🔹 Auxiliares
+# ==========================================================
+def _serie(valores):
+    if isinstance(valores, pd.Series):
+        return valores.reset_index(drop=True)
+    if isinstance(valores, np.ndarray):
+        return pd.Series(valores)
+    return pd.Series(list(valores), dtype=None if len(valores) else object)
+
+
+def _vazios(serie):
+    # None, NaN e texto em branco
+    return serie.isna() | serie.astype(str).str.strip().eq("")
+
+
+def _numeros(texto):
+    # Texto → float64 (NaN onde não for número)
+    return pd.to_numeric(texto, errors="coerce").astype("float64")
+
+
+def _numero(valor):
+    # int/float (numpy também), mas não bool
+    return isinstance(valor, (int, float, np.number)) and not isinstance(valor, (bool, np.bool_))
+
+
+def _invalidos(serie, validos, vazios, erros, mensagem):
+    ruins = ~validos & ~vazios
+    if erros == ERRO and ruins.any():
+        raise ValueError(f"{mensagem}: {serie[ruins].iloc[0]!r}")
+
+
+# ==========================================================
+# 🔹 Valores
+# ==========================================================
+def centavos(valores, erros=ERRO):
+    """
+    Valores em reais → centavos (Series Int64)
+    ---------------------------------------------------------
+    - texto em qualquer formato brasileiro do cabeçalho;
+      negativo com "-" antes/depois, "D" no fim ou parênteses
+    - coluna numérica (float/int) é tratada como reais, assim
+      como os números soltos numa coluna de texto
+    - vazios viram <NA>; inválidos levantam ValueError
+      (erros=NULO os transforma em <NA>)
+    ---------------------------------------------------------
+    A coluna vira uma matriz de caracteres (numpy) e os
+    dígitos são somados por posição: nada roda por linha.
+    """
+    serie = _serie(valores)
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return pd.Series(np.rint(serie.astype("float64") * 100)).astype("Int64")
+
+    nulos = serie.isna().to_numpy()
+    texto = serie.to_numpy(dtype=object, copy=True)
+    # Números no meio do texto (10.5 em reais) não passam pela
+    # matriz: "10.5" seria lido como 105 reais
+    numeros = np.fromiter((_numero(v) for v in texto), dtype=bool,
+                          count=len(texto)) & ~nulos
+    reais_soltos = texto[numeros].astype("float64")
+    texto[nulos | numeros] = ""
+    texto = texto.astype(str)
+    largura = texto.dtype.itemsize // 4
+    if not largura:
+        return pd.Series(pd.NA, index=serie.index, dtype="Int64")
+    # Uma coluna da matriz por caractere (contígua: laço por coluna)
+    letras = np.asfortranarray(texto.view(np.uint32).reshape(len(texto), largura))
+    classes = _CLASSES[np.minimum(letras, 255)]
+    classes[letras > 255] = _INVALIDO
+
+    n = len(texto)
+    numero = np.zeros(n, dtype=np.int64)
+    decimais = np.zeros(n, dtype=np.int64)      # dígitos após a vírgula
+    n_digitos = np.zeros(n, dtype=np.int64)
+    n_virgulas = np.zeros(n, dtype=np.int64)
+    n_menos = np.zeros(n, dtype=np.int64)
+    invalido = np.zeros(n, dtype=bool)
+    debito = np.zeros(n, dtype=bool)
+    abre = np.zeros(n, dtype=bool)
+    fecha = np.zeros(n, dtype=bool)
+    em_branco = np.ones(n, dtype=bool)
+    for j in range(largura):
+        classe = classes[:, j]
+        digito = classe == _DIGITO
+        # Horner: cada dígito empurra os anteriores uma casa
+        numero = np.where(digito, numero * 10 + (letras[:, j] - ord("0")), numero)
+        decimais += digito & (n_virgulas > 0)
+        n_digitos += digito
+        n_virgulas += classe == _VIRGULA
+        n_menos += classe == _MENOS
+        invalido |= classe == _INVALIDO
+        debito |= classe == _DEBITO
+        abre |= classe == _ABRE
+        fecha |= classe == _FECHA
+        em_branco &= (classe == _ESPACO) | (classe == _FIM)
+
+    vazios = nulos | em_branco
+    validos = ~invalido & (n_digitos > 0) & (n_digitos <= _MAX_DIGITOS)
+    validos &= (n_virgulas == 0) | ((n_virgulas == 1) & (decimais >= 1) & (decimais <= 2))
+    validos &= n_menos <= 1
+    _invalidos(serie, validos, vazios, erros, "Valor inválido")
+
+    negativo = (n_menos > 0) | debito | (abre & fecha)
+    resultado = numero * 10 ** (2 - np.clip(decimais, 0, 2))
+    resultado = np.where(negativo, -resultado, resultado)
+    resultado[numeros] = np.rint(reais_soltos * 100)
+    validos |= numeros
+    return pd.Series(resultado, index=serie.index).astype("Int64").where(validos)
+
+
+def reais(valores):
+    """Centavos (Int64/int64) → reais float64 (NaN onde faltar); só na gravação."""
+    return pd.Series(valores).astype("Float64").astype("float64") / 100
+
+
+# ==========================================================
+# 🔹 Datas
+# ==========================================================
+def datas(valores, ano=None, erros=ERRO):
+    """
+    Datas em texto → Series datetime64
+    ---------------------------------------------------------
+    - dia/mês/ano, dia/mês/aa, mês abreviado ou por extenso
+      ("05 JAN 2025", "5 de janeiro de 2025")
+    - ano: usado quando a data vem só com dia/mês
+    - coluna datetime64 passa direto
+    - vazios viram NaT; inválidos levantam ValueError
+      (erros=NULO os transforma em NaT)
+    ---------------------------------------------------------
+    """
+    serie = _serie(valores)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    vazios = _vazios(serie)
+    texto = serie.where(~vazios, None).astype(object)
+
+    # Caminho rápido (C): dd/mm/aaaa; o resto vai pelo regex
+    resultado = pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+    faltam = resultado.isna() & ~vazios
+    if faltam.any():
+        resultado[faltam] = _datas_livres(texto[faltam], ano)
+
+    _invalidos(serie, resultado.notna(), vazios, erros, "Data inválida")
+    return resultado
+
+
+def _datas_livres(texto, ano):
+    partes = texto.astype(str).str.extract(_DATA)
+
+    mes = partes["mes"]
+    por_nome = mes.str.lower().str[:3].map(MESES)
+    mes = _numeros(mes).fillna(por_nome.astype("float64"))
+
+    anos = _numeros(partes["ano"])
+    anos = anos.where(anos >= 100, anos + 2000)
+    if ano is not None:
+        anos = anos.fillna(int(ano))
+
+    return pd.to_datetime(
+        pd.DataFrame(dict(year=anos, month=mes, day=_numeros(partes["dia"]))),
+        errors="coerce")
+
+
+# ==========================================================
+# 🔹 DataFrame
+# ==========================================================
+def normalizar(df, colunas_valor=(), colunas_data=(), ano=None, erros=ERRO):
+    """
+    Converte colunas inteiras de `df` (cópia)
+    ---------------------------------------------------------
+    - colunas_valor: → centavos Int64 (a planilha divide
+      por 100 ao gravar)
+    - colunas_data: → datetime64
+    - ano / erros: repassados a datas() e centavos()
+    ---------------------------------------------------------
+    """
+    df = df.copy()
+    for coluna in colunas_valor:
+        df[coluna] = centavos(df[coluna], erros).array
+    for coluna in colunas_data:
+        df[coluna] = datas(df[coluna], ano, erros).to_numpy()
+    return df
@@ -0,0 +1,218 @@
+# ==========================================================
+# Módulo: ocr.py
+# OCR das páginas escaneadas, página a página
+#   - Cada página é rasterizada pelo PyMuPDF (get_pixmap) só
+#     quando chega a vez dela, na resolução/cor configuradas
+#   - O tesseract roda num pool de processos; os textos voltam
+#     na ordem das páginas
+#   - No máximo 2 imagens por processo ficam em memória ao
+#     mesmo tempo, qualquer que seja o nº de páginas
+#   - Cache em disco do texto de cada imagem (SHA-256 dos
+#     pixels + DPI + idioma + versão do tesseract): página já
+#     vista em outro upload não passa de novo pelo tesseract
+# ==========================================================
+
+import os
+import hashlib
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+import processamento
+import cache_extracao
+from metricas import etapa, TEXTO
+from progresso import reportar
+
+
+def _numero_env(nome, padrao, tipo=int):
+    try:
+        return tipo(os.environ.get(nome, padrao))
+    except ValueError:
+        return tipo(padrao)
+
+
+# Resolução da imagem enviada ao tesseract (a do pdf2image era 200)
+DPI = _numero_env("CENTRAL_BANCOS_OCR_DPI", 200)
+
+# Tons de cinza: 1/3 da memória do RGB e o tesseract binariza igual
+CINZA = _numero_env("CENTRAL_BANCOS_OCR_CINZA", 1) != 0
+
+IDIOMA = "por"
+
+# Processos do OCR (0 = núcleos livres; 1 = sem pool)
+WORKERS = _numero_env("CENTRAL_BANCOS_OCR_WORKERS", 0)
+
+CACHE_DIR = os.environ.get(
+    "CENTRAL_BANCOS_OCR_CACHE",
+    os.path.join(os.path.expanduser("~"), ".central-bancos", "ocr"))
+
+# Limite do cache de OCR em MB (0 desliga o cache)
+LIMITE_MB = _numero_env("CENTRAL_BANCOS_OCR_CACHE_MB", 64, float)
+
+
+# ==========================================================
+# 🔹 Imagem da página
+# ==========================================================
+def imagem_pagina(pagina, dpi=DPI, cinza=CINZA):
+    """
+    Rasteriza uma página fitz
+    ---------------------------------------------------------
+    Retorna (modo, largura, altura, amostras): bytes crus,
+    prontos para o Image.frombytes do processo do OCR.
+    """
+    pix = pagina.get_pixmap(dpi=dpi, alpha=False,
+                            colorspace=fitz.csGRAY if cinza else fitz.csRGB)
+    return ("L" if cinza else "RGB"), pix.width, pix.height, pix.samples
+
+
+def reconhecer(imagem, idioma=IDIOMA):
+    """Texto de uma imagem de imagem_pagina() (roda no processo do pool)."""
+    modo, largura, altura, amostras = imagem
+    return pytesseract.image_to_string(
+        Image.frombytes(modo, (largura, altura), amostras), lang=idioma)
+
+
+# ==========================================================
+# 🔹 Cache dos textos reconhecidos
+# ==========================================================
+@functools.lru_cache(maxsize=1)
+def versao_tesseract():
+    """Versão do tesseract instalado (entra na chave do cache)."""
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "?"
+
+
+def chave_imagem(imagem, dpi, idioma):
+    """Chave do cache: SHA-256 dos pixels, do tamanho e das opções do OCR."""
+    modo, largura, altura, amostras = imagem
+    h = hashlib.sha256(
+        f"{modo}|{largura}x{altura}|{dpi}|{idioma}|{versao_tesseract()}|".encode("utf-8"))
+    h.update(amostras)
+    return h.hexdigest()
+
+
+def _consultar(imagem, dpi, idioma):
+    # (chave, texto): texto None = ainda não reconhecido
+    if LIMITE_MB <= 0:
+        return None, None
+    try:
+        chave = chave_imagem(imagem, dpi, idioma)
+        achou, texto = cache_extracao.obter(chave, CACHE_DIR)
+    except OSError:
+        return None, None
+    return chave, (texto if achou else None)
+
+
+def _guardar(chave, texto):
+    if chave is None:
+        return
+    try:
+        cache_extracao.gravar(chave, texto, CACHE_DIR, LIMITE_MB)
+    except Exception:
+        pass  # cache é opcional: nunca derruba a extração
+
+
+# ==========================================================
+# 🔹 Pool de processos
+# ==========================================================
+def _iniciar_worker():
+    # Um tesseract por núcleo: sem threads OpenMP disputando entre si
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _abrir_pool(total_paginas, max_workers):
+    if max_workers is None:
+        # Dentro de um worker do motor os arquivos já ocupam os núcleos
+        max_workers = 1 if processamento.em_worker() else WORKERS
+    workers = processamento.numero_de_workers(total_paginas, max_workers)
+    if workers <= 1:
+        return None, 1
+    try:
+        # Mesmo contexto do motor: o Desktop abre o pool das threads do Qt
+        return ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=processamento.contexto_processos(),
+                                   initializer=_iniciar_worker), workers
+    except (OSError, NotImplementedError):
+        return None, 1
+
+
+# ==========================================================
+# 🔹 Texto das páginas (camada de texto ou OCR)
+# ==========================================================
+def textos_paginas(doc, precisa_ocr=None, dpi=DPI, cinza=CINZA,
+                   idioma=IDIOMA, max_workers=None):
+    """
+    Gera o texto de cada página de um documento fitz, na ordem
+    ---------------------------------------------------------
+    - precisa_ocr(texto): True manda a página ao OCR em vez de
+      usar a camada de texto (padrão: todas vão ao OCR)
+    - dpi / cinza: resolução e cor da imagem rasterizada
+    - idioma: idioma do tesseract
+    - max_workers: processos do OCR (padrão: WORKERS)
+    ---------------------------------------------------------
+    Reporta o progresso por página entregue. Enquanto o texto
+    de uma página não sai, só as seguintes dentro da janela do
+    pool são rasterizadas.
+    """
+    total = len(doc)
+    pool, workers = _abrir_pool(total, max_workers)
+    janela = 2 * workers
+    # (texto pronto ou futuro do OCR, chave do cache), na ordem das páginas
+    fila = deque()
+    em_voo = 0
+    entregues = 0
+
+    def pronto(item):
+        texto, chave = item
+        if not isinstance(texto, str):
+            with etapa(TEXTO):
+                texto = texto.result()
+            _guardar(chave, texto)
+        return texto
+
+    try:
+        for pagina in doc:
+            chave = None
+            with etapa(TEXTO):
+                try:
+                    texto = pagina.get_text() if precisa_ocr else ""
+                except Exception:
+                    texto = ""  # camada de texto ilegível conta como página sem texto
+                if precisa_ocr is None or precisa_ocr(texto):
+                    imagem = imagem_pagina(pagina, dpi, cinza)
+                    # Imagem já reconhecida antes sai direto do cache
+                    chave, texto = _consultar(imagem, dpi, idioma)
+                    if texto is None and pool is None:
+                        texto = reconhecer(imagem, idioma)
+                        _guardar(chave, texto)
+                    elif texto is None:
+                        texto = pool.submit(reconhecer, imagem, idioma)
+                        em_voo += 1
+                    del imagem
+            fila.append((texto, chave))
+
+            # Entrega o que já está pronto; janela cheia espera a mais antiga
+            while fila and (isinstance(fila[0][0], str) or em_voo >= janela
+                            or fila[0][0].done()):
+                item = fila.popleft()
+                if not isinstance(item[0], str):
+                    em_voo -= 1
+                texto = pronto(item)
+                entregues += 1
+                yield texto
+                reportar(entregues / total)
+
+        while fila:
+            texto = pronto(fila.popleft())
+            entregues += 1
+            yield texto
+            reportar(entregues / total)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,494 @@
+# ==========================================================
+# Módulo: pdf_sintetico.py
+# Extratos sintéticos (PyMuPDF) no layout de cada banco
+#   - Um layout por módulo de banco (cabeçalho, lançamento, rodapé)
+#   - Santander modelado no "01 SANTANDER.debug.txt"
+#   - Nº de páginas livre (1, 10, 100, 1000...) e semente fixa
+#   - Usado pelo benchmark.py
+# ==========================================================
+
+import os
+import random
+
+import fitz  # PyMuPDF
+
+# Versão dos layouts: altere ao mudar um layout (renova os PDFs salvos)
+VERSAO = "1"
+
+LARGURA, ALTURA = 595, 842  # A4 em pontos
+MARGEM = 36
+
+MESES = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+         "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+NOMES = ["MARIA APARECIDA SILVA", "JOSE CARLOS SOUZA", "ANA PAULA LIMA",
+         "COMERCIAL NORTE LTDA", "DISTRIBUIDORA SOL NASCENTE", "JOAO PEREIRA",
+         "MERCADO BOA VISTA", "FRANCISCA OLIVEIRA", "TRANSPORTES RAPIDO ME",
+         "PADARIA PAO DOURADO"]
+
+CREDITOS = ["PIX RECEBIDO", "TED RECEBIDA", "DEPOSITO EM DINHEIRO",
+            "PAGAMENTO CARTAO DE CREDITO", "PAGAMENTO CARTAO DE DEBITO",
+            "COBRANCA RECEBIDA"]
+
+DEBITOS = ["PIX ENVIADO", "TED ENVIADA", "PAGAMENTO DE BOLETO", "TARIFA PIX",
+           "PAGAMENTO FORNECEDOR", "DEBITO AUTOMATICO AGUA"]
+
+
+# ==========================================================
+# 🔹 Valores e contexto do extrato
+# ==========================================================
+def brl(valor):
+    """Valor absoluto no formato brasileiro (1.234,56)."""
+    texto = f"{abs(valor):,.2f}"
+    return texto.replace(",", "v").replace(".", ",").replace("v", ".")
+
+
+class Contexto:
+    """
+    Estado do extrato sendo gerado
+    ---------------------------------------------------------
+    - indice: nº do lançamento atual (0, 1, 2...)
+    - pagina / paginas: página atual e total
+    - dia, mes, ano: data do lançamento atual
+    - primeiro_do_dia / posicao_no_dia: agrupamento por data
+    ---------------------------------------------------------
+    """
+
+    def __init__(self, paginas, semente=0, mes=3, ano=2025, por_dia=12):
+        self.rng = random.Random(semente)
+        self.paginas = paginas
+        self.pagina = 0
+        self.indice = 0
+        self.mes = mes
+        self.ano = ano
+        self.por_dia = por_dia
+        self.saldo = 10000.0
+
+    @property
+    def dia(self):
+        return 1 + (self.indice // self.por_dia) % 28
+
+    @property
+    def posicao_no_dia(self):
+        return self.indice % self.por_dia
+
+    @property
+    def primeiro_do_dia(self):
+        return self.posicao_no_dia == 0
+
+    def data(self, formato="%d/%m/%Y"):
+        return (formato.replace("%d", f"{self.dia:02d}")
+                .replace("%m", f"{self.mes:02d}")
+                .replace("%Y", str(self.ano))
+                .replace("%y", str(self.ano)[-2:]))
+
+    @property
+    def emissao(self):
+        """Data de emissão do extrato (dia 02 do mês seguinte)."""
+        return f"02/{self.mes % 12 + 1:02d}/{self.ano + self.mes // 12}"
+
+    @property
+    def nome_mes(self):
+        return MESES[self.mes - 1]
+
+    def valor(self, negativo=None):
+        """Valor com sinal (débito < 0); atualiza o saldo."""
+        if negativo is None:
+            negativo = self.rng.random() < 0.4
+        escala = 10 if self.rng.random() < 0.1 else 1  # alguns valores altos
+        valor = round(self.rng.uniform(1, 5000) * escala, 2)
+        valor = -valor if negativo else valor
+        self.saldo = round(self.saldo + valor, 2)
+        return valor
+
+    def descricao(self, valor):
+        return self.rng.choice(DEBITOS if valor < 0 else CREDITOS)
+
+    def nome(self):
+        return self.rng.choice(NOMES)
+
+    def numero(self, digitos=6):
+        return f"{self.rng.randrange(10 ** digitos):0{digitos}d}"
+
+
+# ==========================================================
+# 🔹 Layouts
+# Cada layout tem:
+#   cabecalho(ctx) / rodape(ctx): linhas fixas da página
+#   registro(ctx): linhas de um lançamento
+#   tamanho, espaco: fonte e distância entre linhas
+#   separar: espaço extra entre lançamentos (blocos do PyMuPDF)
+#   grade: x das colunas de uma tabela com bordas (pdfplumber)
+# Uma linha é um texto ou uma lista de (x, texto) na mesma altura.
+# ==========================================================
+def _asaas_registro(ctx):
+    v = ctx.valor()
+    sinal = "-" if v < 0 else ""
+    return [ctx.data(), f"{ctx.descricao(v).title()} - {ctx.nome().title()}",
+            f"R$ {sinal}{brl(v)}"]
+
+
+def _bnb_registro(ctx):
+    v = ctx.valor()
+    dia = f"{ctx.dia:02d} " if ctx.primeiro_do_dia else "   "
+    return [f"{dia}{ctx.descricao(v)} {ctx.numero(5)} {brl(v)}{'-' if v < 0 else '+'}"]
+
+
+def _bradesco_registro(ctx):
+    v = ctx.valor()
+    linhas = [ctx.data()] if ctx.primeiro_do_dia else []
+    return linhas + [ctx.descricao(v), f"{ctx.nome()} {ctx.numero()}",
+                     f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+_BRASIL_COLUNAS = [36, 96, 156, 196, 236, 376, 436, 506]
+
+
+def _brasil_cabecalho(ctx):
+    cab = ["Dt. balancete", "Dt. movimento", "Ag. origem", "Lote",
+           "Histórico", "Documento", "Valor R$", "Saldo"]
+    return ["Banco do Brasil - Consultas - Extrato de conta corrente",
+            "Agência 1234-5  Conta corrente 98765-4  EMPRESA SINTETICA LTDA",
+            list(zip(_BRASIL_COLUNAS, cab))]
+
+
+def _brasil_registro(ctx):
+    v = ctx.valor()
+    tipo = "D" if v < 0 else "C"
+    linhas = [list(zip(_BRASIL_COLUNAS, [
+        ctx.data(), "", "0000", ctx.numero(5), ctx.descricao(v).title(),
+        ctx.numero(), f"{brl(v)} {tipo}", ""]))]
+    if ctx.rng.random() < 0.5:  # histórico em duas linhas
+        linhas.append([(_BRASIL_COLUNAS[4], ctx.nome().title())])
+    return linhas
+
+
+def _btg_registro(ctx):
+    v = ctx.valor()
+    return [ctx.data(), ctx.descricao(v), ctx.nome(),
+            f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _caixa_registro(ctx):
+    v = ctx.valor()
+    return [f"{ctx.data()} {ctx.numero()} {ctx.descricao(v)} {brl(v)} {'D' if v < 0 else 'C'}"]
+
+
+def _daycoval_registro(ctx):
+    v = ctx.valor()
+    sinal = "-" if v < 0 else ""
+    if ctx.rng.random() < 0.7:
+        return [f"{ctx.data('%d/%m')} {ctx.descricao(v)} {ctx.nome()} {sinal}{brl(v)}"]
+    return [ctx.data("%d/%m"), ctx.descricao(v), ctx.nome(), f"{sinal}{brl(v)}"]
+
+
+def _inter_registro(ctx):
+    v = ctx.valor()
+    linhas = []
+    if ctx.primeiro_do_dia:
+        linhas.append(f"{ctx.dia} de {ctx.nome_mes} de {ctx.ano}   "
+                      f"Saldo do dia: R$ {brl(ctx.saldo)}")
+    sinal = "-" if v < 0 else ""
+    linhas.append([(MARGEM, f'{ctx.descricao(v).capitalize()}: "{ctx.nome()}"'),
+                   (400, f"{sinal}R$ {brl(v)}"), (490, f"R$ {brl(ctx.saldo)}")])
+    return linhas
+
+
+def _itau2_registro(ctx):
+    v = ctx.valor()
+    return [ctx.data(), f"{ctx.descricao(v)} {ctx.nome()}",
+            f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _itau_consolidado_registro(ctx):
+    v = ctx.valor()
+    sinal = "-" if v < 0 else ""
+    return [f"{ctx.data('%d/%m')} {ctx.descricao(v)} {ctx.nome()} {brl(v)}{sinal}"]
+
+
+def _nubank_registro(ctx):
+    metade = ctx.por_dia // 2
+    v = ctx.valor(negativo=ctx.posicao_no_dia >= metade)
+    linhas = []
+    if ctx.primeiro_do_dia:
+        abrev = ctx.nome_mes[:3].upper().replace("Ç", "C")
+        linhas += [f"{ctx.dia:02d} {abrev} {ctx.ano}",
+                   f"Total de entradas + {brl(v * metade)}"]
+    if ctx.posicao_no_dia == metade:
+        linhas.append(f"Total de saídas - {brl(v * metade)}")
+    if v < 0:
+        desc = ctx.rng.choice(["Transferência enviada pelo Pix",
+                               "Pagamento de boleto efetuado",
+                               "Compra aprovada no débito"])
+    else:
+        desc = ctx.rng.choice(["Transferência recebida pelo Pix",
+                               "Transferência Recebida", "Resgate RDB"])
+    return linhas + [desc, f"{ctx.nome()} - {ctx.numero(3)}.{ctx.numero(3)}",
+                     brl(v)]
+
+
+def _pagbank_registro(ctx):
+    v = ctx.valor()
+    return [ctx.data(), ctx.descricao(v).capitalize(), ctx.nome(),
+            f"{'-' if v < 0 else ''}R$ {brl(v)}"]
+
+
+def _safra_registro(ctx):
+    v = ctx.valor()
+    return [f"{ctx.data('%d/%m')} {ctx.descricao(v)} {ctx.nome()} {ctx.numero(6)} "
+            f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _santander_cabecalho(ctx):
+    return ["Conta Corrente > Extrato", "Internet Banking Empresarial",
+            "EMPRESA SINTETICA LTDA", "Agência: 1584", "Conta: 130011060",
+            "Período:", f"01/{ctx.mes:02d}/{ctx.ano} a 28/{ctx.mes:02d}/{ctx.ano}",
+            "Data/Hora:", f"{ctx.emissao} às 09:17h",
+            "Data", "Histórico", "Documento", "Valor", "Saldo"]
+
+
+def _santander_rodape(ctx):
+    return [f"{ctx.emissao}, 09:26", "IBPJ", "about:blank",
+            f"{ctx.pagina}/{ctx.paginas}"]
+
+
+def _santander_registro(ctx):
+    v = ctx.valor()
+    desc = ctx.descricao(v)
+    if ctx.rng.random() < 0.6:
+        linhas = [f"{desc} {ctx.numero(11)}"]
+    else:  # descrição quebrada em duas linhas, como no extrato real
+        texto = f"{desc} {ctx.nome()}"
+        linhas = [texto[:29], texto[29:] or "-"]
+    return [ctx.data()] + linhas + [ctx.numero(), f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _sicredi_registro(ctx):
+    v = ctx.valor()
+    return [ctx.data(), f"{ctx.descricao(v)} {ctx.nome()}", f"PIX{ctx.numero()}",
+            f"{'-' if v < 0 else ''}{brl(v)}", brl(ctx.saldo)]
+
+
+def _sofisa_registro(ctx):
+    v = ctx.valor()
+    return [f"{ctx.data('%d/%m/%y')} {ctx.descricao(v)}", ctx.nome(),
+            f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _stone_registro(ctx):
+    v = ctx.valor()
+    tipo = "Débito" if v < 0 else "Crédito"
+    return [f"{ctx.data()} Pix | {tipo} {brl(v)} {brl(ctx.saldo)}",
+            f"{ctx.descricao(v).capitalize()} {ctx.nome()}"]
+
+
+def _xp_registro(ctx):
+    v = ctx.valor()
+    sinal = "-" if v < 0 else ""
+    return [f"{ctx.data()} {ctx.descricao(v)} {ctx.nome()}",
+            f"{sinal}R$ {brl(v)} R$ {brl(ctx.saldo)}"]
+
+
+def _itau_registro(ctx):
+    v = ctx.valor()
+    return [f"{ctx.data()} {ctx.descricao(v)} {ctx.nome()} "
+            f"{'-' if v < 0 else ''}{brl(v)} {brl(ctx.saldo)}"]
+
+
+def _manix_registro(ctx):
+    v = ctx.valor()
+    return [ctx.data(), f"LANC-{ctx.numero(5)}", ctx.nome(), ctx.numero(6),
+            f"{'-' if v < 0 else ''}{brl(v)}"]
+
+
+def _fixo(*linhas):
+    return lambda ctx: list(linhas)
+
+
+LAYOUTS = {
+    "Asaas": dict(
+        cabecalho=lambda ctx: ["ASAAS GESTÃO FINANCEIRA S.A.", "Extrato de movimentações",
+                               f"Período: {ctx.nome_mes} de {ctx.ano}"],
+        registro=_asaas_registro),
+    "BNB": dict(
+        cabecalho=lambda ctx: ["BANCO DO NORDESTE DO BRASIL S.A.", "Extrato de Conta Corrente",
+                               f"Mês: {ctx.nome_mes.capitalize()}/{ctx.ano}"],
+        registro=_bnb_registro),
+    "Bradesco": dict(
+        cabecalho=lambda ctx: ["Bradesco Net Empresa", "Extrato Mensal / Por Período",
+                               "Nome do usuário: USUARIO SINTETICO",
+                               "CNPJ: 12.345.678/0001-90",
+                               f"Folha {ctx.pagina}/{ctx.paginas}"],
+        registro=_bradesco_registro),
+    "Brasil": dict(cabecalho=_brasil_cabecalho, registro=_brasil_registro,
+                   tamanho=6, espaco=10, grade=_BRASIL_COLUNAS + [LARGURA - MARGEM]),
+    "Btg": dict(
+        cabecalho=_fixo("BTG Pactual Empresas", "Extrato de conta corrente",
+                        "Data lançamento", "Descrição do lançamento",
+                        "Entradas / Saídas (R$)"),
+        registro=_btg_registro),
+    "Caixa": dict(
+        cabecalho=_fixo("CAIXA ECONÔMICA FEDERAL", "Extrato por período",
+                        "Data Mov. Nr. Doc. Histórico Valor"),
+        registro=_caixa_registro),
+    "Daycoval": dict(
+        cabecalho=lambda ctx: ["Banco Daycoval S.A.", "Extrato de conta corrente",
+                               "EMPRESA SINTETICA LTDA",
+                               f"Período: 01/{ctx.mes:02d}/{ctx.ano} a 28/{ctx.mes:02d}/{ctx.ano}"],
+        rodape=lambda ctx: ["Ouvidoria Daycoval 0800 777 0900", "SAC 0800 775 0500",
+                            f"Página {ctx.pagina} de {ctx.paginas}"],
+        registro=_daycoval_registro),
+    "Inter": dict(
+        cabecalho=_fixo("Banco Inter", "Extrato de conta corrente"),
+        registro=_inter_registro, espaco=16),
+    "Itau2": dict(
+        cabecalho=_fixo("Itaú BBA", "Extrato de conta corrente", "Data",
+                        "Lançamento", "Valor (R$)"),
+        registro=_itau2_registro),
+    "ItauConsolidado": dict(
+        cabecalho=lambda ctx: ["Itaú Unibanco S.A.",
+                               f"Período de visualização: 01/{ctx.mes:02d}/{ctx.ano} até 28/{ctx.mes:02d}/{ctx.ano}",
+                               "Data Descrição Entradas R$ Saídas R$ Saldo R$"],
+        registro=_itau_consolidado_registro),
+    "Nubank": dict(
+        cabecalho=lambda ctx: ["NU PAGAMENTOS S.A.", "VALORES EM R$",
+                               f"PÁGINA {ctx.pagina} DE {ctx.paginas}"],
+        registro=_nubank_registro),
+    "Pagbank": dict(
+        cabecalho=_fixo("PagBank", "Extrato da conta", "Data Descrição Valor"),
+        registro=_pagbank_registro, separar=10),
+    "Safra": dict(
+        cabecalho=_fixo("Banco Safra S.A.", "Lançamentos realizados",
+                        "Data Lançamento Complemento Documento Valor"),
+        registro=_safra_registro),
+    "Santander": dict(cabecalho=_santander_cabecalho, rodape=_santander_rodape,
+                      registro=_santander_registro, tamanho=6, espaco=6.5),
+    "Sicredi": dict(
+        cabecalho=_fixo("Sicredi", "Extrato de conta corrente", "Data", "Descrição",
+                        "Documento", "Valor (R$)", "Saldo (R$)"),
+        registro=_sicredi_registro),
+    "Sofisa": dict(
+        cabecalho=_fixo("Banco Sofisa Direto", "Extrato por período",
+                        "Cliente : EMPRESA SINTETICA LTDA", "Agência: 0001",
+                        "Conta: 123456-7", "Entradas/Saídas"),
+        registro=_sofisa_registro),
+    "Stone": dict(
+        cabecalho=_fixo("Extrato de conta corrente", "Titular EMPRESA SINTETICA LTDA",
+                        "Instituição Stone Instituição de Pagamento",
+                        "Data Tipo Valor Saldo (R$) Contraparte"),
+        registro=_stone_registro),
+    "XpInvestimentos": dict(
+        cabecalho=_fixo("XP Investimentos", "Extrato de conta corrente",
+                        "Data Histórico Valor Saldo"),
+        registro=_xp_registro),
+    "itau": dict(
+        cabecalho=_fixo("Itaú Empresas", "Extrato conta corrente",
+                        "Data Lançamentos Valor (R$) Saldo (R$)"),
+        registro=_itau_registro, espaco=11),  # PyPDF2 junta linhas muito próximas
+    "itau_MANIX": dict(
+        cabecalho=lambda ctx: ["MANIX COMERCIO LTDA", "Financeiro Extrato de Contas",
+                               f"Data: {ctx.emissao}", "Hora: 09:17",
+                               f"Pág. {ctx.pagina}"],
+        registro=_manix_registro),
+}
+
+
+# ==========================================================
+# 🔹 Desenho das páginas
+# ==========================================================
+_FONTE = None
+
+
+def _escrever(escritor, linha, y, tamanho):
+    # Um TextWriter por página: insert_text por célula fica lento em 1000 páginas
+    global _FONTE
+    if _FONTE is None:
+        _FONTE = fitz.Font("helv")
+    celulas = [(MARGEM, linha)] if isinstance(linha, str) else linha
+    for x, texto in celulas:
+        if texto:
+            escritor.append((x + 2, y + tamanho), texto,
+                            font=_FONTE, fontsize=tamanho)
+
+
+def _bordas(page, topos, espaco, grade):
+    # Linhas horizontais entre as linhas da tabela e verticais nas colunas
+    if not topos:
+        return
+    base = topos[-1] + espaco
+    forma = page.new_shape()
+    for y in topos + [base]:
+        forma.draw_line((grade[0], y), (grade[-1], y))
+    for x in grade:
+        forma.draw_line((x, topos[0]), (x, base))
+    forma.finish(width=0.5)
+    forma.commit()
+
+
+def gerar_pdf(modulo, paginas, caminho=None, semente=0):
+    """
+    Gera um extrato sintético no layout do banco
+    ---------------------------------------------------------
+    - modulo: módulo do banco (chave de LAYOUTS)
+    - paginas: nº de páginas
+    - caminho: onde salvar (None = só devolve os bytes)
+    - semente: mesma semente, mesmo PDF
+    ---------------------------------------------------------
+    Retorna (bytes ou caminho, nº de lançamentos gerados).
+    """
+    layout = LAYOUTS[modulo]
+    tamanho = layout.get("tamanho", 7)
+    espaco = layout.get("espaco", tamanho + 2)
+    separar = layout.get("separar", 0)
+    grade = layout.get("grade")
+    cabecalho = layout.get("cabecalho", _fixo())
+    rodape = layout.get("rodape", _fixo())
+
+    ctx = Contexto(paginas, semente)
+    doc = fitz.open()
+    pendente = None
+    for n in range(1, paginas + 1):
+        ctx.pagina = n
+        page = doc.new_page(width=LARGURA, height=ALTURA)
+        escritor = fitz.TextWriter(page.rect)
+        y = MARGEM
+        topos = []
+        for linha in cabecalho(ctx):
+            if grade and not isinstance(linha, str):
+                topos.append(y)
+            _escrever(escritor, linha, y, tamanho)
+            y += espaco
+        y += separar
+
+        linhas_rodape = rodape(ctx)
+        limite = ALTURA - MARGEM - len(linhas_rodape) * espaco
+        while True:
+            if pendente is None:
+                pendente = layout["registro"](ctx)
+            if y + len(pendente) * espaco + separar > limite:
+                break
+            for linha in pendente:
+                if grade:
+                    topos.append(y)
+                _escrever(escritor, linha, y, tamanho)
+                y += espaco
+            y += separar
+            pendente = None
+            ctx.indice += 1
+
+        if grade:
+            _bordas(page, topos, espaco, grade)
+        y = limite
+        for linha in linhas_rodape:
+            _escrever(escritor, linha, y, tamanho)
+            y += espaco
+        escritor.write_text(page)
+
+    if caminho is None:
+        dados = doc.tobytes(garbage=3, deflate=True)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        doc.save(caminho, garbage=3, deflate=True)
+        dados = caminho
+    doc.close()
+    return dados, ctx.indice
@@ -0,0 +1,174 @@
+# ==========================================================
+# Módulo: planilha.py
+# Gravação do Excel formatado numa única passagem
+#   - Workbook write-only do openpyxl (sem to_excel + load_workbook)
+#   - Células recebem os estilos nomeados de estilos.py
+#   - Tabela, larguras e cabeçalho congelado na mesma escrita
+#   - Coluna de valor chega em centavos inteiros e vira reais
+#     só aqui, no formato de moeda da célula
+# ==========================================================
+
+import warnings
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableStyleInfo, TableColumn
+
+import estilos
+import normalizacao
+from metricas import etapa, EXCEL
+from estilos import AZUL, VERMELHO
+
+# Acima deste nº de linhas a largura das colunas é medida por amostra
+AMOSTRA_LARGURAS = 20000
+
+
+# ==========================================================
+# 🔹 Auxiliares
+# ==========================================================
+def _vazio(valor):
+    # None, NaN e NaT (NaN != NaN)
+    return valor is None or valor != valor
+
+
+def _cor_pelo_sinal(valor):
+    if isinstance(valor, (int, float)):
+        return AZUL if valor >= 0 else VERMELHO
+    return None
+
+
+def _em_reais(serie):
+    # Centavos inteiros → reais; texto (valor não reconhecido) segue igual
+    if pd.api.types.is_integer_dtype(serie):
+        return normalizacao.reais(serie).to_numpy()
+    if serie.dtype == object:
+        return [v / 100 if isinstance(v, int) else v for v in serie]
+    return serie
+
+
+def larguras_colunas(df, folga=2, minima=0, amostra=AMOSTRA_LARGURAS):
+    """
+    Largura de cada coluna direto do DataFrame
+    ---------------------------------------------------------
+    - maior texto da coluna (cabeçalho incluso) + folga
+    - minima: largura mínima
+    - amostra: acima deste nº de linhas mede só uma amostra
+      (None mede todas)
+    ---------------------------------------------------------
+    Retorna {coluna: largura} para salvar_planilha.
+    """
+    if amostra and len(df) > amostra:
+        df = df.sample(n=amostra, random_state=0)
+
+    larguras = {}
+    for coluna in df.columns:
+        serie = df[coluna].dropna()
+        if not pd.api.types.is_datetime64_any_dtype(serie):
+            serie = serie[serie.astype(bool)]  # vazios e zeros não contam
+        maior = int(serie.astype(str).str.len().max()) if len(serie) else 0
+        nome = str(coluna)
+        larguras[nome] = max(max(maior, len(nome)) + folga, minima)
+    return larguras
+
+
+def _tabela(nome, colunas, total_linhas, estilo):
+    ref = f"A1:{get_column_letter(len(colunas))}{total_linhas + 1}"
+    tab = Table(displayName=nome, ref=ref)
+    tab.tableStyleInfo = TableStyleInfo(
+        name=estilo,
+        showFirstColumn=False,
+        showLastColumn=False,
+        showRowStripes=True,
+        showColumnStripes=False
+    )
+    # No modo write-only as colunas da tabela são declaradas à mão
+    for i, coluna in enumerate(colunas, start=1):
+        tab.tableColumns.append(TableColumn(id=i, name=coluna))
+    return tab
+
+
+# ==========================================================
+# 🔹 Gravação
+# ==========================================================
+def salvar_planilha(df, caminho_excel, coluna_valor=None, cores=None,
+                    formatos=None, centralizar=(), larguras=None, folga=2,
+                    largura_minima=0, tabela="TabelaLancamentos",
+                    estilo_tabela="TableStyleMedium2", titulo="Sheet1"):
+    """
+    Grava `df` já formatado no Excel
+    ---------------------------------------------------------
+    - coluna_valor: coluna em azul (>= 0) / vermelho (< 0),
+      em centavos inteiros (gravada em reais)
+    - cores: cor de cada linha da coluna de valor (no lugar do sinal)
+    - formatos: {coluna: formato} das demais colunas
+    - centralizar: colunas centralizadas (as outras à esquerda)
+    - larguras: {coluna: largura}; padrão = larguras_colunas(df)
+    - tabela: nome da tabela do Excel (None = sem tabela)
+    ---------------------------------------------------------
+    Retorna `caminho_excel`.
+    """
+    with etapa(EXCEL, linhas=len(df)):
+        if coluna_valor in df.columns:
+            df = df.assign(**{coluna_valor: _em_reais(df[coluna_valor])})
+        colunas = [str(c) for c in df.columns]
+        formatos = dict(formatos or {})
+        if larguras is None:
+            larguras = larguras_colunas(df, folga, largura_minima)
+
+        # Estilo de cada coluna de texto (datas sem formato viram DD/MM/AAAA)
+        estilos_colunas = []
+        for nome, coluna in zip(colunas, df.columns):
+            if nome not in formatos and pd.api.types.is_datetime64_any_dtype(df[coluna]):
+                formatos[nome] = estilos.FORMATO_DATA
+            base = estilos.TEXTO_CENTRO if nome in centralizar else estilos.TEXTO
+            estilos_colunas.append(estilos.derivar(base, formato=formatos.get(nome)))
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(titulo)
+        registrados = set()
+
+        def estilo(nome):
+            if nome not in registrados:
+                estilos.registrar(wb, nome)
+                registrados.add(nome)
+            return nome
+
+        # Larguras e painel congelado precisam vir antes das linhas
+        ws.freeze_panes = "A2"
+        for i, coluna in enumerate(colunas, start=1):
+            if coluna in larguras:
+                ws.column_dimensions[get_column_letter(i)].width = larguras[coluna]
+
+        cabecalho = []
+        for coluna in colunas:
+            cell = WriteOnlyCell(ws, value=coluna)
+            cell.style = estilo(estilos.CABECALHO)
+            cabecalho.append(cell)
+        ws.append(cabecalho)
+
+        idx_valor = colunas.index(coluna_valor) if coluna_valor in colunas else None
+        cores = iter(cores) if cores is not None else None
+
+        for linha in df.itertuples(index=False, name=None):
+            cor = next(cores) if cores is not None else None
+            celulas = []
+            for i, valor in enumerate(linha):
+                cell = WriteOnlyCell(ws, value=None if _vazio(valor) else valor)
+                if i == idx_valor:
+                    if cores is None:
+                        cor = _cor_pelo_sinal(cell.value)
+                    cell.style = estilo(estilos.estilo_valor(cor))
+                else:
+                    cell.style = estilo(estilos_colunas[i])
+                celulas.append(cell)
+            ws.append(celulas)
+
+        if tabela:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ws.add_table(_tabela(tabela, colunas, len(df), estilo_tabela))
+
+        wb.save(caminho_excel)
+        return caminho_excel
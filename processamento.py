@@ -0,0 +1,158 @@
+# ==========================================================
+# Módulo: processamento.py
+# Motor de execução compartilhado pelos bancos
+#   - Distribui os PDFs entre os núcleos (ProcessPoolExecutor)
+#   - Devolve os resultados na mesma ordem dos arquivos
+#   - Repassa o progresso real (por página) ao progress_cb
+# ==========================================================
+
+import os
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import metricas
+import progresso
+from progresso import Progresso
+
+_fila_progresso = None
+
+
+# ==========================================================
+# 🔹 Quantidade de processos
+# ==========================================================
+def numero_de_workers(total_arquivos, max_workers=None):
+    """
+    Define quantos processos usar para `total_arquivos` PDFs.
+    A variável CENTRAL_BANCOS_WORKERS sobrescreve o padrão
+    (nº de núcleos disponíveis); 1 desliga o paralelismo.
+    """
+    if max_workers is None:
+        try:
+            max_workers = int(os.environ.get("CENTRAL_BANCOS_WORKERS", "0"))
+        except ValueError:
+            max_workers = 0
+    if max_workers <= 0:
+        try:
+            max_workers = len(os.sched_getaffinity(0))
+        except AttributeError:
+            max_workers = os.cpu_count() or 1
+    return max(1, min(total_arquivos, max_workers))
+
+
+def contexto_processos():
+    """
+    Contexto multiprocessing dos pools (motor e OCR)
+    ---------------------------------------------------------
+    Nunca fork: o Desktop abre os pools a partir das threads do
+    Qt e o servidor Web tem threads próprias; o filho de um fork
+    herda travas presas e pode travar. forkserver (um processo
+    limpo que só faz os forks) onde existir, senão spawn.
+    """
+    metodo = ("forkserver" if "forkserver" in multiprocessing.get_all_start_methods()
+              else "spawn")
+    return multiprocessing.get_context(metodo)
+
+
+# ==========================================================
+# 🔹 Lado do worker: envia os marcos de página pela fila
+# ==========================================================
+def _iniciar_worker(fila):
+    global _fila_progresso
+    _fila_progresso = fila
+
+
+def em_worker():
+    """True dentro de um processo aberto por mapear_arquivos."""
+    return _fila_progresso is not None
+
+
+def _executar(indice, funcao, caminho, *args):
+    def enviar(fracao):
+        _fila_progresso.put((indice, fracao))
+
+    # As medições do worker voltam junto com o resultado
+    with progresso.acompanhar(enviar), metricas.coletar() as medicoes:
+        resultado = funcao(caminho, *args)
+    return resultado, medicoes
+
+
+# ==========================================================
+# 🔹 Execução dos arquivos (paralela, resultado em ordem)
+# ==========================================================
+def mapear_arquivos(funcao, files, *args, max_workers=None,
+                    progress_cb=None, faixa=(0, 100)):
+    """
+    Executa `funcao(caminho, *args)` para cada PDF
+    ---------------------------------------------------------
+    - funcao: função de nível de módulo (enviada aos processos)
+    - files: lista de caminhos de PDFs
+    - args: argumentos extras repassados a `funcao`
+    - max_workers: nº de processos (padrão: núcleos livres)
+    - progress_cb: callback (0–100) alimentado por página lida
+    - faixa: trecho da barra ocupado pelas extrações
+    ---------------------------------------------------------
+    Gera tuplas (caminho, resultado, erro) na ordem de `files`.
+    Erros de um arquivo não interrompem os demais.
+    """
+    files = list(files)
+    workers = numero_de_workers(len(files), max_workers)
+    marcos = Progresso(progress_cb, len(files), *faixa) if progress_cb else None
+
+    if workers > 1:
+        ctx = contexto_processos()
+        try:
+            fila = ctx.Queue()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                       initializer=_iniciar_worker,
+                                       initargs=(fila,))
+        except (OSError, NotImplementedError):
+            pool = None
+        if pool is not None:
+            with pool:
+                futuros = [pool.submit(_executar, i, funcao, caminho, *args)
+                           for i, caminho in enumerate(files)]
+                concluidos = set()
+                for i, (caminho, futuro) in enumerate(zip(files, futuros)):
+                    while not futuro.done():
+                        _drenar_fila(fila, marcos, futuros, concluidos, 0.05)
+                    _drenar_fila(fila, marcos, futuros, concluidos, 0)
+                    try:
+                        resultado, medicoes = futuro.result()
+                    except Exception as e:
+                        yield caminho, None, e
+                    else:
+                        metricas.incorporar(medicoes)
+                        yield caminho, resultado, None
+            fila.close()
+            return
+
+    for i, caminho in enumerate(files):
+        ouvinte = (lambda f, i=i: marcos.arquivo(i, f)) if marcos else None
+        try:
+            with progresso.acompanhar(ouvinte):
+                resultado = funcao(caminho, *args)
+        except Exception as e:
+            resultado, erro = None, e
+        else:
+            erro = None
+        if marcos:
+            marcos.concluir(i)
+        yield caminho, resultado, erro
+
+
+def _drenar_fila(fila, marcos, futuros, concluidos, espera):
+    """Aplica os marcos recebidos dos workers e conclui os arquivos prontos."""
+    try:
+        while True:
+            indice, fracao = fila.get(timeout=espera) if espera else fila.get_nowait()
+            espera = 0
+            if marcos:
+                marcos.arquivo(indice, fracao)
+    except queue.Empty:
+        pass
+    if marcos:
+        for i, futuro in enumerate(futuros):
+            if i not in concluidos and futuro.done():
+                concluidos.add(i)
+                marcos.concluir(i)
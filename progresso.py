@@ -0,0 +1,82 @@
+# ==========================================================
+# Módulo: progresso.py
+# Progresso real das extrações (sem animação artificial)
+#   - Extratores reportam cada página lida (paginas / reportar)
+#   - Progresso converte os marcos por arquivo em 0–100
+#   - Usado pelo Streamlit (st.progress) e pelo LoaderDialog
+# ==========================================================
+
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+# ==========================================================
+# 🔹 Lado do extrator: reporta a fração lida do arquivo atual
+# ==========================================================
+def reportar(fracao):
+    ouvinte = getattr(_local, "ouvinte", None)
+    if ouvinte is not None:
+        ouvinte(max(0.0, min(1.0, fracao)))
+
+
+def paginas(paginas_pdf):
+    """
+    Percorre as páginas (fitz, pdfplumber, PyPDF2 ou lista)
+    reportando a fração concluída após cada página.
+    """
+    total = len(paginas_pdf)
+    for i, pagina in enumerate(paginas_pdf, start=1):
+        yield pagina
+        reportar(i / total)
+
+
+@contextmanager
+def acompanhar(callback):
+    """Direciona os marcos do extrator (0.0–1.0) para `callback`."""
+    anterior = getattr(_local, "ouvinte", None)
+    _local.ouvinte = callback
+    try:
+        yield
+    finally:
+        _local.ouvinte = anterior
+
+
+# ==========================================================
+# 🔹 Lado da interface: agrega os arquivos em percentual
+# ==========================================================
+class Progresso:
+    """
+    Converte as frações de cada arquivo no percentual global
+    ---------------------------------------------------------
+    - progress_cb: callback (0–100) da interface
+    - total: nº de arquivos
+    - inicio/fim: faixa da barra reservada às extrações
+    ---------------------------------------------------------
+    Só chama `progress_cb` quando o inteiro avança.
+    """
+
+    def __init__(self, progress_cb, total, inicio=0, fim=100):
+        self._cb = progress_cb
+        self._total = max(1, total)
+        self._inicio = inicio
+        self._fim = fim
+        self._fracoes = [0.0] * total
+        self._soma = 0.0
+        self._ultimo = -1
+
+    def arquivo(self, indice, fracao):
+        anterior = self._fracoes[indice]
+        if fracao <= anterior:
+            return
+        self._fracoes[indice] = fracao
+        self._soma += fracao - anterior
+        pct = int(self._inicio + (self._fim - self._inicio)
+                  * self._soma / self._total)
+        if pct > self._ultimo:
+            self._ultimo = pct
+            self._cb(pct)
+
+    def concluir(self, indice):
+        self.arquivo(indice, 1.0)
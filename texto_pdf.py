@@ -0,0 +1,123 @@
+# ==========================================================
+# Módulo: texto_pdf.py
+# Camada de texto dos PDFs, lida página a página
+#   - Gera páginas, linhas ou blocos sob demanda (geradores)
+#   - Só uma página fica em memória por vez
+#   - Reporta o progresso por página (progresso.paginas)
+#   - Abre o PDF de um caminho ou direto da memória (upload
+#     da Web), sem passar pelo disco
+# ==========================================================
+
+import io
+
+import fitz  # PyMuPDF
+
+from metricas import etapa, ABRIR, TEXTO
+from progresso import paginas
+
+
+# ==========================================================
+# 🔹 PDF em memória
+# ==========================================================
+class PdfEmMemoria(str):
+    """
+    PDF enviado pela Web, mantido só em memória
+    ---------------------------------------------------------
+    É o próprio nome do arquivo (str): os bancos o usam como
+    caminho em logs e nomes de saída sem mudança nenhuma.
+    - conteudo: bytes/memoryview do PDF
+    ---------------------------------------------------------
+    Abra com abrir_pdf(); segue junto aos processos do motor.
+    """
+
+    def __new__(cls, nome, conteudo):
+        fonte = super().__new__(cls, nome)
+        fonte.conteudo = conteudo
+        return fonte
+
+    def __reduce__(self):
+        # memoryview não é serializável: vai como bytes
+        return PdfEmMemoria, (str(self), bytes(self.conteudo))
+
+
+def conteudo_pdf(fonte):
+    """Bytes do PDF (da memória ou lidos do caminho)."""
+    if isinstance(fonte, PdfEmMemoria):
+        return fonte.conteudo
+    with open(fonte, "rb") as f:
+        return f.read()
+
+
+def abrir_pdf(fonte, motor="fitz"):
+    """
+    Abre o PDF de um caminho ou de um PdfEmMemoria
+    ---------------------------------------------------------
+    - motor: "fitz" (PyMuPDF), "pdfplumber" ou "PyPDF2"
+    ---------------------------------------------------------
+    Retorna o documento do motor (fitz.Document,
+    pdfplumber.PDF ou PdfReader).
+    """
+    em_memoria = isinstance(fonte, PdfEmMemoria)
+    if motor == "pdfplumber":
+        import pdfplumber  # só carregado pelos bancos que o usam
+        return pdfplumber.open(io.BytesIO(fonte.conteudo) if em_memoria else fonte)
+    if motor == "PyPDF2":
+        from PyPDF2 import PdfReader
+        return PdfReader(io.BytesIO(fonte.conteudo) if em_memoria else fonte)
+    if em_memoria:
+        return fitz.open(stream=fonte.conteudo, filetype="pdf")
+    return fitz.open(fonte)
+
+
+# ==========================================================
+# 🔹 Páginas
+# ==========================================================
+def paginas_texto(caminho_pdf, motor="fitz"):
+    """
+    Gera o texto de cada página do PDF
+    ---------------------------------------------------------
+    - caminho_pdf: caminho do arquivo ou PdfEmMemoria
+    - motor: "fitz" (PyMuPDF) ou "pdfplumber"
+    ---------------------------------------------------------
+    """
+    if motor == "pdfplumber":
+        with etapa(ABRIR):
+            pdf = abrir_pdf(caminho_pdf, motor)
+        with pdf:
+            for pagina in paginas(pdf.pages):
+                with etapa(TEXTO):
+                    texto = pagina.extract_text() or ""
+                yield texto
+                pagina.flush_cache()
+        return
+
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
+    with doc:
+        for pagina in paginas(doc):
+            with etapa(TEXTO):
+                texto = pagina.get_text()
+            yield texto
+
+
+# ==========================================================
+# 🔹 Linhas e blocos
+# ==========================================================
+def linhas_pdf(caminho_pdf, motor="fitz"):
+    """Gera as linhas do PDF, página a página (sem o texto inteiro)."""
+    for texto in paginas_texto(caminho_pdf, motor):
+        yield from texto.splitlines()
+
+
+def blocos_pdf(caminho_pdf):
+    """
+    Gera os blocos de texto do PyMuPDF, página a página
+    (x0, y0, x1, y1, texto, nº do bloco, tipo).
+    """
+    with etapa(ABRIR):
+        doc = abrir_pdf(caminho_pdf)
+    with doc:
+        for pagina in paginas(doc):
+            with etapa(TEXTO):
+                blocos = pagina.get_text("blocks")
+            yield from blocos